@@ -0,0 +1,110 @@
+"""Barrido de K intersecciones con el pool de M hilos fijo, contra un hilo por semáforo.
+
+Uso:
+    python benchmarks/pool_scaling.py [--ks 1 10 100 500 1000] [--workers 4] [--seconds 5]
+    python benchmarks/pool_scaling.py --baseline-max 0   # solo el pool
+
+Cada punto corre en un proceso aparte durante `--seconds` s de reloj y mide:
+hilos vivos, CPU consumida por segundo simulado, µs de CPU por intersección
+y tick, ticks logrados (% de los que el reloj pedía) y RSS. En el pool además
+el atraso medio y máximo de cada atención respecto de su tick. La referencia
+("threads") son K instancias del backend de hilos, 5K hilos en total; se
+corre solo hasta `--baseline-max` intersecciones.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _hijo(backend: str, k: int, workers: int, seconds: float) -> dict:
+    import threading
+    import time
+
+    from src.concurrency.memory import processes_rss
+    from src.config import TICK
+    from src.models.llegadas import FuenteBernoulli
+
+    ciclos = 10 ** 9  # que no termine sola
+    fuente = FuenteBernoulli(0.2, seed=0)
+    if backend == "pool":
+        from src.concurrency.pool_impl import PoolSimulation
+        sims = [PoolSimulation(ciclos, fuente=fuente, intersections=k, workers=workers)]
+    else:
+        from src.concurrency.threads_impl import ThreadsSimulation
+        sims = [ThreadsSimulation(ciclos, fuente=fuente) for _ in range(k)]
+
+    cpu0 = time.process_time()
+    for s in sims:
+        s.start()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu0
+    hilos = threading.active_count() - 1
+    rss = processes_rss([("MainProcess", None)])["MainProcess"]
+    if backend == "pool":
+        sim = sims[0]
+        ticks = sum(sim._atenciones)
+        extra = {
+            "retraso_prom_ms": 1000 * sum(sim._retraso_suma) / max(1, ticks),
+            "retraso_max_ms": 1000 * max(sim._retraso_max),
+        }
+    else:
+        # ticks de un worker de semáforo por intersección (todos tickean igual)
+        ticks = sum(s.metrics.values[s.metrics.slot("Semaforo-N:ticks")] for s in sims)
+        extra = {}
+    for s in sims:
+        s.stop()
+    esperados = k * seconds / TICK
+    return {
+        "hilos": hilos,
+        "cpu_por_s": cpu / seconds,
+        "us_por_tick": 1e6 * cpu / max(1, ticks),
+        "ticks_pct": 100 * ticks / esperados,
+        "rss_mb": rss / 2 ** 20,
+        **extra,
+    }
+
+
+def medir(backend: str, k: int, workers: int, seconds: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", backend, str(k), str(workers), str(seconds)],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 10, 100, 500, 1000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="M, fijo en todo el barrido")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--baseline-max", type=int, default=100,
+                        help="K máximo para la referencia de un hilo por semáforo")
+    parser.add_argument("--child", nargs=4, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        backend, k, workers, seconds = args.child
+        print(json.dumps(_hijo(backend, int(k), int(workers), float(seconds))))
+        return
+
+    print(f"M={args.workers} workers | {args.seconds:.0f}s por punto")
+    print(f"{'K':>6} {'backend':>8} {'hilos':>6} {'CPU/s':>6} {'µs/tick':>8} {'ticks':>6} {'RSS':>7} {'atraso':>16}")
+    for k in args.ks:
+        backends = ["pool"] + (["threads"] if k <= args.baseline_max else [])
+        for backend in backends:
+            m = medir(backend, k, args.workers, args.seconds)
+            atraso = f"{m['retraso_prom_ms']:.1f}/{m['retraso_max_ms']:.0f} ms" if "retraso_prom_ms" in m else "-"
+            print(
+                f"{k:>6} {backend:>8} {m['hilos']:>6} {m['cpu_por_s']:>6.2f} {m['us_por_tick']:>8.1f} "
+                f"{m['ticks_pct']:>5.0f}% {m['rss_mb']:>5.0f}MB {atraso:>16}"
+            )
+
+
+if __name__ == "__main__":
+    main()
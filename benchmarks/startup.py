@@ -0,0 +1,106 @@
+"""Tiempo de arranque: imports (`python -X importtime`) y tiempo hasta el primer cuadro.
+
+Uso:
+    python benchmarks/startup.py [--runs 5]
+
+Mide, en procesos nuevos:
+  * import de `main` (acumulado según -X importtime) y los módulos más caros;
+  * `main.py --help` de punta a punta;
+  * primer cuadro de la GUI con la caché del fondo fría y caliente (requiere
+    display; sin él se omite).
+Para comparar con otra versión basta correrlo en ese checkout.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Se corre en un proceso nuevo: crea la GUI, fuerza el primer dibujado y
+# reporta el instante absoluto en que quedó en pantalla.
+FIRST_FRAME = """
+import sys, time
+sys.path.insert(0, {root!r})
+from src.ui.gui_tk import TrafficGUI
+gui = TrafficGUI(mode="threads", cycles=1, system_info={{}})
+gui.root.update()
+print(time.time())
+gui._on_close()
+"""
+
+
+def importtime(module: str) -> list:
+    """(acumulado_us, módulo) de cada import al cargar `module`, de mayor a menor."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    filas = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        filas.append((int(cumulative), name.strip()))
+    return sorted(filas, reverse=True)
+
+
+def wall(cmd: list, runs: int) -> float:
+    tiempos = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, capture_output=True, check=True)
+        tiempos.append(time.perf_counter() - t0)
+    return statistics.median(tiempos)
+
+
+def first_frame(runs: int, cold: bool) -> float | None:
+    from src.ui.gui_tk import CACHE_DIR
+    tiempos = []
+    for _ in range(runs):
+        if cold:
+            shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        t0 = time.time()
+        res = subprocess.run(
+            [sys.executable, "-c", FIRST_FRAME.format(root=str(ROOT))],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if res.returncode != 0:
+            return None
+        tiempos.append(float(res.stdout.strip().splitlines()[-1]) - t0)
+    return statistics.median(tiempos)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    filas = importtime("main")
+    print(f"[IMPORT] main: {filas[0][0] / 1000:.1f} ms (acumulado)")
+    nombres = {n for _, n in filas}
+    for mod in ("tkinter", "PIL", "multiprocessing", "http.server", "cProfile", "pstats"):
+        print(f"    {mod:<16} {'cargado' if mod in nombres else 'no cargado'}")
+    print(f"[IMPORT] top {args.top}:")
+    for us, name in filas[1:args.top + 1]:
+        print(f"    {us / 1000:8.1f} ms  {name}")
+
+    print(f"[WALL] main.py --help: {wall([sys.executable, 'main.py', '--help'], args.runs) * 1000:.1f} ms (mediana)")
+
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        print("[FRAME] sin display: se omite el tiempo al primer cuadro")
+        return
+    for cold in (True, False):
+        t = first_frame(args.runs, cold)
+        etiqueta = "caché fría " if cold else "caché caliente"
+        print(f"[FRAME] primer cuadro ({etiqueta}): " + (f"{t * 1000:.1f} ms" if t is not None else "error"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Despertares y CPU por hora simulada: workers por tick contra workers por eventos.
+
+Uso:
+    python benchmarks/wakeups.py [--probs 0.02 0.1 0.35] [--seconds 20] [--backends threads processes]
+    python benchmarks/wakeups.py --control actuated
+
+Cada punto corre en un proceso aparte: arranca la simulación, descarta
+`--warmup` s (arranque de procesos, Manager) y mide durante `--seconds` s de
+reloj, que son los mismos segundos simulados. Reporta, llevado a una hora
+simulada: despertares (ticks de los cuatro semáforos más el controlador) y
+segundos de CPU del backend (el proceso entero en modo hilos; los workers y
+el Manager en modo procesos). Con la misma semilla, cruzaron y espera media
+tienen que salir parecidos en los dos modos: si no, el modo por eventos está
+simulando otra cosa.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _hijo(backend: str, wake: str, prob: float, control: str, seconds: float, warmup: float) -> dict:
+    import time
+
+    from src.headless import create_simulation
+    from src.metrics import WORKERS
+    from src.models.llegadas import FuenteBernoulli
+
+    sim = create_simulation(backend, 10 ** 9, fuente=FuenteBernoulli(prob, seed=0), control=control, wake=wake)
+    slots = [sim.metrics.slot(f"{w}:ticks") for w in WORKERS[:5]]
+
+    def despertares() -> float:
+        valores = sim.metrics.read()
+        return sum(valores[s] for s in slots)
+
+    def cpu() -> float:
+        # hilos: el reloj de CPU del proceso (el principal solo duerme) es más fino que los
+        # ticks de /proc; procesos: /proc de cada worker y del Manager
+        return time.process_time() if backend == "threads" else sim.cpu_seconds()
+
+    sim.start()
+    time.sleep(warmup)
+    d0, cpu0 = despertares(), cpu()
+    time.sleep(seconds)
+    d1, cpu1 = despertares(), cpu()
+    snap = sim.get_snapshot()
+    sim.stop()
+
+    por_hora = 3600.0 / seconds
+    semaforos = snap["semaforos"].values()
+    cruzaron = sum(s["cruzaron"] for s in semaforos)
+    return {
+        "despertares_h": (d1 - d0) * por_hora,
+        "cpu_h": (cpu1 - cpu0) * por_hora,
+        "cruzaron": cruzaron,
+        "espera": sum(s["cruzaron"] * s["espera_prom"] for s in semaforos) / max(1, cruzaron),
+    }
+
+
+def medir(backend: str, wake: str, prob: float, control: str, seconds: float, warmup: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", backend, wake, str(prob), control, str(seconds), str(warmup)],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--probs", type=float, nargs="+", default=[0.02, 0.1, 0.35],
+                        help="Probabilidades de llegada por tick y dirección")
+    parser.add_argument("--backends", nargs="+", choices=["threads", "processes"], default=["threads", "processes"])
+    parser.add_argument("--control", choices=["fixed", "actuated"], default="fixed")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--child", nargs=6, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        backend, wake, prob, control, seconds, warmup = args.child
+        print(json.dumps(_hijo(backend, wake, float(prob), control, float(seconds), float(warmup))))
+        return
+
+    print(f"control={args.control} | {args.seconds:.0f}s por punto | valores por hora simulada")
+    print(f"{'prob':>5} {'backend':>9} {'wake':>5} {'despertares':>11} {'CPU s':>7} {'cruzaron':>8} {'espera':>7}")
+    for prob in args.probs:
+        for backend in args.backends:
+            base = None
+            for wake in ("tick", "event"):
+                m = medir(backend, wake, prob, args.control, args.seconds, args.warmup)
+                ahorro = ""
+                if base is None:
+                    base = m
+                else:
+                    ahorro = (
+                        f"  x{base['despertares_h'] / max(1.0, m['despertares_h']):.1f} despertares, "
+                        f"x{base['cpu_h'] / max(1e-9, m['cpu_h']):.1f} CPU"
+                    )
+                print(
+                    f"{prob:>5.2f} {backend:>9} {wake:>5} {m['despertares_h']:>11.0f} {m['cpu_h']:>7.1f} "
+                    f"{m['cruzaron']:>8} {m['espera']:>6.2f}s{ahorro}"
+                )
+
+
+if __name__ == "__main__":
+    main()
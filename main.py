@@ -1,7 +1,11 @@
 import argparse
 import platform
+import random
+import shutil
 import sys
 import os
+import time
+from pathlib import Path
 
 from src.config import (
     DEFAULT_MODE,
@@ -10,8 +14,15 @@ from src.config import (
     RED_TIME,
     ARRIVAL_PROB,
     TICK,
+    CONTROL_MODE,
+    WAKE_MODE,
 )
-from src.ui.gui_tk import TrafficGUI
+from src.models.llegadas import FuenteBernoulli, FuenteTraza
+from src import profiling
+from src.cache import ResultCache, clave
+from src.checkpoint import Checkpointer, read_checkpoint
+from src.headless import create_simulation, options_for, resumir, run_headless
+from src.metrics import MetricsExporter, MetricsFileWriter, serve_http
 
 def system_info() -> dict:
     return {
@@ -24,10 +35,102 @@ def system_info() -> dict:
 
 def main():
     parser = argparse.ArgumentParser(description="Simulación de tráfico con hilos o procesos")
-    parser.add_argument("--mode", choices=["threads", "processes"], default=None,
-                        help="Modo de concurrencia")
-    parser.add_argument("--cycles", type=int, default=10, help="Número mínimo de ciclos")
+    parser.add_argument("--mode", choices=["threads", "processes", "pool"], default=None,
+                        help="Modo de concurrencia (pool: M hilos para muchas intersecciones)")
+    parser.add_argument("--cycles", type=int, default=None,
+                        help="Número mínimo de ciclos (10, o el del checkpoint con --resume)")
+    parser.add_argument("--trace", default=None,
+                        help="Archivo de conteos (CSV t,direccion,conteo o .bin) como fuente de llegadas")
+    parser.add_argument("--trace-scale", type=float, default=1.0,
+                        help="Segundos de traza por segundo real")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Semilla de las llegadas: fija la demanda (no los tiempos en vivo)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Con --headless y llegadas fijas (--seed o --trace), reusar el resultado de una "
+                             "corrida igual ya guardada y guardar este; sin --cache siempre se simula y se mide")
+    parser.add_argument("--queue-capacity", type=int, default=None,
+                        help="Capacidad máxima de cada cola (por defecto sin límite)")
+    parser.add_argument("--queue-policy", choices=["drop", "spill", "block"], default="drop",
+                        help="Qué hacer con las llegadas cuando la cola está llena")
+    parser.add_argument("--compare", nargs="+", choices=["threads", "processes", "pool"], default=None,
+                        metavar="MODO", help="Correr varios backends a la vez, lado a lado (GUI)")
+    parser.add_argument("--intersections", type=int, default=1,
+                        help="Intersecciones a simular (solo --mode pool)")
+    parser.add_argument("--pool-workers", type=int, default=None,
+                        help="Hilos del pool (por defecto, uno por núcleo; solo --mode pool)")
+    parser.add_argument("--control", choices=["fixed", "actuated"], default=CONTROL_MODE,
+                        help="Control de fases: tiempos fijos o accionado por la demanda")
+    parser.add_argument("--wake", choices=["tick", "event"], default=WAKE_MODE,
+                        help="Workers de hilos/procesos: despertar cada tick o solo ante eventos")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=list(profiling.MODES), default=None,
+                        help="Perfilar cada hilo/proceso (cprofile por defecto, o sample para flamegraph)")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Directorio donde guardar los perfiles")
+    parser.add_argument("--headless", action="store_true",
+                        help="Ejecutar sin GUI (modo por defecto si no se indica --mode)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Servir métricas Prometheus en http://127.0.0.1:PUERTO/metrics")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Escribir métricas Prometheus periódicamente en este archivo")
+    parser.add_argument("--metrics-interval", type=float, default=1.0,
+                        help="Segundos entre escrituras de --metrics-file")
+    parser.add_argument("--results", default=None,
+                        help="Directorio donde guardar el registro por vehículo (columnar)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Guardar el estado completo periódicamente en este archivo")
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0,
+                        help="Segundos entre checkpoints")
+    parser.add_argument("--resume", default=None,
+                        help="Reanudar desde un checkpoint guardado con --checkpoint")
+    parser.add_argument("--serve", default=None, metavar="[HOST:]PUERTO",
+                        help="Publicar snapshots para visores externos (--attach)")
+    parser.add_argument("--attach", default=None, metavar="[HOST:]PUERTO",
+                        help="Abrir solo la GUI, conectada a una simulación lanzada con --serve")
+    parser.add_argument("--authkey", default=None,
+                        help="Clave de --serve/--attach (o la variable TRAFFIC_SIM_AUTHKEY); "
+                             "sin ella --serve genera una por corrida, solo en loopback")
     args = parser.parse_args()
+
+    if args.mode == "pool" and (args.checkpoint or args.resume):
+        parser.error("el backend pool no soporta checkpoints (--checkpoint/--resume)")
+    if args.wake == "event" and args.mode == "pool" and not args.compare:
+        parser.error("--wake event es para --mode threads/processes (el pool ya despierta una vez por tick para todas sus intersecciones)")
+
+    if args.compare is not None:
+        if len(set(args.compare)) < 2:
+            parser.error("--compare necesita al menos dos modos distintos")
+        if args.headless or args.resume or args.checkpoint or args.serve or args.attach:
+            parser.error("--compare es solo con GUI y no se combina con --headless/--resume/--checkpoint/--serve/--attach")
+        if args.metrics_port is not None or args.metrics_file:
+            parser.error("--compare no exporta métricas: cada backend tiene las suyas")
+        # misma semilla para todos, aunque no se haya pedido una
+        if args.seed is None and not args.trace:
+            args.seed = random.randrange(2 ** 31)
+        args.mode = args.mode or args.compare[0]
+
+    remote_key = None
+    if args.serve or args.attach:
+        # recv() deserializa con pickle: sin clave pública por defecto, y fuera de loopback solo con una explícita
+        from src.concurrency.remote_impl import clave_dada, es_loopback, parse_address
+        remote_key = clave_dada(args.authkey)
+        if args.attach and remote_key is None:
+            parser.error("--attach necesita la clave del servidor (--authkey o TRAFFIC_SIM_AUTHKEY)")
+        if args.serve and remote_key is None and not es_loopback(parse_address(args.serve)[0]):
+            parser.error("--serve en un host que no es loopback requiere --authkey (o TRAFFIC_SIM_AUTHKEY)")
+
+    profile_dir = profiling.configure(args.profile, args.profile_dir) if args.profile else None
+
+    if args.attach:
+        # Visor en otro proceso: la simulación no comparte GIL con el dibujado
+        from src.ui.gui_tk import TrafficGUI
+        print(f"[INFO] Conectando visor a {args.attach}")
+        try:
+            gui = TrafficGUI(mode="remote", cycles=args.cycles or 10, system_info=system_info(),
+                             sim_options={"address": parse_address(args.attach), "authkey": remote_key})
+        except ConnectionError as e:
+            sys.exit(f"[ERROR] {e}")
+        profiling.run_profiled("GUI", gui.run)
+        return
     
     info = system_info()
     print(
@@ -36,6 +139,23 @@ def main():
     )
     print(f"[INFO] Modo por defecto configurado: {DEFAULT_MODE.upper()}")
 
+    resume = None
+    if args.resume:
+        resume = read_checkpoint(args.resume)
+        print(
+            f"[INFO] Reanudando desde {args.resume}: modo={resume['mode']} | "
+            f"ciclo={resume['controlador']['ciclo']} | t={resume['elapsed']:.1f}s"
+        )
+        if args.mode is None:
+            args.mode = resume["mode"]
+        if args.cycles is None:
+            args.cycles = resume["cycles_target"]
+    if args.cycles is None:
+        args.cycles = 10
+
+    if args.mode is None and args.headless:
+        args.mode = DEFAULT_MODE
+
     if args.mode is None:
         try:
             import tkinter as tk
@@ -81,18 +201,151 @@ def main():
             selection = input("Modo (1-Threads, 2-Processes): ")
             args.mode = "threads" if selection == "1" else "processes"
 
-    print(f"\nIniciando simulación con modo: {args.mode.upper()}\n")
+    modo_txt = "+".join(args.compare) if args.compare else args.mode
+    print(f"\nIniciando simulación con modo: {modo_txt.upper()}\n")
     print(
-        f"[INFO] Configuración: modo={args.mode.upper()} | ciclos_objetivo={args.cycles}"
+        f"[INFO] Configuración: modo={modo_txt.upper()} | ciclos_objetivo={args.cycles}"
     )
+    if args.trace:
+        fuente = FuenteTraza(args.trace, escala=args.trace_scale)
+        llegadas_txt = f"traza={args.trace} (x{args.trace_scale})"
+    else:
+        fuente = FuenteBernoulli(ARRIVAL_PROB, seed=args.seed)
+        llegadas_txt = f"prob_llegada={ARRIVAL_PROB}" + (f" | semilla={args.seed}" if args.seed is not None else "")
     print(
         f"[INFO] Parámetros: tick={TICK}s | tiempos G/A/R={GREEN_TIME}/{YELLOW_TIME}/{RED_TIME}s | "
-        f"prob_llegada={ARRIVAL_PROB}"
+        f"{llegadas_txt}"
     )
     print("[INFO] Los resultados detallados se registrarán en consola durante la ejecución.")
+    if args.results:
+        print(f"[INFO] Registro por vehículo en: {args.results}")
+
+    sim_options = {
+        "fuente": fuente,
+        "results_dir": args.results,
+        "queue_capacity": args.queue_capacity,
+        "queue_policy": args.queue_policy,
+        "control": args.control,
+        # la GUI puede cambiar de modo: cada backend toma las suyas con options_for
+        "intersections": args.intersections,
+        "workers": args.pool_workers,
+        "wake": args.wake,
+    }
+    if resume is not None:
+        sim_options["resume"] = resume
+    cache = cache_key = cache_params = None
+    huella = fuente.huella()
+    # opt-in: una corrida en vivo no es determinista, y acá se miden tiempos (ver src/cache.py);
+    # solo corridas con llegadas fijas cuyo único efecto es el resultado
+    if (
+        args.cache and args.headless and huella is not None and resume is None
+        and not (args.checkpoint or args.serve or args.metrics_port is not None or args.metrics_file or args.profile)
+    ):
+        cache = ResultCache()
+        cache_params = {
+            "mode": args.mode, "cycles": args.cycles, "fuente": huella, "traces": bool(args.results),
+            **{k: v for k, v in options_for(args.mode, sim_options).items() if k not in ("fuente", "results_dir")},
+        }
+        cache_key = clave(cache_params)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            _report_cached(entry, args, cache.traces(cache_key))
+            print(cache.resumen())
+            return
+
+    gui = None
+    if args.compare is not None:
+        from src.ui.compare_tk import ComparisonGUI
+        print(f"[INFO] Comparando en la misma sesión: {', '.join(m.upper() for m in args.compare)}")
+        gui = ComparisonGUI(args.compare, args.cycles, info, sim_options)
+        metrics_source = lambda: None
+        sim_source = lambda: None
+    elif args.headless:
+        sim = create_simulation(args.mode, args.cycles, **options_for(args.mode, sim_options))
+        metrics_source = lambda: sim.metrics
+        sim_source = lambda: sim
+    else:
+        # tkinter (y PIL, si hace falta regenerar el fondo) solo se cargan en modo GUI
+        from src.ui.gui_tk import TrafficGUI
+        gui = TrafficGUI(mode=args.mode, cycles=args.cycles, system_info=info, sim_options=sim_options)
+        metrics_source = lambda: getattr(gui.sim, "metrics", None)
+        sim_source = lambda: gui.sim
+
+    exporter = MetricsExporter(metrics_source, labels={"mode": args.mode})
+    metrics_server = None
+    metrics_writer = None
+    if args.metrics_port is not None:
+        metrics_server = serve_http(exporter, args.metrics_port)
+        print(f"[INFO] Métricas en http://127.0.0.1:{args.metrics_port}/metrics")
+    if args.metrics_file:
+        metrics_writer = MetricsFileWriter(exporter, args.metrics_file, args.metrics_interval)
+        metrics_writer.start()
+        print(f"[INFO] Métricas cada {args.metrics_interval}s en: {args.metrics_file}")
+
+    snapshot_server = None
+    if args.serve:
+        from src.concurrency.remote_impl import SnapshotServer, clave_al_azar
+        clave_txt = "--authkey <la misma clave>"
+        if remote_key is None:
+            remote_key = clave_al_azar()
+            clave_txt = f"--authkey {remote_key.decode()}"
+        snapshot_server = SnapshotServer(sim_source, parse_address(args.serve), remote_key)
+        snapshot_server.start()
+        host, port = snapshot_server.address
+        print(f"[INFO] Snapshots para visores en {host}:{port} (python main.py --attach {host}:{port} {clave_txt})")
+
+    checkpointer = None
+    if args.checkpoint:
+        checkpointer = Checkpointer(sim_source, args.checkpoint, args.checkpoint_interval)
+        checkpointer.start()
+        print(f"[INFO] Checkpoint cada {args.checkpoint_interval}s en: {args.checkpoint}")
+    # el último checkpoint se toma con la simulación todavía viva
+    before_stop = checkpointer.stop if checkpointer is not None else None
+
+    runs_before = set(os.listdir(args.results)) if args.results and os.path.isdir(args.results) else set()
+    t0 = time.perf_counter()
+    try:
+        if gui is None:
+            snap = profiling.run_profiled("Headless", run_headless, sim, before_stop=before_stop)
+            # una corrida interrumpida no es el resultado de esta configuración
+            if cache is not None and snap.get("total_time") is not None:
+                traces = None
+                if args.results:
+                    nuevos = set(os.listdir(args.results)) - runs_before
+                    traces = Path(args.results) / nuevos.pop() if len(nuevos) == 1 else None
+                cache.put(cache_key, cache_params, {"snapshot": snap, "metricas": resumir(snap)},
+                          time.perf_counter() - t0, traces)
+                print(cache.resumen())
+        else:
+            gui.before_stop = before_stop
+            profiling.run_profiled("GUI", gui.run)
+    finally:
+        if snapshot_server is not None:
+            snapshot_server.stop()
+        if metrics_writer is not None:
+            metrics_writer.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+    if profile_dir is not None:
+        report = profiling.merge_reports(profile_dir)
+        print(f"[PROFILE] Reporte combinado: {report}")
+
 
-    gui = TrafficGUI(mode=args.mode, cycles=args.cycles, system_info=info)
-    gui.run()
+def _report_cached(entry: dict, args: argparse.Namespace, traces: Path | None) -> None:
+    snap = entry["result"]["snapshot"]
+    creada = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["created"]))
+    print(f"[CACHE] Resultado en caché (corrida del {creada}): no se simula")
+    # no es una medición de ahora: ni el formato tiempo_total_<modo>_s, para que no se compare como tal
+    print(f"[CACHE] REPETIDO, no medido: aquella corrida tardó {snap['total_time']}s "
+          f"(las corridas en vivo varían; sin --cache para medir)")
+    print(f"[CACHE] Ciclo {snap['cycle']} | Total vehículos que cruzaron: {entry['result']['metricas']['total.cruzaron']}")
+    for d, s in snap["semaforos"].items():
+        print(f"    {d}: cola={s['cola']} | cruzaron={s['cruzaron']} | espera_prom={s['espera_prom']}s")
+    if traces is not None:
+        destino = Path(args.results) / f"{args.mode}-{time.strftime('%Y%m%d-%H%M%S')}"
+        shutil.copytree(traces, destino)
+        print(f"[CACHE] Registro por vehículo copiado en: {destino}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+"""Caché persistente de resultados de simulación, direccionada por contenido.
+
+La clave es el SHA-256 de los parámetros de la corrida, de todas las
+constantes de `src.config` y de la versión del código (hash de los fuentes
+de `src/`): cambiar un parámetro o editar el simulador lleva a otra clave, y
+las entradas viejas quedan sin usar hasta que la expulsión las borra.
+
+Cada entrada es un directorio `<clave>/` con `result.json` (parámetros,
+resultado y segundos que costó) y, opcionalmente, `traces/` con el registro
+por vehículo. El mtime de `result.json` se renueva en cada acierto; al pasar
+de `max_bytes` se borran las entradas usadas hace más tiempo (LRU).
+
+Solo se cachean corridas con llegadas fijas: la fuente tiene que dar una
+`huella()` (Bernoulli con semilla, o una traza). Eso fija la demanda, no el
+resultado: en los backends en vivo las esperas y el tiempo total dependen de
+cómo el sistema planifica hilos y procesos, así que una entrada es *una*
+muestra de esa configuración. Por eso con backends en vivo (`main.py`,
+`ensemble`) la caché es opt-in con `--cache`; el motor virtual, que sí es
+determinista, la usa por defecto (optimizador, barridos distribuidos;
+`--no-cache` la evita).
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from . import config
+from .config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB
+
+SRC = Path(__file__).resolve().parent
+DEFAULT_DIR = SRC.parent / ".cache" / "results"
+RESULT_FILE = "result.json"
+TRACES_DIR = "traces"
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash de todos los `.py` de `src/` (ruta y contenido)."""
+    h = hashlib.sha256()
+    for path in sorted(SRC.rglob("*.py")):
+        h.update(path.relative_to(SRC).as_posix().encode())
+        h.update(b"\0")
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def config_actual(overrides: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Constantes de `src.config` tal como están ahora, con `overrides` encima."""
+    valores = {k: getattr(config, k) for k in dir(config) if k.isupper()}
+    valores.update(overrides or {})
+    return valores
+
+
+def clave(params: Dict[str, Any], overrides: Dict[str, Any] | None = None) -> str:
+    datos = {"params": params, "config": config_actual(overrides), "code": code_version()}
+    # repr para lo que JSON no sabe escribir (bytes, etc.): basta con que sea estable
+    texto = json.dumps(datos, sort_keys=True, default=repr)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def _tamano(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class ResultCache:
+    def __init__(self, path: str | Path | None = None, max_bytes: int | None = None, enabled: bool = True):
+        """`enabled=False` es el bypass: no se lee ni se escribe nada."""
+        self.path = Path(path or RESULT_CACHE_DIR or DEFAULT_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else int(RESULT_CACHE_MAX_MB * 2 ** 20)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self.seconds_saved = 0.0
+        self._total: int | None = None  # bytes en disco, escaneado al primer put y sumado después
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """La entrada (`params`, `result`, `seconds`, `created`) o None."""
+        if not self.enabled:
+            return None
+        f = self.path / key / RESULT_FILE
+        try:
+            entry = json.loads(f.read_text())
+            os.utime(f)  # recién usada: última en salir
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.seconds_saved += entry.get("seconds", 0.0)
+        return entry
+
+    def put(self, key: str, params: Dict[str, Any], result: Any, seconds: float = 0.0,
+            traces: str | Path | None = None) -> None:
+        """Guarda de forma atómica (otro proceso puede estar guardando la misma clave)."""
+        if not self.enabled:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        entry = {"params": params, "result": result, "seconds": seconds, "created": time.time()}
+        (tmp / RESULT_FILE).write_text(json.dumps(entry, default=repr))
+        if traces is not None:
+            shutil.copytree(traces, tmp / TRACES_DIR)
+        try:
+            os.replace(tmp, self.path / key)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # ya la guardó otro
+            return
+        self.stored += 1
+        if self._total is None:
+            self.evict(keep=key)
+        else:
+            self._total += _tamano(self.path / key)
+            if self._total > self.max_bytes:
+                self.evict(keep=key)
+
+    def traces(self, key: str) -> Path | None:
+        path = self.path / key / TRACES_DIR
+        return path if self.enabled and path.is_dir() else None
+
+    def get_or_run(self, params: Dict[str, Any], fn: Callable[[], Any],
+                   overrides: Dict[str, Any] | None = None) -> Tuple[Any, bool]:
+        """(resultado, acierto). `fn` solo corre si la clave no está."""
+        key = clave(params, overrides)
+        entry = self.get(key)
+        if entry is not None:
+            return entry["result"], True
+        t0 = time.perf_counter()
+        result = fn()
+        self.put(key, params, result, time.perf_counter() - t0)
+        return result, False
+
+    def evict(self, keep: str | None = None) -> int:
+        """Borra las entradas menos usadas hasta quedar bajo `max_bytes`. Devuelve cuántas."""
+        if not self.path.is_dir():
+            return 0
+        entradas = []
+        total = 0
+        for d in self.path.iterdir():
+            f = d / RESULT_FILE
+            if d.name.startswith(".") or not f.exists():
+                continue
+            try:
+                size, usada = _tamano(d), f.stat().st_mtime
+            except OSError:
+                continue  # otro proceso la está borrando
+            entradas.append((usada, d.name, size))
+            total += size
+        borradas = 0
+        for usada, key, size in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.path / key, ignore_errors=True)
+            total -= size
+            borradas += 1
+        self._total = total
+        self.evicted += borradas
+        return borradas
+
+    def resumen(self) -> str:
+        if not self.enabled:
+            return "[CACHE] desactivada"
+        return (
+            f"[CACHE] aciertos={self.hits} | fallos={self.misses} | guardadas={self.stored} | "
+            f"expulsadas={self.evicted} | ahorrado≈{self.seconds_saved:.1f}s | {self.path}"
+        )
@@ -0,0 +1,143 @@
+"""Checkpoints binarios del estado completo de una simulación.
+
+Formato: b"TSCK" | versión (u16) | largo de cabecera (u32) | cabecera JSON |
+por dirección: ids (int64) y antigüedades (float64) de la cola seguidos de los
+del derrame. Los tiempos se guardan como antigüedad respecto del instante de
+captura, así al restaurar las esperas continúan sin saltos.
+"""
+import json
+import os
+import struct
+import threading
+import time
+import traceback
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from .models.vehiculo import Vehiculo
+
+MAGIC = b"TSCK"
+VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+DIRS = ["N", "S", "E", "O"]
+
+
+def write_checkpoint(state: Dict[str, Any], path: str | Path) -> int:
+    """Escribe `state` (de `checkpoint_state()`) de forma atómica. Devuelve los bytes escritos."""
+    t_captura = state["t_captura"]
+    header = {k: v for k, v in state.items() if k not in ("semaforos", "t_captura")}
+    header["semaforos"] = {}
+    blobs = []
+    for d in DIRS:
+        sem = state["semaforos"][d]
+        registros = [(v.id, v.t_llegada) for v in sem["cola"]] + sem["derrame"]
+        ids = array("q", (i for i, _ in registros))
+        edades = array("d", (t_captura - t for _, t in registros))
+        header["semaforos"][d] = {
+            "campos": sem["campos"],
+            "n_cola": len(sem["cola"]),
+            "n_derrame": len(sem["derrame"]),
+        }
+        blobs += [ids.tobytes(), edades.tobytes()]
+
+    body = json.dumps(header, separators=(",", ":")).encode()
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(body)))
+        f.write(body)
+        for blob in blobs:
+            f.write(blob)
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def max_veh_id(semaforos: Dict[str, Any]) -> int:
+    """Mayor id entre los vehículos capturados (colas y derrames), 0 si no hay ninguno."""
+    ids = [v.id for s in semaforos.values() for v in s["cola"]]
+    ids += [i for s in semaforos.values() for i, _ in s["derrame"]]
+    return max(ids, default=0)
+
+
+def read_checkpoint(path: str | Path) -> Dict[str, Any]:
+    """Lee un checkpoint. Los tiempos de llegada quedan relativos a `t_captura` = 0."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, largo = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: no es un checkpoint válido (versión {version})")
+    offset = _HEADER.size
+    state = json.loads(data[offset:offset + largo])
+    offset += largo
+    state["t_captura"] = 0.0
+    for d in DIRS:
+        sem = state["semaforos"][d]
+        n = sem.pop("n_cola") + sem["n_derrame"]
+        ids = array("q")
+        ids.frombytes(data[offset:offset + n * ids.itemsize])
+        offset += n * ids.itemsize
+        edades = array("d")
+        edades.frombytes(data[offset:offset + n * edades.itemsize])
+        offset += n * edades.itemsize
+        n_cola = n - sem.pop("n_derrame")
+        sem["cola"] = [Vehiculo(i, d, -e) for i, e in zip(ids[:n_cola], edades[:n_cola])]
+        sem["derrame"] = [(i, -e) for i, e in zip(ids[n_cola:], edades[n_cola:])]
+    return state
+
+
+class Checkpointer:
+    """Guarda un checkpoint cada `interval` segundos en un hilo aparte.
+
+    `source` devuelve la simulación vigente; la captura toma el lock solo para
+    copiar referencias y la serialización ocurre fuera.
+    """
+
+    def __init__(self, source: Callable[[], Any], path: str | Path, interval: float = 30.0):
+        self.source = source
+        self.path = Path(path)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="Checkpointer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, final: bool = True) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        if final:
+            # se llama antes de detener la simulación: un error no debe impedir detenerla
+            self._save_or_report()
+
+    def save(self) -> int | None:
+        """Escribe un checkpoint; None si la simulación ya se detuvo. Cualquier otro error sube."""
+        sim = self.source()
+        if sim is None:
+            return None
+        try:
+            state = sim.checkpoint_state()
+        except (EOFError, OSError):
+            return None  # simulación ya detenida (en procesos, el Manager ya cerró)
+        t0 = time.perf_counter()
+        size = write_checkpoint(state, self.path)
+        print(
+            f"[CHECKPOINT] ciclo={state['controlador']['ciclo']} | {size} bytes | "
+            f"{(time.perf_counter() - t0) * 1000:.1f} ms -> {self.path}"
+        )
+        return size
+
+    def _save_or_report(self) -> bool:
+        try:
+            self.save()
+            return True
+        except Exception:
+            print(f"[CHECKPOINT] error al guardar {self.path}:")
+            traceback.print_exc()
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self._save_or_report():
+                return  # el mismo error se repetiría en cada intervalo
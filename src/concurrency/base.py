@@ -12,4 +12,12 @@ class BaseSimulation(ABC):
 
     @abstractmethod
     def get_snapshot(self) -> Dict[str, Any]:
-        ...
\ No newline at end of file
+        ...
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Estado completo para `src.checkpoint.write_checkpoint`."""
+        raise NotImplementedError(f"{type(self).__name__} no soporta checkpoints")
+
+    def cpu_seconds(self) -> float | None:
+        """CPU consumida hasta ahora por los hilos/procesos de la simulación (None si no se puede medir)."""
+        return None
@@ -0,0 +1,69 @@
+"""Workers por eventos: duermen hasta que tienen algo que hacer.
+
+En modo "tick" cada worker de semáforo despierta cada TICK, toma el lock y
+sortea una llegada aunque esté en rojo y no pase nada, y el controlador
+pregunta cada TICK si ya terminó el verde. En modo "event":
+
+- la próxima llegada de cada dirección se sortea por adelantado
+  (`LectorLlegadas.proxima_llegada`, las mismas extracciones que tick a
+  tick: mismas llegadas) y el worker duerme hasta ese instante;
+- con verde y cola despierta en cada tick de su grilla, que es cuando de
+  verdad cruza gente, y descarga lo que darían los ticks de verde que pasaron;
+- los cambios de fase se avisan con una condición; el controlador duerme
+  hasta `ControladorTrafico.proxima_decision` o hasta que un sensor cambie.
+
+Los despertares y la CPU pasan a depender de la actividad y no de cuántos
+semáforos hay (ver benchmarks/wakeups.py).
+"""
+import math
+
+from ..config import EVENT_HORIZON
+from ..models.llegadas import LectorLlegadas
+
+WAKE_MODES = ("tick", "event")
+
+
+class AgendaLlegadas:
+    """Próxima llegada de un lector sobre la grilla de ticks que empieza en `t_inicio` (tiempo relativo)."""
+
+    def __init__(self, lector: LectorLlegadas, tick: float, t_inicio: float, horizonte: float = EVENT_HORIZON):
+        self.lector = lector
+        self.tick = tick
+        self.max_ticks = max(1, int(horizonte / tick))
+        self.t_inicio = t_inicio  # origen de la grilla: los mismos instantes que en modo tick
+        self.t_base = t_inicio  # hasta acá las llegadas ya se leyeron
+        self.proxima = lector.proxima_llegada(self.t_base, tick, self.max_ticks)
+
+    def vencidas(self, t: float) -> int:
+        """Vehículos que llegaron hasta `t` (se leen del lector) y agenda la llegada siguiente."""
+        total = 0
+        while True:
+            if self.proxima is None:
+                fin = self.t_base + self.max_ticks * self.tick
+                if fin > t:
+                    break
+                self.t_base = fin  # un horizonte entero sin llegadas
+            elif self.proxima <= t:
+                total += self.lector.llegadas(self.proxima)
+                self.t_base = self.proxima
+            else:
+                break
+            self.proxima = self.lector.proxima_llegada(self.t_base, self.tick, self.max_ticks)
+        return total
+
+    def despertar(self) -> float:
+        """Instante relativo en que hay que volver a mirar: la próxima llegada o el fin del horizonte."""
+        if self.proxima is not None:
+            return self.proxima
+        return self.t_base + self.max_ticks * self.tick
+
+    def tick_de(self, t: float) -> int:
+        """Índice del último tick de la grilla en o antes de `t`."""
+        return math.floor((t - self.t_inicio) / self.tick + 1e-6)
+
+    def ticks_entre(self, desde: float, hasta: float) -> int:
+        """Ticks de la grilla en (`desde`, `hasta`]: los que un worker por tick habría corrido."""
+        return max(0, self.tick_de(hasta) - self.tick_de(desde))
+
+    def tick_siguiente(self, t: float) -> float:
+        return self.t_inicio + (self.tick_de(t) + 1) * self.tick
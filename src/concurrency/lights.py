@@ -0,0 +1,36 @@
+"""Luces de la intersección en memoria compartida (modo procesos).
+
+El controlador es el único escritor: publica el ciclo y el código de luz de
+cada aproximación (ver `src/models/fases.py`) en un `RawArray` de enteros.
+Cada worker lee la luz de su dirección en cada tick sin lock ni Manager, y
+el controlador ya no trae y devuelve los cuatro `Semaforo` pickleados en
+cada cambio de fase.
+"""
+from typing import Any, Sequence, Tuple
+
+from ..models.controlador import ControladorTrafico
+from ..models.fases import APAGADO
+
+
+class Luces:
+    def __init__(self, aproximaciones: Sequence[str], shared: bool = False):
+        self.idx = {a: i + 1 for i, a in enumerate(aproximaciones)}
+        n = 1 + len(aproximaciones)  # [ciclo, luz por aproximación...]
+        if shared:
+            import multiprocessing
+            self.values: Any = multiprocessing.RawArray("i", n)
+        else:
+            self.values = [0] * n
+        for i in self.idx.values():
+            self.values[i] = APAGADO
+
+    def publicar(self, ctrl: ControladorTrafico) -> None:
+        # luces antes que el ciclo (y `leer` al revés): quien ve el ciclo nuevo ve su luz nueva
+        for d, luz in zip(ctrl.plan.aproximaciones, ctrl.luces()):
+            self.values[self.idx[d]] = luz
+        self.values[0] = ctrl.ciclo
+
+    def leer(self, direccion: str) -> Tuple[int, int]:
+        """(código de luz, ciclo)."""
+        ciclo = self.values[0]
+        return self.values[self.idx[direccion]], ciclo
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+try:
+    import resource
+    _RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    _RESOURCE_AVAILABLE = False
+    resource = None  # type: ignore
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def process_rss_bytes(pid: int | None = None) -> int | None:
+    """Memoria residente actual de un proceso (por defecto el propio).
+
+    En Linux se lee /proc/<pid>/statm, así el proceso principal puede medir a
+    sus hijos sin IPC. En otras plataformas solo se reporta el pico propio.
+    """
+    target = "self" if pid is None else str(pid)
+    try:
+        with open(f"/proc/{target}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if pid is None and _RESOURCE_AVAILABLE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def processes_rss(procs: Iterable[Tuple[str, int | None]]) -> Dict[str, int | None]:
+    """RSS por nombre de proceso para pares (nombre, pid); pid None = proceso actual."""
+    return {name: process_rss_bytes(pid) for name, pid in procs}
+
+
+def cpu_seconds(pid: int | None = None, tid: int | None = None) -> float | None:
+    """CPU (usuario + sistema) de un proceso, o de un hilo `tid` (`Thread.native_id`) de ese proceso.
+
+    Solo Linux (/proc/<pid>/task/<tid>/stat); en otras plataformas, None.
+    """
+    target = "self" if pid is None else str(pid)
+    path = f"/proc/{target}/stat" if tid is None else f"/proc/{target}/task/{tid}/stat"
+    try:
+        with open(path) as f:
+            # después del nombre (entre paréntesis, puede tener espacios): utime y stime son el 12.º y 13.º
+            campos = f.read().rsplit(")", 1)[1].split()
+        return (int(campos[11]) + int(campos[12])) / _CLK_TCK
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ThreadCpu:
+    """CPU de los hilos de una simulación, también de los que ya terminaron.
+
+    /proc solo tiene a los hilos vivos: cada hilo corre con `run`, que al
+    salir anota su propio `thread_time`, y `total` usa ese valor si existe.
+    """
+
+    def __init__(self) -> None:
+        self._finales: Dict[int, float] = {}
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return fn(*args)
+        finally:
+            self._finales[threading.get_native_id()] = time.thread_time()
+
+    def total(self, hilos: Iterable[threading.Thread | None]) -> float | None:
+        valores = []
+        for t in hilos:
+            if t is None or t.native_id is None:
+                continue
+            v = self._finales.get(t.native_id)
+            if v is None:
+                v = cpu_seconds(tid=t.native_id)
+            if v is not None:
+                valores.append(v)
+        return sum(valores) if valores else None
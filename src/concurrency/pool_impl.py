@@ -0,0 +1,298 @@
+"""Backend de hilos con un pool fijo: M workers atienden K intersecciones.
+
+En el backend de hilos cada semáforo y cada controlador tiene su hilo, que
+duerme un tick y vuelve a despertar: K intersecciones serían 5K hilos. Acá
+las intersecciones se reparten en M colas (una por worker, M = núcleos por
+defecto). En cada tick un worker despierta una sola vez, recarga su cola y
+atiende cada intersección en lote: toma su lock una vez y corre el paso del
+controlador y el de sus cuatro semáforos. Cuando se vacía su cola roba del
+final de las de los demás, así un worker atrasado no demora a los suyos.
+
+Las métricas Prometheus y el detalle del snapshot son de la intersección 0
+(la que dibuja la GUI); del resto el snapshot trae los totales.
+"""
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List
+
+from ..config import ARRIVAL_PROB, CONTROL_MODE, QUEUE_CAPACITY, QUEUE_POLICY, TICK, YELLOW_TIME
+from ..metrics import SimMetrics, WaitRecorder, WorkerMetrics
+from ..models.controlador import ControladorTrafico
+from ..models.fases import NOMBRES_LUZ
+from ..models.llegadas import FuenteBernoulli, FuenteLlegadas
+from ..models.semaforo import Semaforo
+from ..models.vehiculo import Vehiculo
+from ..profiling import run_profiled
+from ..results.columnar import ColumnarSink
+from .base import BaseSimulation
+from .memory import ThreadCpu, processes_rss
+
+DIRS = ["N", "S", "E", "O"]
+# los ids de vehículo de la intersección i empiezan en i * _IDS_POR_INTERSECCION
+_IDS_POR_INTERSECCION = 1_000_000_000
+
+
+class _Interseccion:
+    """Una intersección completa. La atiende un solo worker a la vez (su lock)."""
+
+    def __init__(self, idx: int, fuente: FuenteLlegadas, control: str,
+                 queue_capacity: int | None, queue_policy: str):
+        self.idx = idx
+        self.lock = threading.Lock()
+        self.semaforos = {
+            d: Semaforo(d, capacidad_cola=queue_capacity, politica_cola=queue_policy) for d in DIRS
+        }
+        self.ctrl = ControladorTrafico(modo=control)
+        self.ctrl.plan.exigir(DIRS)
+        self.lectores = {d: fuente.abrir(d, idx) if idx else fuente.abrir(d) for d in DIRS}
+        self.t_ultima = dict.fromkeys(DIRS, 0.0)
+        self.veh_id = idx * _IDS_POR_INTERSECCION
+        self.proximo = 0.0  # instante del próximo tick
+        self.iniciada = False
+        self.terminada = False
+        # solo la intersección 0 alimenta las métricas
+        self.wm_ctrl: WorkerMetrics | None = None
+        self.wm: Dict[str, WorkerMetrics] = {}
+        self.recorders: Dict[str, WaitRecorder] = {}
+
+    def sensor(self, d: str) -> tuple:
+        s = self.semaforos[d]
+        return len(s.cola) + s.en_disco() + s.retenidos, self.t_ultima[d]
+
+    def paso(self, now: float, t0: float, cycles: int, sink: Any) -> None:
+        """Un tick: controlador y después los cuatro semáforos (llamar con el lock tomado)."""
+        ctrl = self.ctrl
+        if not self.iniciada:
+            ctrl.aplicar_fase(self.semaforos, now)
+            self.iniciada = True
+        elif not ctrl.en_amarillo:
+            if ctrl.fin_de_verde(now, self.sensor):
+                ctrl.poner_amarillo(self.semaforos, now)
+        elif now - ctrl.t_fase >= YELLOW_TIME:
+            ctrl.siguiente_fase()
+            ctrl.aplicar_fase(self.semaforos, now)
+            if ctrl.ciclo >= cycles:
+                self.terminada = True
+        if self.wm_ctrl is not None:
+            self.wm_ctrl.tick(0.0)
+
+        for d in DIRS:
+            sem = self.semaforos[d]
+            llegadas = self.lectores[d].llegadas(now - t0)
+            for _ in range(sem.admitir(llegadas)):
+                self.veh_id += 1
+                sem.creados += 1
+                sem.enqueue(Vehiculo(self.veh_id, d, now))
+            sem.muestrear(now, llegadas)
+            destino = sink
+            if self.recorders:
+                destino = self.recorders[d]
+                destino.siguiente = sink  # el sink es del worker que atiende este tick
+            sem.avanzar_n(now, sem.capacidad(TICK), destino)
+            if llegadas:
+                self.t_ultima[d] = now
+            if self.wm:
+                self.wm[d].semaforo(sem)
+                self.wm[d].tick(0.0)
+
+
+class PoolSimulation(BaseSimulation):
+    def __init__(self, cycles: int = 10, fuente: FuenteLlegadas | None = None,
+                 results_dir: str | None = None,
+                 queue_capacity: int | None = QUEUE_CAPACITY,
+                 queue_policy: str = QUEUE_POLICY,
+                 control: str = CONTROL_MODE,
+                 intersections: int = 1,
+                 workers: int | None = None,
+                 resume: Dict[str, Any] | None = None):
+        if resume is not None:
+            raise ValueError("el backend pool no soporta reanudar desde un checkpoint")
+        if intersections < 1:
+            raise ValueError("intersections debe ser >= 1")
+        self.cycles_target = cycles
+        self.fuente = fuente if fuente is not None else FuenteBernoulli(ARRIVAL_PROB)
+        self.results_dir = results_dir
+        self.metrics = SimMetrics()
+        self.intersecciones = [
+            _Interseccion(i, self.fuente, control, queue_capacity, queue_policy) for i in range(intersections)
+        ]
+        primera = self.intersecciones[0]
+        primera.wm_ctrl = WorkerMetrics(self.metrics, "Controlador")
+        for d in DIRS:
+            primera.wm[d] = WorkerMetrics(self.metrics, f"Semaforo-{d}", d)
+            primera.recorders[d] = WaitRecorder(primera.wm[d])
+
+        self.n_workers = max(1, min(workers or os.cpu_count() or 1, intersections))
+        # reparto fijo en colas, una por worker; robar solo mueve trabajo dentro de un tick
+        self._shards = [self.intersecciones[w::self.n_workers] for w in range(self.n_workers)]
+        self._colas: List[Deque[_Interseccion]] = [deque() for _ in range(self.n_workers)]
+
+        self._running = False
+        self._threads: List[threading.Thread] = []
+        self._cpu = ThreadCpu()
+        self._done_lock = threading.Lock()
+        self._pendientes = intersections
+        self._t0 = 0.0
+        self._start_ts: float | None = None
+        self._total_time: float | None = None
+        # por worker (un escritor cada uno): atraso de cada atención respecto de su tick, robos
+        self._retraso_suma = [0.0] * self.n_workers
+        self._retraso_max = [0.0] * self.n_workers
+        self._atenciones = [0] * self.n_workers
+        self._robos = [0] * self.n_workers
+        self._last_logged_cycle = -1
+        self._last_logged_phase = -1
+
+    def start(self) -> None:
+        self._running = True
+        self._total_time = None
+        self._t0 = self._start_ts = time.time()
+        for inter in self.intersecciones:
+            inter.proximo = self._t0
+        run_dir = None
+        if self.results_dir is not None:
+            run_dir = Path(self.results_dir) / f"pool-{time.strftime('%Y%m%d-%H%M%S')}"
+        for w in range(self.n_workers):
+            name = f"Pool-{w}"
+            t = threading.Thread(target=run_profiled, args=(name, self._cpu.run, self._run_worker, w, run_dir),
+                                 name=name, daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def stop(self) -> None:
+        self._running = False
+        for t in self._threads:
+            t.join(timeout=TICK * 5)
+        self._threads = []
+        for inter in self.intersecciones:
+            with inter.lock:
+                for s in inter.semaforos.values():
+                    s.descartar_derrame()
+
+    def _run_worker(self, w: int, run_dir: Path | None) -> None:
+        mia = self._colas[w]
+        otras = [self._colas[(w + k) % self.n_workers] for k in range(1, self.n_workers)]
+        sink = ColumnarSink(run_dir / f"part-pool-{w}") if run_dir is not None else None
+        proximo = self._t0
+        try:
+            while self._running:
+                # un solo despertar por tick para todo el shard
+                espera = proximo - time.time()
+                if espera > 0:
+                    time.sleep(espera)
+                proximo = max(proximo + TICK, time.time())
+                mia.extend(self._shards[w])
+                while self._running:
+                    try:
+                        inter = mia.popleft()
+                    except IndexError:
+                        inter = self._robar(otras)
+                        if inter is None:
+                            break
+                        self._robos[w] += 1
+                    self._atender(w, inter, sink)
+        finally:
+            if sink is not None:
+                sink.close()
+
+    @staticmethod
+    def _robar(otras: List[Deque[_Interseccion]]) -> _Interseccion | None:
+        for cola in otras:
+            try:
+                return cola.pop()  # del final: el dueño consume por el principio
+            except IndexError:
+                continue
+        return None
+
+    def _atender(self, w: int, inter: _Interseccion, sink: Any) -> None:
+        if inter.terminada or not inter.lock.acquire(blocking=False):
+            return  # terminada, o ya la está atendiendo otro worker
+        try:
+            now = time.time()
+            if now < inter.proximo - TICK / 2:
+                return  # ya se atendió en este tick
+            retraso = max(0.0, now - inter.proximo)
+            self._retraso_suma[w] += retraso
+            if retraso > self._retraso_max[w]:
+                self._retraso_max[w] = retraso
+            self._atenciones[w] += 1
+            inter.proximo = inter.proximo + TICK if retraso < TICK else now + TICK
+            inter.paso(now, self._t0, self.cycles_target, sink)
+            terminada = inter.terminada
+        finally:
+            inter.lock.release()
+        if terminada:
+            with self._done_lock:
+                self._pendientes -= 1
+                if self._pendientes == 0:
+                    self._total_time = time.time() - self._t0
+                    self._running = False
+                    print(f"[POOL] tiempo_total_pool_s = {self._total_time:.2f}")
+
+    def cpu_seconds(self) -> float | None:
+        return self._cpu.total(self._threads)
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        t_snap = time.perf_counter()
+        primera = self.intersecciones[0]
+        with primera.lock:
+            self.metrics.add(self.metrics.slot("MainProcess:lock_wait"), time.perf_counter() - t_snap)
+            ctrl = primera.ctrl
+            snap = {
+                "cycle": ctrl.ciclo,
+                "phase": ctrl.fase_idx,
+                "total_time": round(self._total_time, 2) if self._total_time is not None else None,
+                "semaforos": {
+                    d: {
+                        "estado": s.estado,
+                        "cola": len(s.cola),
+                        "cruzaron": s.cruzaron,
+                        "espera_prom": round(s.espera_promedio(), 2),
+                        "rechazados": s.rechazados,
+                        "bloqueados": s.bloqueados,
+                        "en_disco": s.en_disco(),
+                        "mem_cola": s.memoria_cola(),
+                        **s.recientes(),
+                    } for d, s in primera.semaforos.items()
+                },
+                "control": {"modo": ctrl.modo, "gap_outs": ctrl.gap_outs, "max_outs": ctrl.max_outs},
+            }
+        # totales sin locks: enteros que a lo sumo están un tick atrasados
+        todas = self.intersecciones
+        atenciones = sum(self._atenciones)
+        snap["intersecciones"] = {
+            "n": len(todas),
+            "workers": self.n_workers,
+            "terminadas": sum(i.terminada for i in todas),
+            "ciclo_min": min(i.ctrl.ciclo for i in todas),
+            "cruzaron": sum(s.cruzaron for i in todas for s in i.semaforos.values()),
+            "cola": sum(len(s.cola) for i in todas for s in i.semaforos.values()),
+            "retraso_prom_ms": round(1000 * sum(self._retraso_suma) / atenciones, 2) if atenciones else 0.0,
+            "retraso_max_ms": round(1000 * max(self._retraso_max), 2),
+            "robos": sum(self._robos),
+        }
+        snap["memoria"] = processes_rss([("MainProcess", None)])
+        if snap["cycle"] != self._last_logged_cycle or snap["phase"] != self._last_logged_phase:
+            self._log_snapshot(snap)
+            self._last_logged_cycle = snap["cycle"]
+            self._last_logged_phase = snap["phase"]
+        self.metrics.observe_snapshot(time.perf_counter() - t_snap)
+        return snap
+
+    def _log_snapshot(self, snap: Dict[str, Any]) -> None:
+        total = snap["intersecciones"]
+        print(
+            f"[POOL] Ciclo {snap['cycle']} | Fase {snap['phase']} | intersecciones={total['n']} "
+            f"(workers={total['workers']}) | cruzaron={total['cruzaron']} | "
+            f"retraso_tick={total['retraso_prom_ms']}ms (máx {total['retraso_max_ms']}ms)"
+        )
+        for d in DIRS:
+            datos = snap["semaforos"][d]
+            print(
+                "    "
+                f"{d}: estado={NOMBRES_LUZ[datos['estado']]} | cola={datos['cola']} | "
+                f"cruzaron={datos['cruzaron']} | espera_prom={datos['espera_prom']}s"
+            )
@@ -1,107 +1,269 @@
 import multiprocessing
 import time
-import random
+from pathlib import Path
 from typing import Dict, Any
 
-from ..config import GREEN_TIME, YELLOW_TIME, TICK, ARRIVAL_PROB
+from ..checkpoint import max_veh_id
+from ..config import YELLOW_TIME, TICK, ARRIVAL_PROB, QUEUE_CAPACITY, QUEUE_POLICY, CONTROL_MODE, WAKE_MODE
+from ..models.llegadas import FuenteBernoulli, FuenteLlegadas
 from ..models.semaforo import Semaforo
 from ..models.vehiculo import Vehiculo
 from ..models.controlador import ControladorTrafico
+from ..models.fases import APAGADO, NOMBRES_LUZ, PLAN, VERDE
+from ..metrics import SimMetrics, WaitRecorder, WorkerMetrics
+from ..profiling import run_profiled
+from ..results.columnar import ColumnarSink
 from .base import BaseSimulation
+from .eventos import WAKE_MODES, AgendaLlegadas
+from .memory import cpu_seconds, processes_rss
+from .lights import Luces
+from .sensors import Sensores
+from .shared_state import (
+    CAMPOS_CONTADORES, CAMPOS_RECIENTES, Capturas, Publicados, aplanar_recientes, contadores_de, leer_recientes,
+)
 
-def worker_semaforo(direccion: str, 
-                    shared_sem_dict: Any, 
-                    lock: Any, 
-                    running_event: Any, 
+def _run_measured(cpu_final: Any, idx: int, fn: Any, *args: Any) -> None:
+    # /proc forgets a process once it is joined: leave our own CPU time behind on the way out
+    try:
+        fn(*args)
+    finally:
+        cpu_final[idx] = time.process_time()
+
+# Each worker issues ids proc_idx * IDS_PER_PROCESS + creados: no coordination needed
+IDS_PER_PROCESS = 1_000_000
+
+def worker_semaforo(direccion: str,
+                    shared_sem_dict: Any,
+                    shared_capturas: Any,
+                    running_event: Any,
                     start_barrier: Any,
-                    proc_idx: int) -> None:
-    
+                    proc_idx: int,
+                    fuente: FuenteLlegadas,
+                    run_dir: str | None = None,
+                    metrics: SimMetrics | None = None,
+                    elapsed0: float = 0.0,
+                    sensores: Sensores | None = None,
+                    luces: Luces | None = None,
+                    cambio: Any = None,
+                    demanda: Any = None,
+                    recientes: Publicados | None = None,
+                    contadores: Publicados | None = None,
+                    capturas: Capturas | None = None) -> None:
+    """With `cambio` (a Condition) the worker is event-driven: it sleeps until its next
+    arrival, the next discharge tick or a phase change, and notifies `demanda` (if given)
+    whenever it publishes its sensors.
+
+    The Semaforo is read from `shared_sem_dict` once and then lives in this process:
+    every tick only a few doubles go to shared memory (`contadores`, `recientes`), and
+    the full state goes to `shared_capturas` only when a checkpoint asks for it."""
+
+    sem_obj = shared_sem_dict[direccion]
+    # Each process opens its own reader (traces are streamed, never shared)
+    lector = fuente.abrir(direccion)
+    # When resuming, fast-forward the reader to where the checkpoint left it
+    if sem_obj.pos_llegadas is not None:
+        lector.saltar(sem_obj.pos_llegadas)
+    # ...and writes its own results partition
+    sink = ColumnarSink(Path(run_dir) / f"part-{direccion}") if run_dir is not None else None
+    # Metrics live in shared memory: updating them needs no Manager call
+    metrics = metrics if metrics is not None else SimMetrics()
+    recientes = recientes if recientes is not None else Publicados(CAMPOS_RECIENTES)
+    contadores = contadores if contadores is not None else Publicados(CAMPOS_CONTADORES)
+    capturas = capturas if capturas is not None else Capturas()
+    wm = WorkerMetrics(metrics, f"Semaforo-{direccion}", direccion)
+    recorder = WaitRecorder(wm, sink)
+
     # Wait for all to be ready
     start_barrier.wait()
-    
-    local_veh_counter = 0
-    base_id = proc_idx * 1_000_000
-    
+
+    base_id = proc_idx * IDS_PER_PROCESS
+    t0 = time.time() - elapsed0
+    t_ultima = 0.0
+    # Event mode: arrivals are drawn ahead, and green discharge is credited since the last wake-up
+    agenda = AgendaLlegadas(lector, TICK, time.time() - t0) if cambio is not None else None
+    t_prev = t_verde = time.time()
+    luz_prev = None
+
     while running_event.is_set():
         now = time.time()
-        
-        # Access shared state with Lock
-        # We must acquire lock because we are updating the Semaforo object inside the dict
-        with lock:
-            # COPY: Get the object from shared dict (unpickled copy)
-            sem_obj = shared_sem_dict[direccion]
-            
-            # 1. Arrival Logic
-            if random.random() < ARRIVAL_PROB:
-                local_veh_counter += 1
-                v_id = base_id + local_veh_counter
-                v = Vehiculo(v_id, direccion, now)
-                sem_obj.enqueue(v)
-            
-            # 2. Crossing Logic
-            # The controller (other process) updates 'sem_obj.estado' in the shared dict
-            # We must use the state from the copy we just got.
-            sem_obj.avanzar_uno(now)
-            
-            # WRITE BACK: Update the shared dict so others (GUI, Controller) see changes
-            shared_sem_dict[direccion] = sem_obj
-            
-        time.sleep(TICK)
+        llegadas = agenda.vencidas(now - t0) if agenda is not None else lector.llegadas(now - t0)
+        if luces is not None:
+            # The light comes from shared memory (written by the controller)
+            sem_obj.estado, sem_obj.ciclo = luces.leer(direccion)
+
+        # 1. Arrival Logic
+        for _ in range(sem_obj.admitir(llegadas)):
+            # the counter lives in the Semaforo so it survives checkpoints
+            sem_obj.creados += 1
+            v_id = base_id + sem_obj.creados
+            v = Vehiculo(v_id, direccion, now)
+            sem_obj.enqueue(v)
+        sem_obj.pos_llegadas = lector.posicion()
+        sem_obj.muestrear(now, llegadas)
+
+        # 2. Crossing Logic
+        # Batch crossing: as many vehicles as the saturation flow allows this tick.
+        dt = TICK
+        if agenda is not None:
+            # We are woken on every phase change, so the light turned green about when we saw it
+            if sem_obj.estado == VERDE and luz_prev != VERDE:
+                t_verde = now
+            # Credit the grid ticks of green since the last wake-up, as tick mode would
+            dt = 0.0
+            if sem_obj.estado == VERDE:
+                dt = TICK * agenda.ticks_entre(max(t_prev, t_verde) - t0, now - t0)
+            t_prev, luz_prev = now, sem_obj.estado
+        sem_obj.avanzar_n(now, sem_obj.capacidad(dt), recorder)
+
+        # 3. Publish: counters and recent stats for the GUI, a full capture only on request
+        contadores.publicar(direccion, contadores_de(sem_obj))
+        recientes.publicar(direccion, aplanar_recientes(sem_obj.recientes()))
+        pedido = capturas.pendiente(direccion)
+        if pedido is not None:
+            shared_capturas[direccion] = sem_obj.capturar()
+            capturas.atender(direccion, pedido)
+
+        # Detector for the actuated controller: shared memory, no Manager round-trip
+        if llegadas:
+            t_ultima = now
+        if sensores is not None:
+            cola = len(sem_obj.cola) + sem_obj.en_disco() + sem_obj.retenidos
+            if demanda is not None:
+                # Under the condition: the controller cannot miss it between its check and its wait
+                with demanda:
+                    sensores.publicar(direccion, cola, t_ultima)
+                    demanda.notify()
+            else:
+                sensores.publicar(direccion, cola, t_ultima)
+
+        # is_set (+ a capture set, now and then)
+        wm.semaforo(sem_obj)
+        if agenda is None:
+            wm.tick(0.0, ipc=1 + (pedido is not None))
+            time.sleep(TICK)
+            continue
+
+        wm.tick(0.0, ipc=1 + (pedido is not None) + 1)
+        despertar = t0 + agenda.despertar()
+        if sem_obj.puede_avanzar():
+            despertar = min(despertar, t0 + agenda.tick_siguiente(now - t0))
+        with cambio:
+            # The controller publishes the lights (and stop()/checkpoints notify) under `cambio`:
+            # if anything changed since we looked, go around again instead of sleeping through it
+            if (
+                running_event.is_set()
+                and luces.leer(direccion) == (sem_obj.estado, sem_obj.ciclo)
+                and capturas.pendiente(direccion) is None
+            ):
+                cambio.wait(max(0.0, despertar - time.time()))
+
+    # Leave the final state for a checkpoint taken after the run ended, then drop the spill
+    shared_capturas[direccion] = sem_obj.capturar()
+    capturas.terminar(direccion)
+    sem_obj.descartar_derrame()
+    if sink is not None:
+        sink.close()
 
 def worker_controlador(shared_sem_dict: Any, 
                        shared_ctrl_state: Any, 
                        lock: Any, 
                        running_event: Any, 
                        start_barrier: Any,
-                       cycles_target: int) -> None:
+                       cycles_target: int,
+                       metrics: SimMetrics | None = None,
+                       resume_ctrl: Dict[str, Any] | None = None,
+                       elapsed0: float = 0.0,
+                       sensores: Sensores | None = None,
+                       control: str = CONTROL_MODE,
+                       luces: Luces | None = None,
+                       cambio: Any = None,
+                       demanda: Any = None) -> None:
+    """With `cambio`/`demanda` (Conditions) the controller sleeps until its next possible
+    decision or a sensor update, and signals every light change."""
     
-    ctrl = ControladorTrafico()
+    ctrl = ControladorTrafico(modo=control)
+    if resume_ctrl is not None:
+        ctrl = ControladorTrafico(
+            fase_idx=resume_ctrl["fase_idx"], ciclo=resume_ctrl["ciclo"], en_amarillo=resume_ctrl["en_amarillo"],
+            modo=control,
+        )
+    sensor = sensores.leer if sensores is not None else None
+    luces = luces if luces is not None else Luces(ctrl.plan.aproximaciones)
+    wm = WorkerMetrics(metrics if metrics is not None else SimMetrics(), "Controlador")
     
     # Wait for start
     start_barrier.wait()
     
-    # Initial phase application
+    # Initial phase application (on resume, phase and yellow come from the checkpoint)
     with lock:
-        current_semas = {d: shared_sem_dict[d] for d in ["N", "S", "E", "O"]}
-        ctrl.aplicar_fase(current_semas)
-        for d, s in current_semas.items():
-            shared_sem_dict[d] = s
+        now = time.time()
+        if resume_ctrl is None:
+            ctrl.aplicar_fase(now=now)
+        else:
+            ctrl.t_fase = now - resume_ctrl["en_fase"]
+        _publicar_luces(luces, ctrl, cambio)
         
         shared_ctrl_state['cycle'] = ctrl.ciclo
         shared_ctrl_state['phase'] = ctrl.fase_idx
-        shared_ctrl_state['start_ts'] = time.time()
+        shared_ctrl_state['en_amarillo'] = ctrl.en_amarillo
+        shared_ctrl_state['t_fase'] = ctrl.t_fase
+        shared_ctrl_state['start_ts'] = now - elapsed0
 
     while running_event.is_set() and ctrl.ciclo < cycles_target:
         
-        # GREEN PERIOD
-        t0 = time.time()
-        while running_event.is_set() and (time.time() - t0) < GREEN_TIME:
-            time.sleep(TICK)
+        # GREEN PERIOD (skipped if we resumed in yellow)
+        if demanda is None:
+            while running_event.is_set() and not ctrl.en_amarillo and not ctrl.fin_de_verde(time.time(), sensor):
+                time.sleep(TICK)
+                wm.tick(0.0, ipc=1)
+        else:
+            # Sleep until the next possible decision; a sensor update (notify) may bring it forward
+            with demanda:
+                while running_event.is_set() and not ctrl.en_amarillo:
+                    now = time.time()
+                    if ctrl.fin_de_verde(now, sensor):
+                        break
+                    t = ctrl.proxima_decision(now, sensor)
+                    demanda.wait(max(0.0, t - now))
+                    wm.tick(0.0, ipc=1)
             
         # YELLOW PERIOD
-        with lock:
-            verdes, _ = ctrl.fase_actual()
-            current_semas = {d: shared_sem_dict[d] for d in ["N", "S", "E", "O"]}
-            for d in verdes:
-                current_semas[d].estado = "AMARILLO"
-                shared_sem_dict[d] = current_semas[d]
+        if not ctrl.en_amarillo:
+            ctrl.poner_amarillo()
+            _publicar_luces(luces, ctrl, cambio)
+            t_lock = time.perf_counter()
+            with lock:
+                # acquire/release + 2 state writes
+                wm.tick(time.perf_counter() - t_lock, ipc=2 + 2)
+                shared_ctrl_state['en_amarillo'] = True
+                shared_ctrl_state['t_fase'] = ctrl.t_fase
         
-        t1 = time.time()
-        while running_event.is_set() and (time.time() - t1) < YELLOW_TIME:
-            time.sleep(TICK)
+        if cambio is None:
+            while running_event.is_set() and (time.time() - ctrl.t_fase) < YELLOW_TIME:
+                time.sleep(TICK)
+                wm.tick(0.0, ipc=1)
+        else:
+            # Only stop() notifies `cambio` while we are in yellow
+            with cambio:
+                while running_event.is_set() and (resto := ctrl.t_fase + YELLOW_TIME - time.time()) > 0:
+                    cambio.wait(resto)
+                    wm.tick(0.0, ipc=1)
             
         # NEXT PHASE
+        # The lights are a few ints in shared memory: no Semaforo round-trips
+        ctrl.siguiente_fase()
+        ctrl.aplicar_fase()
+        _publicar_luces(luces, ctrl, cambio)
+        t_lock = time.perf_counter()
         with lock:
-            ctrl.siguiente_fase()
-            
-            current_semas = {d: shared_sem_dict[d] for d in ["N", "S", "E", "O"]}
-            ctrl.aplicar_fase(current_semas)
-            
-            for d, s in current_semas.items():
-                shared_sem_dict[d] = s
-                
+            # acquire/release + 6 state writes
+            wm.tick(time.perf_counter() - t_lock, ipc=2 + 6)
             shared_ctrl_state['cycle'] = ctrl.ciclo
             shared_ctrl_state['phase'] = ctrl.fase_idx
+            shared_ctrl_state['en_amarillo'] = False
+            shared_ctrl_state['t_fase'] = ctrl.t_fase
+            shared_ctrl_state['gap_outs'] = ctrl.gap_outs
+            shared_ctrl_state['max_outs'] = ctrl.max_outs
 
     # End of cycles
     total_time = None
@@ -114,25 +276,73 @@ def worker_controlador(shared_sem_dict: Any,
         shared_ctrl_state['ended'] = True
 
     running_event.clear()
+    if cambio is not None:
+        with cambio:
+            cambio.notify_all()
+
+def _publicar_luces(luces: Luces, ctrl: ControladorTrafico, cambio: Any) -> None:
+    if cambio is None:
+        luces.publicar(ctrl)
+        return
+    # Event-driven workers check the lights under `cambio` before sleeping
+    with cambio:
+        luces.publicar(ctrl)
+        cambio.notify_all()
 
 class ProcessesSimulation(BaseSimulation):
-    def __init__(self, cycles: int = 10):
+    def __init__(self, cycles: int = 10, fuente: FuenteLlegadas | None = None,
+                 results_dir: str | None = None,
+                 queue_capacity: int | None = QUEUE_CAPACITY,
+                 queue_policy: str = QUEUE_POLICY,
+                 resume: Dict[str, Any] | None = None,
+                 control: str = CONTROL_MODE,
+                 wake: str = WAKE_MODE):
+        if wake not in WAKE_MODES:
+            raise ValueError(f"wake debe ser uno de {WAKE_MODES}, no {wake!r}")
         self.cycles_target = cycles
+        self.control = control
+        self.wake = wake
+        # The controller is built in its own process: build one here too, so a plan that does
+        # not match PHASE_GREEN_TIMES (or the checkpoint's phase) fails now, before any Manager
+        ControladorTrafico(fase_idx=resume["controlador"]["fase_idx"] if resume is not None else 0, modo=control)
+        # Per-direction occupancy for actuated control, in shared memory (lock-free reads)
+        self.sensores = Sensores(shared=True)
+        # Light codes + cycle, written only by the controller
+        self.luces = Luces(PLAN.exigir().aproximaciones, shared=True)
+        # Per-tick counters and recent stats of each direction, published by its worker
+        self.contadores = Publicados(CAMPOS_CONTADORES, shared=True)
+        self.recientes = Publicados(CAMPOS_RECIENTES, shared=True)
+        # Checkpoint requests to the workers, which hold the full Semaforos
+        self.capturas = Capturas(shared=True)
+        self.fuente = fuente if fuente is not None else FuenteBernoulli(ARRIVAL_PROB)
+        self.results_dir = results_dir
+        self.metrics = SimMetrics(shared=True)
         self.manager = multiprocessing.Manager()
         
         # Shared State
         # Initial Semaforos
-        initial_semas = {d: Semaforo(d) for d in ["N", "S", "E", "O"]}
+        initial_semas = {
+            d: Semaforo(d, capacidad_cola=queue_capacity, politica_cola=queue_policy)
+            for d in ["N", "S", "E", "O"]
+        }
+        # Resume from a checkpoint (see src/checkpoint.py)
+        self._resume = resume
+        if resume is not None:
+            desplazamiento = time.time() - resume["t_captura"]
+            initial_semas = {
+                d: Semaforo.restaurar(d, resume["semaforos"][d], desplazamiento)
+                for d in ["N", "S", "E", "O"]
+            }
+        # Read once by each worker at start; from then on its Semaforo lives in that process
         self.shared_sem_dict = self.manager.dict(initial_semas)
+        # Full captures, written by the workers only when a checkpoint asks for them
+        self.shared_capturas = self.manager.dict({d: s.capturar() for d, s in initial_semas.items()})
+        for d, s in initial_semas.items():
+            self.contadores.publicar(d, contadores_de(s))
+            self.recientes.publicar(d, aplanar_recientes(s.recientes()))
         
         # Shared Controller State (for GUI)
-        self.shared_ctrl_state = self.manager.dict({
-            "cycle": 0,
-            "phase": 0,
-            "start_ts": None,
-            "total_time": None,
-            "ended": False,
-        })
+        self.shared_ctrl_state = self.manager.dict(self._initial_ctrl_state())
         
         self.lock = self.manager.RLock()  # RLock is safer
         self.running_event = self.manager.Event()
@@ -140,8 +350,14 @@ class ProcessesSimulation(BaseSimulation):
         
         # Barrier: 4 semaphores + 1 controller
         self.barrier = self.manager.Barrier(5)
+
+        # Event mode: native conditions (no Manager round-trip) for light changes and sensor updates
+        self.cambio = multiprocessing.Condition() if wake == "event" else None
+        self.demanda = multiprocessing.Condition() if wake == "event" else None
         
         self.processes = []
+        # CPU of each worker when it exited (0 = still running), in the order of self.processes
+        self._cpu_final = multiprocessing.RawArray("d", 5)
         self._last_logged_cycle = -1
         self._last_logged_phase = -1
         self._total_time_logged = False
@@ -152,19 +368,24 @@ class ProcessesSimulation(BaseSimulation):
         self._last_logged_cycle = -1
         self._last_logged_phase = -1
         self.processes = []
+        self._cpu_final[:] = [0.0] * len(self._cpu_final)
         with self.lock:
-            self.shared_ctrl_state['cycle'] = 0
-            self.shared_ctrl_state['phase'] = 0
-            self.shared_ctrl_state['start_ts'] = None
-            self.shared_ctrl_state['total_time'] = None
-            self.shared_ctrl_state['ended'] = False
+            self.shared_ctrl_state.update(self._initial_ctrl_state())
+        resume_ctrl = self._resume["controlador"] if self._resume is not None else None
+        elapsed0 = self._resume["elapsed"] if self._resume is not None else 0.0
         
+        run_dir = None
+        if self.results_dir is not None:
+            run_dir = str(Path(self.results_dir) / f"processes-{time.strftime('%Y%m%d-%H%M%S')}")
+
         # Start Semaphore Processes
         dirs = ["N", "S", "E", "O"]
         for i, d in enumerate(dirs):
             p = multiprocessing.Process(
-                target=worker_semaforo,
-                args=(d, self.shared_sem_dict, self.lock, self.running_event, self.barrier, i + 1),
+                target=run_profiled,
+                args=(f"Semaforo-{d}", _run_measured, self._cpu_final, i, worker_semaforo, d, self.shared_sem_dict, self.shared_capturas, self.running_event, self.barrier, i + 1, self.fuente, run_dir, self.metrics, elapsed0, self.sensores, self.luces,
+                      self.cambio, self.demanda if self.control == "actuated" else None, self.recientes, self.contadores,
+                      self.capturas),
                 name=f"Semaforo-{d}"
             )
             self.processes.append(p)
@@ -172,8 +393,9 @@ class ProcessesSimulation(BaseSimulation):
             
         # Start Controller Process
         p_ctrl = multiprocessing.Process(
-            target=worker_controlador,
-            args=(self.shared_sem_dict, self.shared_ctrl_state, self.lock, self.running_event, self.barrier, self.cycles_target),
+            target=run_profiled,
+            args=("Controlador", _run_measured, self._cpu_final, len(dirs), worker_controlador, self.shared_sem_dict, self.shared_ctrl_state, self.lock, self.running_event, self.barrier, self.cycles_target, self.metrics, resume_ctrl, elapsed0, self.sensores, self.control, self.luces,
+                  self.cambio, self.demanda),
             name="Controlador"
         )
         self.processes.append(p_ctrl)
@@ -181,6 +403,11 @@ class ProcessesSimulation(BaseSimulation):
 
     def stop(self) -> None:
         self.running_event.clear()
+        for cond in (self.cambio, self.demanda):
+            if cond is not None:
+                with cond:
+                    cond.notify_all()
+        # Each worker removes its own spill file on the way out
         for p in self.processes:
             p.join()
         self.manager.shutdown()
@@ -188,24 +415,40 @@ class ProcessesSimulation(BaseSimulation):
     def get_snapshot(self) -> Dict[str, Any]:
         # The GUI calls this from the MainProcess
         # We access the shared managed dicts
+        t_snap = time.perf_counter()
         try:
             with self.lock:
+                # acquire/release + 6 ctrl state reads; the Semaforos come from shared memory
+                self.metrics.add(self.metrics.slot("MainProcess:lock_wait"), time.perf_counter() - t_snap)
+                self.metrics.add(self.metrics.slot("MainProcess:ipc"), 2 + 6)
                 # We interpret the data
                 semas_data = {}
                 for d in ["N", "S", "E", "O"]:
-                    s = self.shared_sem_dict[d]  # copy
+                    c = self.contadores.leer(d)
+                    cruzaron = int(c["cruzaron"])
                     semas_data[d] = {
-                        "estado": s.estado,
-                        "cola": len(s.cola),
-                        "cruzaron": s.cruzaron,
-                        "espera_prom": round(s.espera_promedio(), 2),
+                        "estado": self.luces.leer(d)[0],
+                        "cola": int(c["cola"]),
+                        "cruzaron": cruzaron,
+                        "espera_prom": round(c["suma_espera"] / cruzaron, 2) if cruzaron else 0.0,
+                        "rechazados": int(c["rechazados"]),
+                        "bloqueados": int(c["bloqueados"]),
+                        "en_disco": int(c["en_disco"]),
+                        "mem_cola": int(c["mem_cola"]),
+                        **leer_recientes(self.recientes, d),
                     }
                 
                 snap = {
                     "cycle": self.shared_ctrl_state["cycle"],
                     "phase": self.shared_ctrl_state["phase"],
                     "total_time": round(self.shared_ctrl_state["total_time"], 2) if self.shared_ctrl_state["total_time"] is not None else None,
-                    "semaforos": semas_data
+                    "semaforos": semas_data,
+                    "memoria": self._memory_by_process(),
+                    "control": {
+                        "modo": self.control,
+                        "gap_outs": self.shared_ctrl_state["gap_outs"],
+                        "max_outs": self.shared_ctrl_state["max_outs"],
+                    },
                 }
                 if (
                     snap["cycle"] != self._last_logged_cycle
@@ -220,15 +463,90 @@ class ProcessesSimulation(BaseSimulation):
                 ):
                     print(f"[PROCESSES] tiempo_total_processes_s = {snap['total_time']:.2f}")
                     self._total_time_logged = True
+                self.metrics.observe_snapshot(time.perf_counter() - t_snap)
                 return snap
         except Exception:
             # If manager is closed or error
             return {
                 "cycle": 0,
                 "phase": 0,
-                "semaforos": {d: {"estado": "OFF", "cola": 0, "cruzaron": 0, "espera_prom": 0} for d in "NSEO"}
+                "semaforos": {d: {"estado": APAGADO, "cola": 0, "cruzaron": 0, "espera_prom": 0} for d in "NSEO"}
             }
 
+    def _initial_ctrl_state(self) -> Dict[str, Any]:
+        c = self._resume["controlador"] if self._resume is not None else {}
+        return {
+            "cycle": c.get("ciclo", 0),
+            "phase": c.get("fase_idx", 0),
+            "en_amarillo": c.get("en_amarillo", False),
+            "t_fase": None,
+            "start_ts": None,
+            "total_time": None,
+            "ended": False,
+            "gap_outs": 0,
+            "max_outs": 0,
+        }
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        # The full Semaforos live in the workers: each leaves a capture at the end of its next
+        # tick (or already left its last one on exit), so they are at most a tick apart
+        pedido = self._pedir_capturas()
+        dirs = ["N", "S", "E", "O"]
+        while not all(self.capturas.atendido(d, pedido) or not p.is_alive() for d, p in zip(dirs, self.processes)):
+            time.sleep(TICK / 4)
+        with self.lock:
+            now = time.time()
+            semaforos = {d: self.shared_capturas[d] for d in dirs}
+            ctrl = self.shared_ctrl_state.copy()
+        start_ts = ctrl["start_ts"]
+        elapsed0 = self._resume["elapsed"] if self._resume is not None else 0.0
+        return {
+            "mode": "processes",
+            "cycles_target": self.cycles_target,
+            "t_captura": now,
+            "elapsed": now - start_ts if start_ts is not None else elapsed0,
+            # Largest id issued so far, so a threads resume does not reuse any of them
+            "veh_id": max(
+                [(i + 1) * IDS_PER_PROCESS + semaforos[d]["campos"]["creados"] for i, d in enumerate(["N", "S", "E", "O"])]
+                + [max_veh_id(semaforos)]
+            ),
+            "controlador": {
+                "fase_idx": ctrl["phase"],
+                "ciclo": ctrl["cycle"],
+                "en_amarillo": ctrl["en_amarillo"],
+                "en_fase": now - ctrl["t_fase"] if ctrl["t_fase"] is not None else 0.0,
+            },
+            "semaforos": semaforos,
+        }
+
+    def _pedir_capturas(self) -> int:
+        if self.cambio is None:
+            return self.capturas.pedir()
+        # Event-driven workers check for requests under `cambio` before sleeping
+        with self.cambio:
+            pedido = self.capturas.pedir()
+            self.cambio.notify_all()
+        return pedido
+
+    def cpu_seconds(self) -> float | None:
+        # Finished workers count with the CPU they reported on exit
+        valores = [self._cpu_final[i] or cpu_seconds(p.pid) for i, p in enumerate(self.processes)]
+        # The Manager serves every lock and dict access: its CPU is part of this backend's cost
+        manager_proc = getattr(self.manager, "_process", None)
+        if manager_proc is not None:
+            valores.append(cpu_seconds(manager_proc.pid))
+        medidos = [v for v in valores if v is not None]
+        return sum(medidos) if medidos else None
+
+    def _memory_by_process(self) -> Dict[str, int | None]:
+        # Read from /proc by pid: no extra round-trips through the Manager
+        procs = [("MainProcess", None)]
+        manager_proc = getattr(self.manager, "_process", None)
+        if manager_proc is not None:
+            procs.append(("Manager", manager_proc.pid))
+        procs.extend((p.name, p.pid) for p in self.processes if p.is_alive())
+        return processes_rss(procs)
+
     def _log_snapshot(self, snap: Dict[str, Any]) -> None:
         total_cruzaron = sum(s["cruzaron"] for s in snap["semaforos"].values())
         print(
@@ -239,6 +557,6 @@ class ProcessesSimulation(BaseSimulation):
             datos = snap["semaforos"][d]
             print(
                 "    "
-                f"{d}: estado={datos['estado']} | cola={datos['cola']} | "
+                f"{d}: estado={NOMBRES_LUZ[datos['estado']]} | cola={datos['cola']} | "
                 f"cruzaron={datos['cruzaron']} | espera_prom={datos['espera_prom']}s"
             )
@@ -0,0 +1,181 @@
+"""Visor fuera de proceso: la simulación publica snapshots y la GUI los pide.
+
+El servidor corre en el proceso de la simulación (`--serve`) y la GUI se
+conecta con `RemoteSimulation` (`--attach`). El visor *pide* cada snapshot, así
+que uno lento o congelado simplemente pide menos: el simulador nunca espera a
+nadie. Además, el snapshot real se toma como mucho una vez cada
+`REMOTE_SNAPSHOT_INTERVAL` y se comparte entre todos los visores conectados.
+
+`Connection.recv` deserializa con pickle: quien pase el handshake puede
+ejecutar código. Por eso no hay clave por defecto y fuera de loopback hay
+que darla explícitamente.
+"""
+import ipaddress
+import os
+import secrets
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, List, Tuple
+
+from ..config import REMOTE_AUTHKEY_ENV, REMOTE_HOST, REMOTE_SNAPSHOT_INTERVAL
+from .base import BaseSimulation
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """'[HOST:]PUERTO' -> (host, puerto)."""
+    host, _, port = value.rpartition(":")
+    return host or REMOTE_HOST, int(port)
+
+
+def es_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def clave_dada(authkey: str | None = None) -> bytes | None:
+    """La clave explícita: `authkey` (--authkey) o la variable REMOTE_AUTHKEY_ENV; None si no hay."""
+    clave = authkey or os.environ.get(REMOTE_AUTHKEY_ENV)
+    return clave.encode() if clave else None
+
+
+def clave_al_azar() -> bytes:
+    """Clave de una sola corrida, para servir en loopback sin configurar nada."""
+    return secrets.token_hex(16).encode()
+
+
+class SnapshotServer:
+    """Atiende a los visores conectados con el último snapshot de `source()`."""
+
+    def __init__(self, source: Callable[[], BaseSimulation | None], address: Tuple[str, int], authkey: bytes,
+                 interval: float = REMOTE_SNAPSHOT_INTERVAL):
+        if not authkey:
+            raise ValueError("SnapshotServer necesita una authkey")
+        self.source = source
+        self.interval = interval
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self._lock = threading.Lock()
+        self._snap: Dict[str, Any] | None = None
+        self._t_snap = 0.0
+        self._clients: List[Connection] = []
+        self._closed = False
+
+    def start(self) -> None:
+        threading.Thread(target=self._accept_loop, name="Snapshot-Server", daemon=True).start()
+
+    def stop(self) -> None:
+        self._closed = True
+        self.listener.close()
+        with self._lock:
+            for conn in self._clients:
+                conn.close()
+            self._clients.clear()
+
+    def snapshot(self) -> Dict[str, Any] | None:
+        # Un solo snapshot por intervalo, lo pidan uno o diez visores
+        with self._lock:
+            now = time.monotonic()
+            if self._snap is None or now - self._t_snap >= self.interval:
+                sim = self.source()
+                if sim is not None:
+                    self._snap = sim.get_snapshot()
+                    self._t_snap = now
+            return self._snap
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if self._closed:
+                    return
+                continue  # handshake fallido (authkey incorrecta, etc.)
+            with self._lock:
+                self._clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), name="Snapshot-Client", daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        try:
+            while True:
+                msg = conn.recv()  # bloquea sin el GIL mientras el visor no pida nada
+                if msg == "snapshot":
+                    conn.send(self.snapshot())
+                elif msg == "detach":
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                if conn in self._clients:
+                    self._clients.remove(conn)
+            conn.close()
+
+
+class RemoteSimulation(BaseSimulation):
+    """Proxy de solo lectura de una simulación servida con `SnapshotServer`.
+
+    `start` se conecta y `stop` se desconecta: la simulación remota sigue
+    corriendo. Si la conexión se cae, cada `get_snapshot` reintenta. Si no hay
+    servidor o rechaza la clave, ConnectionError con un mensaje para el usuario.
+    """
+
+    def __init__(self, cycles: int = 10, address: Tuple[str, int] | str = ("127.0.0.1", 0),
+                 authkey: bytes | None = None, **_: Any):
+        self.cycles_target = cycles
+        self.address = parse_address(address) if isinstance(address, str) else tuple(address)
+        self.authkey = authkey if authkey is not None else clave_dada()
+        if not self.authkey:
+            raise ValueError(f"falta la authkey del servidor (--authkey o {REMOTE_AUTHKEY_ENV})")
+        self._conn: Connection | None = None
+        self._last: Dict[str, Any] | None = None
+
+    def start(self) -> None:
+        self._connect()
+
+    def stop(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send("detach")
+            except OSError:
+                pass
+            self._conn.close()
+            self._conn = None
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        if self._conn is None:
+            try:
+                self._connect()
+            except ConnectionError:
+                if self._last is None:
+                    raise
+                return self._last
+        try:
+            self._conn.send("snapshot")
+            snap = self._conn.recv()
+        except (EOFError, OSError):
+            self._conn.close()
+            self._conn = None
+            if self._last is None:
+                raise
+            return self._last  # la simulación terminó o se reinicia: se muestra lo último visto
+        if snap is not None:
+            self._last = snap
+        if self._last is None:
+            raise RuntimeError("la simulación remota aún no tiene snapshot")
+        return self._last
+
+    def _connect(self) -> None:
+        host, port = self.address
+        try:
+            self._conn = Client(self.address, authkey=self.authkey)
+        except AuthenticationError:
+            raise ConnectionError(f"{host}:{port} rechazó la clave (¿la misma --authkey que --serve?)") from None
+        except OSError as e:
+            raise ConnectionError(
+                f"no hay una simulación sirviendo en {host}:{port} (python main.py --serve {port}): {e.strerror or e}"
+            ) from None
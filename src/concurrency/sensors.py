@@ -0,0 +1,33 @@
+"""Detectores por dirección para el control accionado.
+
+Cada worker publica la longitud de su cola y el instante de su última llegada
+en un arreglo plano de doubles (lista en hilos, `RawArray` en procesos), igual
+que las métricas: una casilla tiene un solo escritor, así que leer es una
+indexación de costo constante, sin lock, sin Manager y sin `get_snapshot`. Un
+lector puede ver cola y llegada de ticks distintos; para un detector es
+suficiente.
+"""
+from typing import Any, Tuple
+
+DIRS = ["N", "S", "E", "O"]
+_IDX = {d: i * 2 for i, d in enumerate(DIRS)}
+
+
+class Sensores:
+    def __init__(self, shared: bool = False):
+        n = len(DIRS) * 2
+        if shared:
+            import multiprocessing
+            self.values: Any = multiprocessing.RawArray("d", n)
+        else:
+            self.values = [0.0] * n
+
+    def publicar(self, direccion: str, cola: int, t_ultima_llegada: float) -> None:
+        i = _IDX[direccion]
+        self.values[i] = cola
+        self.values[i + 1] = t_ultima_llegada
+
+    def leer(self, direccion: str) -> Tuple[float, float]:
+        """(vehículos en cola, instante de la última llegada)."""
+        i = _IDX[direccion]
+        return self.values[i], self.values[i + 1]
@@ -0,0 +1,119 @@
+"""Estado por dirección que cada worker publica en memoria compartida (modo procesos).
+
+Como en `Sensores`, cada fila tiene un solo escritor (el worker de su
+dirección) y se lee sin lock ni Manager. A diferencia de un detector, un
+snapshot necesita valores del mismo tick (la espera media es suma / cruces):
+cada fila empieza con un contador de versión que queda impar mientras se
+escribe, y el lector reintenta si lo vio impar o cambiado (seqlock).
+
+Con esto el Semaforo completo no cruza procesos en cada tick: solo viaja por
+el Manager al arrancar y cuando se pide un checkpoint (`Capturas`).
+"""
+from typing import Any, Dict, Sequence, Tuple
+
+from ..models.semaforo import Semaforo
+
+DIRS = ["N", "S", "E", "O"]
+
+# Resumen de `Semaforo.recientes()` aplanado: ventana y último ciclo (ciclo -1 = ninguno)
+CAMPOS_VENTANA = ("flujo_vh", "llegadas_vh", "espera_prom", "cola_max")
+CAMPOS_CICLO = ("ciclo", "cruzaron", "llegadas", "espera_prom", "cola_max")
+CAMPOS_RECIENTES = tuple(f"ventana.{c}" for c in CAMPOS_VENTANA) + tuple(f"ciclo.{c}" for c in CAMPOS_CICLO)
+
+
+class Publicados:
+    def __init__(self, campos: Sequence[str], shared: bool = False):
+        self.campos = tuple(campos)
+        self._ancho = 1 + len(self.campos)  # [versión, campos...]
+        n = len(DIRS) * self._ancho
+        if shared:
+            import multiprocessing
+            self.values: Any = multiprocessing.RawArray("d", n)
+        else:
+            self.values = [0.0] * n
+        self._fila = {d: i * self._ancho for i, d in enumerate(DIRS)}
+
+    def publicar(self, direccion: str, valores: Sequence[float]) -> None:
+        i = self._fila[direccion]
+        self.values[i] += 1  # impar: escribiendo
+        self.values[i + 1:i + self._ancho] = valores
+        self.values[i] += 1
+
+    def leer(self, direccion: str) -> Dict[str, float]:
+        i = self._fila[direccion]
+        while True:
+            version = self.values[i]
+            valores = self.values[i + 1:i + self._ancho]
+            if version % 2 == 0 and self.values[i] == version:
+                return dict(zip(self.campos, valores))
+
+
+def aplanar_recientes(recientes: Dict[str, Any]) -> Tuple[float, ...]:
+    ciclo = recientes["ultimo_ciclo"] or {"ciclo": -1, "cruzaron": 0, "llegadas": 0, "espera_prom": 0.0, "cola_max": 0}
+    return tuple(recientes["ventana"][c] for c in CAMPOS_VENTANA) + tuple(ciclo[c] for c in CAMPOS_CICLO)
+
+
+def leer_recientes(publicados: Publicados, direccion: str) -> Dict[str, Any]:
+    """Lo publicado con `aplanar_recientes`, con la forma de `Semaforo.recientes()`."""
+    v = publicados.leer(direccion)
+    ventana = {c: v[f"ventana.{c}"] for c in CAMPOS_VENTANA}
+    ventana["cola_max"] = int(ventana["cola_max"])
+    ciclo = None
+    if v["ciclo.ciclo"] >= 0:
+        ciclo = {c: v[f"ciclo.{c}"] for c in CAMPOS_CICLO}
+        for c in ("ciclo", "cruzaron", "llegadas", "cola_max"):
+            ciclo[c] = int(ciclo[c])
+    return {"ventana": ventana, "ultimo_ciclo": ciclo}
+
+
+# Contadores de cada tick que el snapshot necesita del Semaforo del worker
+CAMPOS_CONTADORES = (
+    "cola", "cruzaron", "suma_espera", "rechazados", "bloqueados", "retenidos", "en_disco", "mem_cola", "creados",
+)
+
+
+def contadores_de(s: Semaforo) -> Tuple[float, ...]:
+    return (
+        len(s.cola), s.cruzaron, s.suma_espera, s.rechazados, s.bloqueados, s.retenidos,
+        s.en_disco(), s.memoria_cola(), s.creados,
+    )
+
+
+class Capturas:
+    """Pedidos de checkpoint del proceso principal a los workers.
+
+    El Semaforo completo (cola, derrame) vive en su worker: cuando el principal
+    pide una captura, cada worker la deja en un dict del Manager al final de su
+    tick y marca el pedido como atendido. Al salir deja la última y marca
+    `FIN`, que da por atendido cualquier pedido posterior.
+    """
+
+    FIN = 2 ** 62
+
+    def __init__(self, shared: bool = False):
+        n = 1 + len(DIRS)  # [último pedido, atendido por dirección...]
+        if shared:
+            import multiprocessing
+            self.values: Any = multiprocessing.RawArray("q", n)
+        else:
+            self.values = [0] * n
+        self._idx = {d: i + 1 for i, d in enumerate(DIRS)}
+
+    def pedir(self) -> int:
+        # un solo escritor: el proceso principal
+        self.values[0] += 1
+        return self.values[0]
+
+    def pendiente(self, direccion: str) -> int | None:
+        """El pedido que `direccion` todavía no atendió, si hay uno."""
+        pedido = self.values[0]
+        return pedido if self.values[self._idx[direccion]] < pedido else None
+
+    def atender(self, direccion: str, pedido: int) -> None:
+        self.values[self._idx[direccion]] = pedido
+
+    def terminar(self, direccion: str) -> None:
+        self.values[self._idx[direccion]] = self.FIN
+
+    def atendido(self, direccion: str, pedido: int) -> bool:
+        return self.values[self._idx[direccion]] >= pedido
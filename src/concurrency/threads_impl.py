@@ -1,26 +1,75 @@
 import threading
 import time
-import random
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, Tuple
 
-from ..config import GREEN_TIME, YELLOW_TIME, TICK, ARRIVAL_PROB
+from ..config import YELLOW_TIME, TICK, ARRIVAL_PROB, QUEUE_CAPACITY, QUEUE_POLICY, CONTROL_MODE, WAKE_MODE
+from ..models.llegadas import FuenteBernoulli, FuenteLlegadas, LectorLlegadas
 from ..models.semaforo import Semaforo
 from ..models.vehiculo import Vehiculo
 from ..models.controlador import ControladorTrafico
+from ..models.fases import NOMBRES_LUZ, VERDE
+from ..checkpoint import max_veh_id
+from ..metrics import SimMetrics, WaitRecorder, WorkerMetrics
+from ..profiling import run_profiled
+from ..results.columnar import ColumnarSink
 from .base import BaseSimulation
+from .eventos import WAKE_MODES, AgendaLlegadas
+from .memory import ThreadCpu, processes_rss
+from .sensors import Sensores
 
 class ThreadsSimulation(BaseSimulation):
-    def __init__(self, cycles: int = 10):
+    def __init__(self, cycles: int = 10, fuente: FuenteLlegadas | None = None,
+                 results_dir: str | None = None,
+                 queue_capacity: int | None = QUEUE_CAPACITY,
+                 queue_policy: str = QUEUE_POLICY,
+                 resume: Dict[str, Any] | None = None,
+                 control: str = CONTROL_MODE,
+                 wake: str = WAKE_MODE):
+        if wake not in WAKE_MODES:
+            raise ValueError(f"wake debe ser uno de {WAKE_MODES}, no {wake!r}")
         self.cycles_target = cycles
+        self.wake = wake
+        self.fuente = fuente if fuente is not None else FuenteBernoulli(ARRIVAL_PROB)
+        self.results_dir = results_dir
+        self._sink: ColumnarSink | None = None
+        self.metrics = SimMetrics()
+        # ocupación por dirección para el control accionado (lectura sin lock)
+        self.sensores = Sensores()
         self._running = False
 
-        self.semaforos: Dict[str, Semaforo] = {d: Semaforo(d) for d in ["N", "S", "E", "O"]}
-        self.controlador = ControladorTrafico()
+        self.semaforos: Dict[str, Semaforo] = {
+            d: Semaforo(d, capacidad_cola=queue_capacity, politica_cola=queue_policy)
+            for d in ["N", "S", "E", "O"]
+        }
+        self.controlador = ControladorTrafico(modo=control)
+        self.controlador.plan.exigir(list(self.semaforos))
 
         self._lock = threading.RLock()  # requerido
+        # modo "event": cambios de fase (controlador -> semáforos) y de sensores (semáforos -> controlador)
+        self._cambio = threading.Condition(self._lock)
+        self._demanda = threading.Condition(self._lock)
         self._threads: list[threading.Thread] = []
+        self._cpu = ThreadCpu()
         self._veh_id = 0
 
+        # reanudar desde un checkpoint (ver src/checkpoint.py)
+        self._resume = resume
+        self._elapsed0 = 0.0
+        if resume is not None:
+            desplazamiento = time.time() - resume["t_captura"]
+            self.semaforos = {
+                d: Semaforo.restaurar(d, resume["semaforos"][d], desplazamiento)
+                for d in ["N", "S", "E", "O"]
+            }
+            c = resume["controlador"]
+            self.controlador = ControladorTrafico(
+                fase_idx=c["fase_idx"], ciclo=c["ciclo"], en_amarillo=c["en_amarillo"], modo=control
+            )
+            # los ids siguen después de todos los ya vistos, venga de donde venga el checkpoint
+            self._veh_id = max(resume["veh_id"], max_veh_id(resume["semaforos"]))
+            self._elapsed0 = resume["elapsed"]
+
         self._phase_thread: threading.Thread | None = None
         self._last_logged_cycle = -1
         self._last_logged_phase = -1
@@ -31,69 +80,199 @@ class ThreadsSimulation(BaseSimulation):
         self._running = True
         self._start_ts = None
         self._total_time = None
+        if self.results_dir is not None:
+            run_dir = Path(self.results_dir) / f"threads-{time.strftime('%Y%m%d-%H%M%S')}"
+            self._sink = ColumnarSink(run_dir / "part-threads")
 
         # Un hilo por semáforo
+        run_semaforo = self._run_semaforo if self.wake == "tick" else self._run_semaforo_eventos
         for d in ["N", "S", "E", "O"]:
-            t = threading.Thread(target=self._run_semaforo, args=(d,), daemon=True)
+            name = f"Semaforo-{d}"
+            t = threading.Thread(target=run_profiled, args=(name, self._cpu.run, run_semaforo, d), name=name,
+                                 daemon=True)
             self._threads.append(t)
             t.start()
 
         # Hilo controlador de fases
-        self._phase_thread = threading.Thread(target=self._run_controlador, daemon=True)
+        self._phase_thread = threading.Thread(
+            target=run_profiled, args=("Controlador", self._cpu.run, self._run_controlador), name="Controlador",
+            daemon=True,
+        )
         self._phase_thread.start()
 
     def stop(self) -> None:
         self._running = False
+        with self._lock:
+            self._cambio.notify_all()
+            self._demanda.notify_all()
+        for t in self._threads + [self._phase_thread]:
+            if t is not None:
+                t.join(timeout=TICK * 5)
+        self._threads = []
+        with self._lock:
+            for s in self.semaforos.values():
+                s.descartar_derrame()
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
 
     def _run_controlador(self) -> None:
-        # fase inicial
+        wm = WorkerMetrics(self.metrics, "Controlador")
+
+        ctrl = self.controlador
+
+        # fase inicial (al reanudar, los estados ya vienen del checkpoint)
         with self._lock:
-            self.controlador.aplicar_fase(self.semaforos)
+            now = time.time()
+            if self._resume is None:
+                ctrl.aplicar_fase(self.semaforos, now)
+            else:
+                ctrl.t_fase = now - self._resume["controlador"]["en_fase"]
             if self._start_ts is None:
-                self._start_ts = time.time()
+                self._start_ts = now - self._elapsed0
 
-        while self._running and self.controlador.ciclo < self.cycles_target:
-            # Verde
-            t0 = time.time()
-            while self._running and (time.time() - t0) < GREEN_TIME:
-                time.sleep(TICK)
+        while self._running and ctrl.ciclo < self.cycles_target:
+            # Verde (si se reanudó en amarillo, ya pasó)
+            self._esperar_verde(wm)
 
             # Amarillo (solo para los que estaban en verde)
-            with self._lock:
-                verdes, _ = self.controlador.fase_actual()
-                for d in verdes:
-                    self.semaforos[d].estado = "AMARILLO"
+            if not ctrl.en_amarillo:
+                t_lock = time.perf_counter()
+                with self._lock:
+                    wm.tick(time.perf_counter() - t_lock)
+                    ctrl.poner_amarillo(self.semaforos)
+                    self._cambio.notify_all()
 
-            t1 = time.time()
-            while self._running and (time.time() - t1) < YELLOW_TIME:
-                time.sleep(TICK)
+            self._esperar_amarillo(wm)
 
             # Cambiar fase
+            t_lock = time.perf_counter()
             with self._lock:
-                self.controlador.siguiente_fase()
-                self.controlador.aplicar_fase(self.semaforos)
+                wm.tick(time.perf_counter() - t_lock)
+                ctrl.siguiente_fase()
+                ctrl.aplicar_fase(self.semaforos)
+                self._cambio.notify_all()
 
-        self._running = False
+        with self._lock:
+            self._running = False
+            self._cambio.notify_all()
         if self._start_ts is not None and self._total_time is None:
             self._total_time = time.time() - self._start_ts
             print(f"[THREADS] tiempo_total_threads_s = {self._total_time:.2f}")
 
+    def _esperar_verde(self, wm: WorkerMetrics) -> None:
+        ctrl = self.controlador
+        if self.wake == "tick":
+            while self._running and not ctrl.en_amarillo and not ctrl.fin_de_verde(time.time(), self.sensores.leer):
+                time.sleep(TICK)
+                wm.tick(0.0)
+            return
+        # hasta la próxima decisión posible, o hasta que un semáforo publique sus sensores
+        with self._lock:
+            while self._running and not ctrl.en_amarillo:
+                now = time.time()
+                if ctrl.fin_de_verde(now, self.sensores.leer):
+                    break
+                t = ctrl.proxima_decision(now, self.sensores.leer)
+                self._demanda.wait(max(0.0, t - now))
+                wm.tick(0.0)
+
+    def _esperar_amarillo(self, wm: WorkerMetrics) -> None:
+        ctrl = self.controlador
+        if self.wake == "tick":
+            while self._running and (time.time() - ctrl.t_fase) < YELLOW_TIME:
+                time.sleep(TICK)
+                wm.tick(0.0)
+            return
+        with self._lock:
+            while self._running and (resto := ctrl.t_fase + YELLOW_TIME - time.time()) > 0:
+                self._cambio.wait(resto)
+                wm.tick(0.0)
+
+    def _abrir_semaforo(self, direccion: str) -> Tuple[LectorLlegadas, WorkerMetrics, WaitRecorder, float]:
+        """Lector (avanzado al checkpoint, si se reanuda), métricas e instante cero de una dirección."""
+        lector = self.fuente.abrir(direccion)
+        if self.semaforos[direccion].pos_llegadas is not None:
+            lector.saltar(self.semaforos[direccion].pos_llegadas)
+        wm = WorkerMetrics(self.metrics, f"Semaforo-{direccion}", direccion)
+        return lector, wm, WaitRecorder(wm, self._sink), time.time() - self._elapsed0
+
+    def _paso_semaforo(self, sem: Semaforo, lector: LectorLlegadas, now: float, llegadas: int, dt: float,
+                       recorder: WaitRecorder, wm: WorkerMetrics) -> int:
+        """Llegadas y descarga de `dt` s de verde (con el lock tomado). Devuelve la demanda para el sensor."""
+        for _ in range(sem.admitir(llegadas)):
+            self._veh_id += 1
+            sem.creados += 1
+            sem.enqueue(Vehiculo(self._veh_id, sem.direccion, now))
+        sem.pos_llegadas = lector.posicion()
+        sem.muestrear(now, llegadas)
+
+        # cruzan en lote según flujo de saturación si verde
+        sem.avanzar_n(now, sem.capacidad(dt), recorder)
+        wm.semaforo(sem)
+        # demanda total: también lo derramado y lo retenido aguas arriba
+        return len(sem.cola) + sem.en_disco() + sem.retenidos
+
     def _run_semaforo(self, direccion: str) -> None:
+        lector, wm, recorder, t0 = self._abrir_semaforo(direccion)
+        t_ultima = 0.0
         while self._running:
             now = time.time()
+            # la lectura de la traza puede tocar disco: fuera del lock
+            llegadas = lector.llegadas(now - t0)
+            t_lock = time.perf_counter()
             with self._lock:
-                # llegada de vehículos
-                if random.random() < ARRIVAL_PROB:
-                    self._veh_id += 1
-                    self.semaforos[direccion].enqueue(Vehiculo(self._veh_id, direccion, now))
+                lock_wait = time.perf_counter() - t_lock
+                cola = self._paso_semaforo(self.semaforos[direccion], lector, now, llegadas, TICK, recorder, wm)
 
-                # cruza 1 si verde
-                self.semaforos[direccion].avanzar_uno(now)
+            if llegadas:
+                t_ultima = now
+            self.sensores.publicar(direccion, cola, t_ultima)
 
+            wm.tick(lock_wait)
             time.sleep(TICK)
 
+    def _run_semaforo_eventos(self, direccion: str) -> None:
+        """Como `_run_semaforo`, pero duerme hasta la próxima llegada, el próximo tick de descarga o un cambio de fase."""
+        lector, wm, recorder, t0 = self._abrir_semaforo(direccion)
+        agenda = AgendaLlegadas(lector, TICK, time.time() - t0)
+        t_ultima = 0.0
+        t_prev = time.time()
+        while self._running:
+            now = time.time()
+            # la lectura de la traza puede tocar disco: fuera del lock
+            llegadas = agenda.vencidas(now - t0)
+            t_lock = time.perf_counter()
+            with self._lock:
+                lock_wait = time.perf_counter() - t_lock
+                sem = self.semaforos[direccion]
+                # lo que habrían descargado los ticks de verde desde el despertar
+                # anterior (o desde que se puso), como en modo tick
+                dt = 0.0
+                if sem.estado == VERDE:
+                    dt = TICK * agenda.ticks_entre(max(t_prev, self.controlador.t_fase) - t0, now - t0)
+                cola = self._paso_semaforo(sem, lector, now, llegadas, dt, recorder, wm)
+
+                if llegadas:
+                    t_ultima = now
+                # bajo el lock: el controlador no puede perder el aviso entre su chequeo y su wait
+                self.sensores.publicar(direccion, cola, t_ultima)
+                if self.controlador.modo == "actuated":
+                    self._demanda.notify()
+                wm.tick(lock_wait)
+
+                t_prev = now
+                despertar = t0 + agenda.despertar()
+                if sem.puede_avanzar():
+                    despertar = min(despertar, t0 + agenda.tick_siguiente(now - t0))
+                if self._running:
+                    # libera el lock: un cambio de fase (que lo necesita) no se pierde
+                    self._cambio.wait(max(0.0, despertar - time.time()))
+
     def get_snapshot(self) -> Dict[str, Any]:
+        t_snap = time.perf_counter()
         with self._lock:
+            self.metrics.add(self.metrics.slot("MainProcess:lock_wait"), time.perf_counter() - t_snap)
             snap = {
                 "cycle": self.controlador.ciclo,
                 "phase": self.controlador.fase_idx,
@@ -104,8 +283,19 @@ class ThreadsSimulation(BaseSimulation):
                         "cola": len(s.cola),
                         "cruzaron": s.cruzaron,
                         "espera_prom": round(s.espera_promedio(), 2),
+                        "rechazados": s.rechazados,
+                        "bloqueados": s.bloqueados,
+                        "en_disco": s.en_disco(),
+                        "mem_cola": s.memoria_cola(),
+                        **s.recientes(),
                     } for d, s in self.semaforos.items()
-                }
+                },
+                "memoria": processes_rss([("MainProcess", None)]),
+                "control": {
+                    "modo": self.controlador.modo,
+                    "gap_outs": self.controlador.gap_outs,
+                    "max_outs": self.controlador.max_outs,
+                },
             }
             if (
                 snap["cycle"] != self._last_logged_cycle
@@ -114,7 +304,32 @@ class ThreadsSimulation(BaseSimulation):
                 self._log_snapshot(snap)
                 self._last_logged_cycle = snap["cycle"]
                 self._last_logged_phase = snap["phase"]
-            return snap
+        self.metrics.observe_snapshot(time.perf_counter() - t_snap)
+        return snap
+
+    def cpu_seconds(self) -> float | None:
+        return self._cpu.total(self._threads + [self._phase_thread])
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            semaforos = {d: s.capturar() for d, s in self.semaforos.items()}
+            ctrl = self.controlador
+            state = {
+                "mode": "threads",
+                "cycles_target": self.cycles_target,
+                "t_captura": now,
+                "elapsed": now - self._start_ts if self._start_ts is not None else self._elapsed0,
+                "veh_id": self._veh_id,
+                "controlador": {
+                    "fase_idx": ctrl.fase_idx,
+                    "ciclo": ctrl.ciclo,
+                    "en_amarillo": ctrl.en_amarillo,
+                    "en_fase": now - ctrl.t_fase if self._start_ts is not None else 0.0,
+                },
+            }
+        state["semaforos"] = semaforos
+        return state
 
     def _log_snapshot(self, snap: Dict[str, Any]) -> None:
         total_cruzaron = sum(s["cruzaron"] for s in snap["semaforos"].values())
@@ -126,7 +341,7 @@ class ThreadsSimulation(BaseSimulation):
             datos = snap["semaforos"][d]
             print(
                 "    "
-                f"{d}: estado={datos['estado']} | cola={datos['cola']} | "
+                f"{d}: estado={NOMBRES_LUZ[datos['estado']]} | cola={datos['cola']} | "
                 f"cruzaron={datos['cruzaron']} | espera_prom={datos['espera_prom']}s"
             )
     
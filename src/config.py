@@ -5,8 +5,78 @@ GREEN_TIME = 2.0
 YELLOW_TIME = 0.8
 RED_TIME = 0.2
 
+# Verde por fase de FASES, p. ej. (2.0, 3.0); None = GREEN_TIME en todas
+PHASE_GREEN_TIMES = None
+# Plan de fases: aproximaciones en verde por fase (src/models/fases.py).
+# None = (("N", "S"), ("E", "O")). P. ej. fases separadas por acceso:
+# (("N",), ("S",), ("E", "O")). Giros protegidos como "N.izq" solo en el
+# motor virtual y la estimación analítica.
+PHASE_PLAN = None
+
+# Control: "fixed" (tiempos fijos) o "actuated" (según colas y llegadas).
+# En accionado el verde dura entre MIN_GREEN y MAX_GREEN: termina antes
+# (gap-out) si los accesos en verde no tienen cola ni llegadas en GAP_TIME s,
+# y solo si hay alguien esperando en rojo; si no, el verde descansa hasta
+# MAX_GREEN (con o sin demanda, en MAX_GREEN la fase cambia).
+CONTROL_MODE = "fixed"
+MIN_GREEN = 1.0
+MAX_GREEN = 6.0
+GAP_TIME = 0.6
+
 # Probabilidad de llegada de vehículos por tick (0..1)
 ARRIVAL_PROB = 0.35
 
 # Tick de simulación (segundos)
-TICK = 0.2
\ No newline at end of file
+TICK = 0.2
+
+# Cómo despiertan los workers de hilos y procesos (src/concurrency/eventos.py):
+#   "tick"  -> cada TICK, haya o no algo que hacer
+#   "event" -> en la próxima llegada (sorteada por adelantado), en cada tick
+#              de descarga con verde y cola, y cuando cambia la fase
+# EVENT_HORIZON: segundos máximos de llegadas sorteadas por adelantado (y de sueño)
+WAKE_MODE = "tick"
+EVENT_HORIZON = 60.0
+
+# Flujo de saturación (vehículos/hora por carril) y carriles por acceso.
+# 18000 veh/h con TICK=0.2 equivale a 1 vehículo por tick (comportamiento original).
+LANES = 1
+SATURATION_FLOW = 18000.0
+
+# Capacidad por dirección de la cola (None = sin límite) y política al llenarse:
+#   "drop"  -> la llegada se descarta (cuenta en `rechazados`)
+#   "spill" -> la llegada se guarda en disco y vuelve a la cola al liberarse espacio;
+#              pasados SPILL_MAX_BYTES en disco se descarta (cuenta en `rechazados`)
+#   "block" -> la llegada espera aguas arriba (cuenta en `bloqueados`) hasta que haya lugar
+QUEUE_CAPACITY = None
+QUEUE_POLICY = "drop"
+SPILL_DIR = None  # None = directorio temporal del sistema
+SPILL_MAX_BYTES = 64 * 1024 * 1024  # por dirección, 16 bytes por vehículo; None = sin límite
+
+# Estadísticas recientes por dirección (src/models/ventanas.py): ventana
+# deslizante de WINDOW_SECONDS en WINDOW_BUCKETS cubetas, y los últimos
+# CYCLE_HISTORY ciclos del controlador
+WINDOW_SECONDS = 10.0
+WINDOW_BUCKETS = 10
+CYCLE_HISTORY = 8
+
+# Historia de snapshots de la GUI (src/history.py): (factor, capacidad) por
+# nivel. Con un snapshot cada 150 ms: 6 min en crudo, 1 h en cubetas de 3 s
+# y 24 h en cubetas de 1 min, en memoria fija
+HISTORY_LEVELS = ((1, 2400), (20, 1200), (20, 1440))
+
+# Caché de resultados (src/cache.py): directorio (None = .cache/results en
+# la raíz del repo) y tamaño máximo antes de expulsar las entradas menos usadas
+RESULT_CACHE_DIR = None
+RESULT_CACHE_MAX_MB = 256
+
+# Visor remoto (--serve / --attach): snapshots por socket local
+REMOTE_HOST = "127.0.0.1"
+# Clave HMAC de la conexión: --authkey o esta variable de entorno. Sin ninguna,
+# --serve (solo en loopback) genera una al azar por corrida y la imprime.
+REMOTE_AUTHKEY_ENV = "TRAFFIC_SIM_AUTHKEY"
+REMOTE_SNAPSHOT_INTERVAL = 0.1  # segundos mínimos entre snapshots tomados del simulador
+
+# Ejecución distribuida (src/experiments/distributed.py)
+DIST_AUTHKEY = b"traffic-sim-dist"  # pública: solo vale en loopback; otros hosts exigen --authkey
+DIST_HEARTBEAT = 1.0  # segundos entre latidos de un nodo ocioso
+DIST_TIMEOUT = 10.0  # sin noticias de un nodo en este tiempo -> se da por perdido
@@ -0,0 +1,413 @@
+"""Ejecución distribuida: un coordinador reparte unidades de trabajo entre nodos.
+
+Cada nodo (`worker`) escucha en un puerto TCP y ejecuta unidades en su propio
+pool de procesos; el coordinador se conecta a todos, les manda lotes y recibe
+los resultados también en lotes. La conexión es `multiprocessing.connection`
+con `authkey`: el handshake HMAC rechaza a quien no la conozca. Como los dos
+lados deserializan con pickle, la clave por defecto (pública) solo se acepta
+en loopback: con cualquier otro host hay que pasar `--authkey`.
+
+Protocolo (tuplas picklables):
+    coordinador -> nodo: ("lote", [unidad, ...])   ("fin",)
+    nodo -> coordinador: ("resultados", [(id, ok, valor), ...])   ("latido",)
+
+Una unidad es {"id", "tipo", "params"}; `tipo` elige la función de `TAREAS`.
+Si un nodo se cae o deja de latir, sus unidades en vuelo vuelven a la cola y
+las toma otro (hasta `reintentos` veces por unidad).
+
+Todo se puede probar en una sola máquina: `local` levanta N nodos en puertos
+de localhost que hacen de hosts remotos.
+
+Uso:
+    python -m src.experiments.distributed --authkey CLAVE worker --host 0.0.0.0 --port 7001 --slots 4
+    python -m src.experiments.distributed --authkey CLAVE sweep --nodes 127.0.0.1:7001 host2:7001
+    python -m src.experiments.distributed local --workers 3 --kill-one
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from ..cache import ResultCache, clave
+from ..concurrency.remote_impl import es_loopback
+from ..config import DIST_AUTHKEY, DIST_HEARTBEAT, DIST_TIMEOUT
+
+Unidad = Dict[str, Any]
+
+
+# ---------- Tareas ----------
+
+def _tarea_virtual(params: Dict[str, Any]) -> Dict[str, Any]:
+    from ..models.llegadas import FuenteBernoulli
+    from .virtual import simular
+    params = dict(params)
+    prob = params.pop("prob", None)
+    if prob is not None:
+        params["fuente"] = FuenteBernoulli(prob, seed=params.pop("seed", 0))
+    return simular(**params)
+
+
+def _tarea_evaluar(params: Dict[str, Any]) -> Any:
+    from .optimizer import evaluar
+    return evaluar(tuple(params["plan"]), params["cycles"], params["semillas"], params["prob"])
+
+
+def _tarea_replica(params: Dict[str, Any]) -> Dict[str, float]:
+    from .ensemble import correr_replica
+    return correr_replica(params.get("mode", "threads"), params["cycles"], params["seed"], params.get("overrides", {}))
+
+
+TAREAS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "virtual": _tarea_virtual,
+    "evaluar": _tarea_evaluar,
+    "replica": _tarea_replica,  # simulación real: necesita un proceso propio
+}
+_AISLADAS = {"replica"}
+
+
+def _ejecutar(tipo: str, params: Dict[str, Any]) -> Any:
+    return TAREAS[tipo](params)
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# ---------- Nodo ----------
+
+class Nodo:
+    """Atiende a un coordinador por vez y ejecuta sus unidades en `slots` procesos."""
+
+    def __init__(self, address: Tuple[str, int], slots: int | None = None, authkey: bytes = DIST_AUTHKEY,
+                 lote: int = 16, espera_lote: float = 0.2):
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self.slots = slots or os.cpu_count() or 1
+        self.lote = lote
+        self.espera_lote = espera_lote
+        self._pool = ProcessPoolExecutor(self.slots)
+        # las réplicas reales sobrescriben src.config: proceso nuevo por unidad
+        self._pool_aislado = ProcessPoolExecutor(
+            self.slots, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1
+        )
+
+    def servir(self) -> None:
+        print(f"[NODO] escuchando en {self.address[0]}:{self.address[1]} | slots={self.slots}", flush=True)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            while True:
+                try:
+                    conn = self.listener.accept()
+                except (OSError, EOFError, multiprocessing.AuthenticationError) as exc:
+                    print(f"[NODO] conexión rechazada: {exc!r}", flush=True)
+                    continue
+                self._atender(conn)
+        finally:
+            self.cerrar()
+
+    def cerrar(self) -> None:
+        self.listener.close()
+        for pool in (self._pool, self._pool_aislado):
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _atender(self, conn: Connection) -> None:
+        salida: "queue.Queue[Tuple[Any, bool, Any]]" = queue.Queue()
+        terminado = threading.Event()
+        emisor = threading.Thread(target=self._emitir, args=(conn, salida, terminado), name="Nodo-Emisor", daemon=True)
+        emisor.start()
+        try:
+            while True:
+                msg = conn.recv()
+                if msg[0] == "fin":
+                    break
+                for unidad in msg[1]:
+                    pool = self._pool_aislado if unidad["tipo"] in _AISLADAS else self._pool
+                    fut = pool.submit(_ejecutar, unidad["tipo"], unidad["params"])
+                    fut.add_done_callback(
+                        lambda f, uid=unidad["id"]: salida.put(
+                            (uid, False, repr(f.exception())) if f.exception() else (uid, True, f.result())
+                        )
+                    )
+        except (EOFError, OSError):
+            pass  # el coordinador se fue; lo que quede en vuelo lo reintenta otro
+        finally:
+            terminado.set()
+            emisor.join()
+            conn.close()
+
+    def _emitir(self, conn: Connection, salida: "queue.Queue", terminado: threading.Event) -> None:
+        # Único hilo que escribe en la conexión: resultados en lotes y latidos
+        ultimo = time.monotonic()
+        while not terminado.is_set():
+            lote = []
+            limite = time.monotonic() + self.espera_lote
+            while len(lote) < self.lote:
+                try:
+                    lote.append(salida.get(timeout=max(0.0, limite - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                if lote:
+                    conn.send(("resultados", lote))
+                    ultimo = time.monotonic()
+                elif time.monotonic() - ultimo >= DIST_HEARTBEAT:
+                    conn.send(("latido",))
+                    ultimo = time.monotonic()
+            except (OSError, ValueError):
+                return
+
+
+# ---------- Coordinador ----------
+
+class Coordinador:
+    """Reparte unidades entre nodos y devuelve los resultados a medida que llegan."""
+
+    def __init__(self, nodos: List[Tuple[str, int]], authkey: bytes = DIST_AUTHKEY, lote: int = 8,
+                 ventana: int = 16, reintentos: int = 3, timeout: float = DIST_TIMEOUT):
+        self.nodos = nodos
+        self.authkey = authkey
+        self.lote = lote
+        self.ventana = ventana  # unidades en vuelo por nodo
+        self.reintentos = reintentos
+        self.timeout = timeout
+        self.reintentadas = 0
+        self.por_nodo: Dict[str, int] = {}
+
+    def ejecutar(self, unidades: List[Unidad]) -> Iterator[Tuple[Any, bool, Any]]:
+        """Genera (id, ok, valor) en orden de llegada. Con ok=False, valor es el error."""
+        pendientes: "queue.Queue[Unidad]" = queue.Queue()
+        resultados: "queue.Queue[Tuple[Any, bool, Any]]" = queue.Queue()
+        intentos: Dict[Any, int] = {}
+        for u in unidades:
+            pendientes.put(u)
+        faltan = {u["id"] for u in unidades}
+        parar = threading.Event()
+        lock = threading.Lock()
+
+        def devolver(en_vuelo: Dict[Any, Unidad]) -> None:
+            # unidades de un nodo perdido: a la cola otra vez, o error si ya no quedan intentos
+            with lock:
+                for uid, u in en_vuelo.items():
+                    intentos[uid] = intentos.get(uid, 0) + 1
+                    if intentos[uid] > self.reintentos:
+                        resultados.put((uid, False, "sin más reintentos"))
+                    else:
+                        self.reintentadas += 1
+                        pendientes.put(u)
+            en_vuelo.clear()
+
+        hilos = [
+            threading.Thread(target=self._atender_nodo, args=(addr, pendientes, resultados, devolver, parar),
+                             name=f"Coord-{addr[0]}:{addr[1]}", daemon=True)
+            for addr in self.nodos
+        ]
+        for h in hilos:
+            h.start()
+        try:
+            while faltan:
+                try:
+                    uid, ok, valor = resultados.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(h.is_alive() for h in hilos):
+                        raise RuntimeError(f"no quedan nodos vivos; faltan {len(faltan)} unidades")
+                    continue
+                if uid in faltan:  # un reintento puede duplicar un resultado que ya llegó
+                    faltan.discard(uid)
+                    yield uid, ok, valor
+        finally:
+            parar.set()
+            for h in hilos:
+                h.join(timeout=self.timeout)
+
+    def _atender_nodo(self, addr: Tuple[str, int], pendientes: "queue.Queue", resultados: "queue.Queue",
+                      devolver: Callable[[Dict[Any, Unidad]], None], parar: threading.Event) -> None:
+        nombre = f"{addr[0]}:{addr[1]}"
+        en_vuelo: Dict[Any, Unidad] = {}
+        fallos = 0
+        while not parar.is_set() and fallos <= self.reintentos:
+            try:
+                conn = Client(addr, authkey=self.authkey)
+            except (OSError, EOFError) as exc:
+                fallos += 1
+                print(f"[COORD] {nombre}: no se pudo conectar ({exc!r}); intento {fallos}")
+                time.sleep(min(2.0 ** fallos, 10.0))
+                continue
+            except multiprocessing.AuthenticationError:
+                # reintentar no sirve: la clave no va a cambiar
+                print(f"[COORD] {nombre}: authkey rechazada, se descarta el nodo")
+                return
+            fallos = 0
+            try:
+                self._sesion(conn, nombre, en_vuelo, pendientes, resultados, parar)
+                return
+            except (EOFError, OSError, TimeoutError) as exc:
+                print(f"[COORD] {nombre}: nodo perdido ({exc!r}); reintentando {len(en_vuelo)} unidades")
+                devolver(en_vuelo)
+                fallos += 1
+            finally:
+                conn.close()
+        devolver(en_vuelo)
+
+    def _sesion(self, conn: Connection, nombre: str, en_vuelo: Dict[Any, Unidad], pendientes: "queue.Queue",
+                resultados: "queue.Queue", parar: threading.Event) -> None:
+        ultimo = time.monotonic()
+        while not parar.is_set():
+            lote = []
+            while len(en_vuelo) + len(lote) < self.ventana and len(lote) < self.lote:
+                try:
+                    lote.append(pendientes.get_nowait())
+                except queue.Empty:
+                    break
+            if lote:
+                for u in lote:
+                    en_vuelo[u["id"]] = u
+                conn.send(("lote", lote))
+            if conn.poll(0.1):
+                msg = conn.recv()
+                ultimo = time.monotonic()
+                if msg[0] == "resultados":
+                    for uid, ok, valor in msg[1]:
+                        en_vuelo.pop(uid, None)
+                        self.por_nodo[nombre] = self.por_nodo.get(nombre, 0) + 1
+                        resultados.put((uid, ok, valor))
+            elif en_vuelo and time.monotonic() - ultimo > self.timeout:
+                raise TimeoutError(f"sin latidos hace {self.timeout}s")
+        conn.send(("fin",))
+
+
+# ---------- CLI ----------
+
+def _barrido(prob_min: float, prob_max: float, pasos: int, semillas: int, cycles: int) -> List[Unidad]:
+    """Barrido de demanda x semillas en el motor virtual."""
+    unidades = []
+    for i in range(pasos):
+        prob = prob_min + (prob_max - prob_min) * i / max(1, pasos - 1)
+        for s in range(semillas):
+            unidades.append({"id": (round(prob, 4), s), "tipo": "virtual",
+                             "params": {"cycles": cycles, "prob": prob, "seed": s}})
+    return unidades
+
+
+def _correr_barrido(coord: Coordinador, unidades: List[Unidad], al_recibir: Callable[[int], None] | None = None,
+                    cache: ResultCache | None = None) -> None:
+    """Corre el barrido; las unidades que ya están en `cache` ni se envían a los nodos."""
+    t0 = time.perf_counter()
+    por_prob: Dict[float, List[float]] = {}
+    errores = 0
+    claves = {u["id"]: clave({"tarea": u["tipo"], **u["params"]}) for u in unidades}
+    enviar = []
+    for u in unidades:
+        entry = cache.get(claves[u["id"]]) if cache is not None else None
+        if entry is None:
+            enviar.append(u)
+        else:
+            por_prob.setdefault(u["id"][0], []).append(entry["result"]["espera_prom"])
+    params = {u["id"]: {"tarea": u["tipo"], **u["params"]} for u in enviar}
+    # todo en caché: ni siquiera hace falta conectarse a los nodos
+    recibidos = coord.ejecutar(enviar) if enviar else iter(())
+    for n, (uid, ok, valor) in enumerate(recibidos, 1):
+        if not ok:
+            errores += 1
+            print(f"[COORD] unidad {uid} falló: {valor}")
+        else:
+            por_prob.setdefault(uid[0], []).append(valor["espera_prom"])
+            if cache is not None:
+                cache.put(claves[uid], params[uid], valor)
+        if al_recibir is not None:
+            al_recibir(n)
+    print(
+        f"[COORD] {len(unidades)} unidades en {time.perf_counter() - t0:.1f}s | errores={errores} | "
+        f"reintentadas={coord.reintentadas} | por nodo={coord.por_nodo}"
+    )
+    if cache is not None:
+        print(cache.resumen())
+    for prob, esperas in sorted(por_prob.items()):
+        print(f"    prob={prob:.3f} | espera_prom={sum(esperas) / len(esperas):.2f}s ({len(esperas)} semillas)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coordinador/nodos para simulaciones distribuidas")
+    parser.add_argument("--authkey", default=None,
+                        help="Clave compartida (obligatoria fuera de loopback; en loopback, DIST_AUTHKEY)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    w = sub.add_parser("worker", help="Levantar un nodo")
+    w.add_argument("--host", default="127.0.0.1")
+    w.add_argument("--port", type=int, required=True)
+    w.add_argument("--slots", type=int, default=None)
+
+    for nombre in ("sweep", "local"):
+        p = sub.add_parser(nombre, help="Barrido de demanda en el motor virtual"
+                           + (" sobre nodos locales" if nombre == "local" else ""))
+        p.add_argument("--prob", type=float, nargs=2, default=(0.05, 0.4), metavar=("MIN", "MAX"))
+        p.add_argument("--steps", type=int, default=8)
+        p.add_argument("--seeds", type=int, default=8)
+        p.add_argument("--cycles", type=int, default=400)
+        p.add_argument("--no-cache", action="store_true", help="No usar la caché de resultados")
+        if nombre == "sweep":
+            p.add_argument("--nodes", nargs="+", required=True, metavar="HOST:PUERTO")
+        else:
+            p.add_argument("--workers", type=int, default=3)
+            p.add_argument("--base-port", type=int, default=7101)
+            p.add_argument("--slots", type=int, default=1)
+            p.add_argument("--kill-one", action="store_true", help="Matar un nodo a mitad de camino (prueba de reintentos)")
+    args = parser.parse_args()
+    authkey = args.authkey.encode() if args.authkey else DIST_AUTHKEY
+    # los nodos ejecutan lo que deserializan: con la clave pública, solo en esta máquina
+    if not args.authkey:
+        if args.cmd == "worker" and not es_loopback(args.host):
+            parser.error(f"worker --host {args.host} no es loopback: requiere --authkey")
+        if args.cmd == "sweep":
+            remotos = [n for n in args.nodes if not es_loopback(parse_address(n)[0])]
+            if remotos:
+                parser.error(f"nodos fuera de loopback ({', '.join(remotos)}): requiere --authkey")
+
+    if args.cmd == "worker":
+        Nodo((args.host, args.port), args.slots, authkey).servir()
+        return
+
+    unidades = _barrido(args.prob[0], args.prob[1], args.steps, args.seeds, args.cycles)
+    cache = ResultCache(enabled=not args.no_cache)
+    if args.cmd == "sweep":
+        _correr_barrido(Coordinador([parse_address(n) for n in args.nodes], authkey), unidades, cache=cache)
+        return
+
+    # "local": cada nodo es un proceso aparte en su puerto, como si fuera otro host
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    procs = []
+    for i in range(args.workers):
+        cmd = [sys.executable, "-m", "src.experiments.distributed", "worker",
+               "--port", str(args.base_port + i), "--slots", str(args.slots)]
+        if args.authkey:
+            cmd[3:3] = ["--authkey", args.authkey]
+        # sesión propia: matar el grupo se lleva también su pool, como un host que se apaga
+        procs.append(subprocess.Popen(cmd, env=env, start_new_session=True))
+    time.sleep(1.0)
+    nodos = [("127.0.0.1", args.base_port + i) for i in range(args.workers)]
+
+    def matar(n: int) -> None:
+        if args.kill_one and n == len(unidades) // 3 and procs[0].poll() is None:
+            print(f"[COORD] matando el nodo {nodos[0][0]}:{nodos[0][1]}")
+            os.killpg(procs[0].pid, signal.SIGKILL)
+
+    try:
+        _correr_barrido(Coordinador(nodos, authkey, timeout=5.0), unidades, matar, cache)
+    finally:
+        for p in procs:
+            if p.poll() is None:
+                p.terminate()
+                p.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
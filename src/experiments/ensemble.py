@@ -0,0 +1,272 @@
+"""Ensambles de réplicas independientes con intervalos de confianza y parada temprana.
+
+Cada réplica es una simulación completa (hilos o procesos) en un proceso
+nuevo del pool, con `src.config` sobrescrito antes de importar el backend.
+La réplica `i` usa la semilla `semilla + i`: al comparar dos configuraciones,
+ambas ven los mismos números aleatorios (números aleatorios comunes) y se
+estima la diferencia pareada, que tiene mucha menos varianza.
+
+Con `--cache` cada réplica terminada se guarda en la caché de resultados
+(`src/cache.py`), con la semilla y la config completa en la clave: repetir un
+ensamble, o ampliarlo con más réplicas, solo corre las que faltan. Es opt-in
+porque las réplicas son corridas en vivo: la misma semilla no da el mismo
+resultado, y una réplica guardada es una muestra vieja, no una nueva.
+
+Uso:
+    python -m src.experiments.ensemble --cycles 10 --precision 0.05
+    python -m src.experiments.ensemble --set GREEN_TIME=3 --compare GREEN_TIME=2
+"""
+import argparse
+import ast
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Dict, List, Tuple
+
+from ..cache import ResultCache, clave
+
+
+def _t_critico(confianza: float, gl: int) -> float:
+    """Cuantil bilateral de la t de Student (expansión de Cornish-Fisher, sin scipy)."""
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    if gl <= 0:
+        return math.inf
+    return (
+        z
+        + (z ** 3 + z) / (4 * gl)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * gl ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * gl ** 3)
+    )
+
+
+@dataclass
+class Estadistico:
+    """Media y varianza en línea (Welford)."""
+    n: int = 0
+    media: float = 0.0
+    m2: float = 0.0
+
+    def agregar(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+
+    def varianza(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else math.inf
+
+    def semiancho(self, confianza: float = 0.95) -> float:
+        if self.n < 2:
+            return math.inf
+        return _t_critico(confianza, self.n - 1) * math.sqrt(self.varianza() / self.n)
+
+
+@dataclass
+class ResultadoEnsamble:
+    replicas: int
+    estadisticos: Dict[str, Estadistico] = field(default_factory=dict)
+    convergio: bool = False
+    segundos: float = 0.0
+    confianza: float = 0.95
+    pareado: bool = False
+
+    def lineas(self) -> List[str]:
+        tipo = "diferencia A-B" if self.pareado else "media"
+        out = [
+            f"[ENSAMBLE] {self.replicas} réplicas | {self.segundos:.1f}s | "
+            f"{'convergió' if self.convergio else 'SIN converger'} | {tipo} ± IC{self.confianza:.0%}"
+        ]
+        for nombre, est in self.estadisticos.items():
+            out.append(f"    {nombre}: {est.media:.3f} ± {est.semiancho(self.confianza):.3f}")
+        return out
+
+
+def correr_replica(mode: str, cycles: int, semilla: int, overrides: Dict[str, Any]) -> Dict[str, float]:
+    """Una simulación completa sin GUI. Corre en un proceso recién creado del pool."""
+    import src.config as config
+    for nombre, valor in overrides.items():
+        if not hasattr(config, nombre):
+            raise ValueError(f"parámetro desconocido en src.config: {nombre}")
+        setattr(config, nombre, valor)
+    # los logs de cada tick de cada réplica solo serían ruido
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    from ..headless import create_simulation, resumir, run_headless
+    from ..models.llegadas import FuenteBernoulli
+    sim = create_simulation(mode, cycles, fuente=FuenteBernoulli(config.ARRIVAL_PROB, seed=semilla))
+    return resumir(run_headless(sim, poll=config.TICK))
+
+
+def _resuelto(est: Estadistico, precision: float, relativa: bool, confianza: float, pareado: bool) -> bool:
+    h = est.semiancho(confianza)
+    if pareado and abs(est.media) > h:
+        return True  # el IC de la diferencia ya excluye el 0: el signo está decidido
+    limite = precision * abs(est.media) if relativa and not pareado else precision
+    return h <= limite
+
+
+def correr_ensamble(
+    overrides: Dict[str, Any] | None = None,
+    comparar: Dict[str, Any] | None = None,
+    mode: str = "threads",
+    cycles: int = 10,
+    metricas: Tuple[str, ...] = ("total.espera_prom",),
+    precision: float = 0.05,
+    relativa: bool = True,
+    confianza: float = 0.95,
+    min_replicas: int = 3,
+    max_replicas: int = 50,
+    workers: int | None = None,
+    semilla: int = 0,
+    cache: ResultCache | None = None,
+) -> ResultadoEnsamble:
+    """Lanza réplicas hasta que el IC de cada métrica en `metricas` alcanza `precision`.
+
+    Sin `comparar` se estiman las medias (precisión relativa a la media por
+    defecto). Con `comparar` cada semilla corre en ambas configuraciones y se
+    estima A - B; ahí `precision` es absoluta, y también se para en cuanto el
+    IC excluye el 0. Se agregan todas las métricas por dirección de
+    `correr_replica`; `metricas` solo decide cuándo parar. Las réplicas que
+    ya están en `cache` no se corren.
+    """
+    overrides = overrides or {}
+    pareado = comparar is not None
+    variantes = [overrides, comparar] if pareado else [overrides]
+    workers = workers or os.cpu_count() or 1
+    resultado = ResultadoEnsamble(0, confianza=confianza, pareado=pareado)
+    t0 = time.perf_counter()
+
+    # proceso nuevo por réplica: la config sobrescrita no se filtra entre réplicas
+    ctx = multiprocessing.get_context("spawn")
+    pendientes: Dict[Future, Tuple[int, int]] = {}
+    claves: Dict[Future, Tuple[str, Dict[str, Any], float]] = {}
+    parciales: Dict[int, Dict[int, Dict[str, float]]] = {}
+    siguiente = 0
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, max_tasks_per_child=1)
+    try:
+
+        def lanzar() -> None:
+            nonlocal siguiente
+            while siguiente < max_replicas and len(pendientes) < workers:
+                for v, cfg in enumerate(variantes):
+                    params = {"tarea": "replica", "mode": mode, "cycles": cycles, "semilla": semilla + siguiente}
+                    key = clave(params, cfg)
+                    entry = cache.get(key) if cache is not None else None
+                    if entry is not None:
+                        fut: Future = Future()
+                        fut.set_result(entry["result"])
+                    else:
+                        fut = pool.submit(correr_replica, mode, cycles, semilla + siguiente, cfg)
+                        claves[fut] = (key, params, time.perf_counter())
+                    pendientes[fut] = (siguiente, v)
+                siguiente += 1
+
+        lanzar()
+        while pendientes:
+            listos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                rep, v = pendientes.pop(fut)
+                parciales.setdefault(rep, {})[v] = fut.result()
+                if fut in claves and cache is not None:
+                    key, params, t_lanzada = claves.pop(fut)
+                    cache.put(key, params, fut.result(), time.perf_counter() - t_lanzada)
+                if len(parciales[rep]) < len(variantes):
+                    continue
+                valores = parciales.pop(rep)
+                for nombre in valores[0]:
+                    x = valores[0][nombre] - (valores[1][nombre] if pareado else 0.0)
+                    resultado.estadisticos.setdefault(nombre, Estadistico()).agregar(x)
+                resultado.replicas += 1
+                print(
+                    f"[ENSAMBLE] réplica {resultado.replicas} (semilla {semilla + rep}) | "
+                    + " | ".join(
+                        f"{m}={resultado.estadisticos[m].media:.3f}±{resultado.estadisticos[m].semiancho(confianza):.3f}"
+                        for m in metricas
+                    )
+                )
+            if resultado.replicas >= min_replicas and all(
+                _resuelto(resultado.estadisticos[m], precision, relativa, confianza, pareado) for m in metricas
+            ):
+                resultado.convergio = True
+                break
+            lanzar()
+    finally:
+        # lo que no arrancó se cancela; lo que ya corre se deja terminar: matar
+        # una réplica de procesos a mitad dejaría huérfanos su Manager y workers
+        pool.shutdown(wait=True, cancel_futures=True)
+        if cache is not None:
+            # no cambian la respuesta, pero quedan para el próximo ensamble
+            for fut, (key, params, t_lanzada) in claves.items():
+                if fut.done() and not fut.cancelled() and fut.exception() is None:
+                    cache.put(key, params, fut.result(), time.perf_counter() - t_lanzada)
+    resultado.segundos = time.perf_counter() - t0
+    return resultado
+
+
+def _parse_overrides(items: List[str]) -> Dict[str, Any]:
+    """NOMBRE=VALOR -> {NOMBRE: valor}. VALOR es un literal de Python (0.3, None, 2,3, (("N",), ("S",)))
+    o, si no lo es, un texto (CONTROL_MODE=actuated)."""
+    out: Dict[str, Any] = {}
+    for item in items or []:
+        nombre, _, valor = item.partition("=")
+        try:
+            out[nombre] = ast.literal_eval(valor)
+        except (ValueError, SyntaxError):
+            out[nombre] = valor
+    # los que el código indexa por fase tienen que ser tuplas
+    if out.get("PHASE_PLAN") is not None:
+        out["PHASE_PLAN"] = tuple(tuple([f] if isinstance(f, str) else f) for f in out["PHASE_PLAN"])
+    verdes = out.get("PHASE_GREEN_TIMES")
+    if isinstance(verdes, (int, float)):
+        # un solo número: el mismo verde en todas las fases del plan
+        from ..models.fases import PLAN, PlanFases
+        plan = PlanFases(out["PHASE_PLAN"]) if out.get("PHASE_PLAN") is not None else PLAN
+        out["PHASE_GREEN_TIMES"] = (float(verdes),) * len(plan)
+    elif verdes is not None:
+        out["PHASE_GREEN_TIMES"] = tuple(float(v) for v in verdes)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ensamble de réplicas con parada por precisión")
+    parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--set", nargs="*", default=[], metavar="NOMBRE=VALOR",
+                        help="Parámetros de src.config para la configuración A")
+    parser.add_argument("--compare", nargs="*", default=None, metavar="NOMBRE=VALOR",
+                        help="Configuración B: estima A - B con números aleatorios comunes")
+    parser.add_argument("--metric", nargs="*", default=["total.espera_prom"],
+                        help="Métricas que deciden la parada (p. ej. N.espera_prom total.cruzaron)")
+    parser.add_argument("--precision", type=float, default=0.05,
+                        help="Semiancho objetivo (relativo a la media; absoluto con --compare o --absolute)")
+    parser.add_argument("--absolute", action="store_true")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--min-replicas", type=int, default=3)
+    parser.add_argument("--max-replicas", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true",
+                        help="Reusar réplicas guardadas (misma semilla y config) y guardar las nuevas")
+    args = parser.parse_args()
+
+    cache = ResultCache(enabled=args.cache)
+    comparar = None
+    if args.compare is not None:
+        # B hereda lo de A salvo lo que se cambie explícitamente
+        comparar = {**_parse_overrides(args.set), **_parse_overrides(args.compare)}
+    res = correr_ensamble(
+        _parse_overrides(args.set), comparar, args.mode, args.cycles, tuple(args.metric),
+        args.precision, not args.absolute, args.confidence, args.min_replicas, args.max_replicas,
+        args.workers, args.seed, cache,
+    )
+    print("\n".join(res.lineas()))
+    print(cache.resumen())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Optimización de tiempos de semáforo sobre el motor en tiempo virtual.
+
+Busca el verde de cada fase de `FASES` (y opcionalmente el amarillo) que
+minimiza la espera media o el p95, con evolución diferencial: una población
+de planes que se recombina generación a generación, evaluada en paralelo en
+todos los núcleos. Los planes se redondean al tick (el controlador no
+distingue duraciones más finas), así que el espacio es discreto y una caché
+por plan garantiza que ninguno se simule dos veces; con `--cache` la caché
+persiste entre corridas. Además cada evaluación se busca y se guarda en la
+caché de resultados compartida (`src/cache.py`, `--no-cache` la evita), que
+sabe de config y versión del código: sirve entre búsquedas con otros rangos.
+
+Todos los planes se evalúan con las mismas semillas (números aleatorios
+comunes), así las diferencias entre planes no son ruido de las llegadas.
+
+Uso:
+    python -m src.experiments.optimizer --budget 60 --objective p95
+    python -m src.experiments.optimizer --green-range 1 8 --yellow-range 0.6 1.2
+
+Este modelo es una sola intersección: no hay desfases entre semáforos que buscar.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from ..cache import ResultCache, clave
+from ..config import ARRIVAL_PROB, TICK, YELLOW_TIME
+from ..models.controlador import FASES
+from ..models.llegadas import FuenteBernoulli
+
+OBJETIVOS = ("media", "p95")
+
+Plan = Tuple[float, ...]  # verde por fase + amarillo
+
+
+@dataclass
+class Evaluacion:
+    plan: Plan
+    media: float
+    p95: float
+    cola_final: float
+
+    def objetivo(self, cual: str) -> float:
+        return self.p95 if cual == "p95" else self.media
+
+
+def evaluar(plan: Plan, cycles: int, semillas: Sequence[int], prob: float) -> Evaluacion:
+    """Promedio del plan sobre las semillas (corre en un proceso del pool)."""
+    from .virtual import simular
+    *verdes, amarillo = plan
+    res = [simular(cycles, verdes, amarillo, fuente=FuenteBernoulli(prob, seed=s)) for s in semillas]
+    n = len(res)
+    return Evaluacion(
+        plan,
+        sum(r["espera_prom"] for r in res) / n,
+        sum(r["espera_p95"] for r in res) / n,
+        sum(r["cola_final"] for r in res) / n,
+    )
+
+
+def _redondear(x: float, lo: float, hi: float, tick: float) -> float:
+    x = min(max(x, lo), hi)
+    return round(round(x / tick) * tick, 6)
+
+
+class Optimizador:
+    """Evolución diferencial (DE/rand/1/bin) con caché por plan."""
+
+    def __init__(
+        self,
+        green_range: Tuple[float, float] = (1.0, 6.0),
+        yellow_range: Tuple[float, float] = (YELLOW_TIME, YELLOW_TIME),
+        objetivo: str = "media",
+        cycles: int = 200,
+        semillas: Sequence[int] = (0, 1, 2),
+        prob: float = ARRIVAL_PROB,
+        poblacion: int | None = None,
+        workers: int | None = None,
+        cache_path: str | Path | None = None,
+        seed: int = 0,
+        tick: float = TICK,
+        result_cache: ResultCache | None = None,
+    ):
+        if objetivo not in OBJETIVOS:
+            raise ValueError(f"objetivo desconocido: {objetivo}")
+        self.limites = [green_range] * len(FASES) + [yellow_range]
+        self.objetivo = objetivo
+        self.cycles = cycles
+        self.semillas = tuple(semillas)
+        self.prob = prob
+        self.workers = workers or os.cpu_count() or 1
+        self.n = poblacion or max(8, 4 * len(self.limites))
+        self.tick = tick
+        self.rng = random.Random(seed)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cache: Dict[str, Evaluacion] = {}
+        self.result_cache = result_cache
+        self.evaluados = 0
+        self.aciertos = 0
+        self.historia: List[Tuple[int, float, float, int]] = []  # (generación, mejor, dispersión, evaluaciones)
+        self._cargar_cache()
+
+    # ---------- caché ----------
+
+    def _clave(self, plan: Plan) -> str:
+        # el plan y todo lo que cambia su resultado
+        return json.dumps([plan, self.cycles, self.semillas, self.prob, self.tick])
+
+    def _cargar_cache(self) -> None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        for clave, (plan, media, p95, cola) in json.loads(self.cache_path.read_text()).items():
+            self.cache[clave] = Evaluacion(tuple(plan), media, p95, cola)
+
+    def _guardar_cache(self) -> None:
+        if self.cache_path is None:
+            return
+        datos = {k: [list(e.plan), e.media, e.p95, e.cola_final] for k, e in self.cache.items()}
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        tmp.write_text(json.dumps(datos))
+        tmp.replace(self.cache_path)
+
+    def _params(self, plan: Plan) -> Dict:
+        return {"tarea": "evaluar", "plan": list(plan), "cycles": self.cycles,
+                "semillas": list(self.semillas), "prob": self.prob}
+
+    def _evaluar_lote(self, pool: ProcessPoolExecutor, planes: List[Plan]) -> List[Evaluacion]:
+        nuevos = []
+        for plan in dict.fromkeys(planes):
+            if self._clave(plan) in self.cache:
+                self.aciertos += 1
+                continue
+            entry = self.result_cache.get(clave(self._params(plan))) if self.result_cache is not None else None
+            if entry is not None:
+                r = entry["result"]
+                self.cache[self._clave(plan)] = Evaluacion(plan, r["media"], r["p95"], r["cola_final"])
+                self.aciertos += 1
+            else:
+                nuevos.append(plan)
+        t0 = time.perf_counter()
+        futuros = [pool.submit(evaluar, p, self.cycles, self.semillas, self.prob) for p in nuevos]
+        for plan, fut in zip(nuevos, futuros):
+            self.cache[self._clave(plan)] = fut.result()
+            self.evaluados += 1
+        if self.result_cache is not None and nuevos:
+            # el lote corre en paralelo: cada plan se lleva su parte del tiempo
+            segundos = (time.perf_counter() - t0) * min(self.workers, len(nuevos)) / len(nuevos)
+            for plan in nuevos:
+                e = self.cache[self._clave(plan)]
+                self.result_cache.put(clave(self._params(plan)), self._params(plan), asdict(e), segundos)
+        return [self.cache[self._clave(p)] for p in planes]
+
+    # ---------- búsqueda ----------
+
+    def _aleatorio(self) -> Plan:
+        return tuple(_redondear(self.rng.uniform(lo, hi), lo, hi, self.tick) for lo, hi in self.limites)
+
+    def _mutante(self, poblacion: List[Plan], i: int, f: float = 0.7, cr: float = 0.8) -> Plan:
+        a, b, c = self.rng.sample([p for j, p in enumerate(poblacion) if j != i], 3)
+        forzado = self.rng.randrange(len(self.limites))
+        hijo = []
+        for k, (lo, hi) in enumerate(self.limites):
+            if k == forzado or self.rng.random() < cr:
+                hijo.append(_redondear(a[k] + f * (b[k] - c[k]), lo, hi, self.tick))
+            else:
+                hijo.append(poblacion[i][k])
+        return tuple(hijo)
+
+    def optimizar(self, budget: float = 60.0, paciencia: int = 8, tol: float = 1e-3) -> List[Evaluacion]:
+        """Busca hasta agotar `budget` segundos o converger. Devuelve los planes evaluados, mejor primero.
+
+        Converge cuando el mejor no mejora más de `tol` (relativo) en
+        `paciencia` generaciones, o cuando toda la población es el mismo plan.
+        """
+        t0 = time.perf_counter()
+        self.convergio = False
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            poblacion = [self._aleatorio() for _ in range(self.n)]
+            puntajes = [e.objetivo(self.objetivo) for e in self._evaluar_lote(pool, poblacion)]
+            gen = 0
+            sin_mejora = 0
+            mejor = min(puntajes)
+            while time.perf_counter() - t0 < budget:
+                gen += 1
+                hijos = [self._mutante(poblacion, i) for i in range(self.n)]
+                for i, e in enumerate(self._evaluar_lote(pool, hijos)):
+                    if e.objetivo(self.objetivo) <= puntajes[i]:
+                        poblacion[i], puntajes[i] = hijos[i], e.objetivo(self.objetivo)
+                nuevo = min(puntajes)
+                sin_mejora = sin_mejora + 1 if nuevo > mejor * (1 - tol) else 0
+                mejor = min(mejor, nuevo)
+                dispersion = max(puntajes) - min(puntajes)
+                self.historia.append((gen, mejor, dispersion, self.evaluados))
+                print(
+                    f"[OPTIM] gen {gen} | mejor {self.objetivo}={mejor:.3f}s | dispersión={dispersion:.3f} | "
+                    f"evaluados={self.evaluados} | caché={self.aciertos} | {time.perf_counter() - t0:.1f}s"
+                )
+                if sin_mejora >= paciencia or len(set(poblacion)) == 1:
+                    self.convergio = True
+                    break
+        self._guardar_cache()
+        self.segundos = time.perf_counter() - t0
+        # la caché en disco puede traer planes evaluados con otros ajustes
+        propios = [e for k, e in self.cache.items() if k == self._clave(e.plan)]
+        return sorted(propios, key=lambda e: e.objetivo(self.objetivo))
+
+
+def formatear_plan(plan: Plan) -> str:
+    *verdes, amarillo = plan
+    return f"verdes={tuple(verdes)} amarillo={amarillo}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimizador de tiempos de semáforo")
+    parser.add_argument("--budget", type=float, default=60.0, help="Segundos de reloj disponibles")
+    parser.add_argument("--objective", choices=OBJETIVOS, default="media")
+    parser.add_argument("--green-range", type=float, nargs=2, default=(1.0, 6.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--yellow-range", type=float, nargs=2, default=(YELLOW_TIME, YELLOW_TIME),
+                        metavar=("MIN", "MAX"), help="Por defecto fijo en YELLOW_TIME (es un margen de seguridad)")
+    parser.add_argument("--prob", type=float, default=ARRIVAL_PROB)
+    parser.add_argument("--cycles", type=int, default=200, help="Cambios de fase por evaluación")
+    parser.add_argument("--seeds", type=int, default=3, help="Semillas comunes por plan")
+    parser.add_argument("--population", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=None, help="Archivo JSON para reutilizar evaluaciones")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de resultados compartida")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    opt = Optimizador(
+        tuple(args.green_range), tuple(args.yellow_range), args.objective, args.cycles,
+        range(args.seeds), args.prob, args.population, args.workers, args.cache,
+        result_cache=ResultCache(enabled=not args.no_cache),
+    )
+    ranking = opt.optimizar(args.budget)
+    print(
+        f"[OPTIM] {'convergió' if opt.convergio else 'presupuesto agotado'} en {opt.segundos:.1f}s | "
+        f"{opt.evaluados} planes simulados | {opt.aciertos} aciertos de caché"
+    )
+    print(opt.result_cache.resumen())
+    for e in ranking[:args.top]:
+        print(f"    {formatear_plan(e.plan)} | media={e.media:.2f}s | p95={e.p95:.2f}s | cola_final={e.cola_final:.1f}")
+    *verdes, amarillo = ranking[0].plan
+    print(
+        "[OPTIM] Confirmar en el backend real: python -m src.experiments.ensemble "
+        f"--set PHASE_GREEN_TIMES={','.join(map(str, verdes))} YELLOW_TIME={amarillo} ARRIVAL_PROB={args.prob}"
+    )
+
+
+if __name__ == "__main__":
+    main()
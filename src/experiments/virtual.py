@@ -0,0 +1,122 @@
+"""Motor en tiempo virtual: la misma simulación, sin dormir entre ticks.
+
+Reutiliza `Semaforo` y `ControladorTrafico` tal cual (ambos reciben `now`
+explícito) y recorre los ticks en un bucle: en cada uno primero decide el
+controlador y después cada dirección recibe llegadas y descarga, igual que los
+workers de los backends reales. Cientos de ciclos tardan milisegundos, así que
+sirve para búsquedas y barridos; los resultados finales conviene confirmarlos
+con `src.experiments.ensemble` sobre el backend real.
+"""
+import math
+from collections import Counter
+from typing import Any, Dict, Sequence
+
+from ..config import ARRIVAL_PROB, CONTROL_MODE, LANES, SATURATION_FLOW, TICK, YELLOW_TIME
+from ..models.controlador import ControladorTrafico
+from ..models.fases import PLAN, PlanFases
+from ..models.llegadas import FuenteBernoulli, FuenteLlegadas
+from ..models.semaforo import Semaforo
+from ..models.vehiculo import Vehiculo
+
+class _Esperas:
+    """Sink que cuenta esperas en múltiplos de tick (en tiempo virtual son exactas)."""
+
+    def __init__(self, tick: float):
+        self.tick = tick
+        self.cuentas: Counter = Counter()
+
+    def registrar(self, lote: list, t_salida: float, ciclo: int, origen: str) -> None:
+        for v in lote:
+            self.cuentas[round((t_salida - v.t_llegada) / self.tick)] += 1
+
+
+def _percentil(cuentas: Counter, q: float, tick: float) -> float:
+    total = sum(cuentas.values())
+    if total == 0:
+        return 0.0
+    objetivo = math.ceil(q * total)
+    acumulado = 0
+    for k in sorted(cuentas):
+        acumulado += cuentas[k]
+        if acumulado >= objetivo:
+            return k * tick
+    return max(cuentas) * tick
+
+
+def simular(
+    cycles: int = 10,
+    verdes: Sequence[float] | None = None,
+    amarillo: float = YELLOW_TIME,
+    tick: float = TICK,
+    fuente: FuenteLlegadas | None = None,
+    seed: int | None = 0,
+    lanes: int = LANES,
+    flow: float = SATURATION_FLOW,
+    control: str = CONTROL_MODE,
+    plan: PlanFases = PLAN,
+) -> Dict[str, Any]:
+    """Corre `cycles` cambios de fase en tiempo virtual y devuelve las métricas.
+
+    `verdes` es el verde de cada fase de `FASES` (por defecto el del
+    controlador: PHASE_GREEN_TIMES o GREEN_TIME). Los vehículos que siguen en
+    cola al terminar cuentan con la espera acumulada hasta ese momento, para
+    no premiar planes que dejan cola. Con `control="actuated"` `verdes`
+    no se usa: mandan MIN_GREEN, MAX_GREEN y GAP_TIME. `plan` puede tener
+    cualquier aproximación (p. ej. giros protegidos), cada una con su cola.
+    """
+    fuente = fuente if fuente is not None else FuenteBernoulli(ARRIVAL_PROB, seed=seed)
+    dirs = plan.aproximaciones
+    semaforos = {d: Semaforo(d, carriles=lanes, flujo_saturacion=flow) for d in dirs}
+    lectores = {d: fuente.abrir(d) for d in dirs}
+    ctrl = ControladorTrafico(modo=control, plan=plan)
+    if verdes is not None:
+        ctrl = ControladorTrafico(verdes=tuple(verdes), modo=control, plan=plan)
+    t_ultima = dict.fromkeys(dirs, 0.0)
+    sensor = lambda d: (len(semaforos[d].cola), t_ultima[d])
+    esperas = _Esperas(tick)
+    veh_id = 0
+
+    k = 0
+    ctrl.aplicar_fase(semaforos, 0.0)
+    while ctrl.ciclo < cycles:
+        now = k * tick
+        # controlador: mismo criterio que los backends (se duerme de a un tick)
+        if not ctrl.en_amarillo and ctrl.fin_de_verde(now, sensor):
+            ctrl.poner_amarillo(semaforos, now)
+        elif ctrl.en_amarillo and now - ctrl.t_fase >= amarillo - 1e-9:
+            ctrl.siguiente_fase()
+            ctrl.aplicar_fase(semaforos, now)
+        for d in dirs:
+            sem = semaforos[d]
+            llegadas = lectores[d].llegadas(now)
+            if llegadas:
+                t_ultima[d] = now
+            for _ in range(sem.admitir(llegadas)):
+                veh_id += 1
+                sem.creados += 1
+                sem.enqueue(Vehiculo(veh_id, d, now))
+            sem.muestrear(now, llegadas)
+            sem.avanzar_n(now, sem.capacidad(tick), esperas)
+        k += 1
+
+    t_fin = k * tick
+    pendientes = Counter()
+    for sem in semaforos.values():
+        for v in sem.cola:
+            pendientes[round((t_fin - v.t_llegada) / tick)] += 1
+    todas = esperas.cuentas + pendientes
+    total = sum(todas.values())
+    return {
+        "t_virtual": t_fin,
+        "ticks": k,
+        "cruzaron": sum(s.cruzaron for s in semaforos.values()),
+        "cola_final": sum(len(s.cola) for s in semaforos.values()),
+        "espera_prom": sum(w * n for w, n in todas.items()) * tick / total if total else 0.0,
+        "espera_p95": _percentil(todas, 0.95, tick),
+        "gap_outs": ctrl.gap_outs,
+        "max_outs": ctrl.max_outs,
+        "semaforos": {
+            d: {"cruzaron": s.cruzaron, "cola": len(s.cola), "espera_prom": round(s.espera_promedio(), 2)}
+            for d, s in semaforos.items()
+        },
+    }
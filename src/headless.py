@@ -0,0 +1,70 @@
+import time
+from typing import Any, Callable, Dict
+
+from .concurrency.base import BaseSimulation
+
+DIRS = ["N", "S", "E", "O"]
+
+# opciones que solo entienden algunos backends; las demás valen para todos
+MODE_OPTIONS = {
+    "intersections": ("pool",), "workers": ("pool",),
+    "wake": ("threads", "processes"), "resume": ("threads", "processes"),
+}
+
+
+def options_for(mode: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Las `options` que acepta el backend `mode` (la GUI y la comparación las comparten entre modos)."""
+    return {k: v for k, v in options.items() if mode in MODE_OPTIONS.get(k, (mode,))}
+
+
+def create_simulation(mode: str, cycles: int, **options: Any) -> BaseSimulation:
+    selected = (mode or "threads").lower()
+    if selected == "remote":
+        from .concurrency.remote_impl import RemoteSimulation
+        return RemoteSimulation(cycles=cycles, **options)
+    if selected == "pool":
+        from .concurrency.pool_impl import PoolSimulation
+        return PoolSimulation(cycles=cycles, **options)
+    if selected == "processes":
+        from .concurrency.processes_impl import ProcessesSimulation
+        return ProcessesSimulation(cycles=cycles, **options)
+    from .concurrency.threads_impl import ThreadsSimulation
+    return ThreadsSimulation(cycles=cycles, **options)
+
+
+def run_headless(sim: BaseSimulation, poll: float = 0.5,
+                 before_stop: Callable[[], Any] | None = None) -> Dict[str, Any]:
+    """Corre la simulación sin GUI hasta completar los ciclos (o Ctrl+C). Devuelve el último snapshot.
+
+    `before_stop` se llama con la simulación aún viva (p. ej. el checkpoint final).
+    """
+    snap: Dict[str, Any] = {}
+    sim.start()
+    try:
+        while True:
+            snap = sim.get_snapshot()
+            if snap.get("total_time") is not None:
+                break
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        print("\n[INFO] Interrumpido: deteniendo simulación...")
+    finally:
+        if before_stop is not None:
+            before_stop()
+        sim.stop()
+    return snap
+
+
+def resumir(snap: Dict[str, Any]) -> Dict[str, float]:
+    """Métricas finales de un snapshot: por dirección y totales (espera ponderada por cruces)."""
+    sems = snap["semaforos"]
+    valores: Dict[str, float] = {}
+    for d in DIRS:
+        valores[f"{d}.espera_prom"] = sems[d]["espera_prom"]
+        valores[f"{d}.cruzaron"] = sems[d]["cruzaron"]
+    total = sum(sems[d]["cruzaron"] for d in DIRS)
+    valores["total.cruzaron"] = total
+    valores["total.espera_prom"] = (
+        sum(sems[d]["espera_prom"] * sems[d]["cruzaron"] for d in DIRS) / total if total else 0.0
+    )
+    return valores
@@ -0,0 +1,136 @@
+"""Historia de snapshots en memoria fija, a varias resoluciones.
+
+El nivel 0 guarda cada muestra tal cual; cada nivel siguiente agrupa
+`factor` muestras del anterior en min/media/máx. Todos son anillos de
+arreglos preasignados (`array('d')`), así que la memoria no depende de
+cuánto dure la corrida: con los niveles por defecto hay minutos en crudo y
+horas resumidas. Registrar cuesta O(niveles x series).
+"""
+from array import array
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .config import HISTORY_LEVELS
+
+DIRS = ["N", "S", "E", "O"]
+FIELDS = ["cola", "cruzaron", "espera_prom"]
+SERIES = [f"{d}.{f}" for d in DIRS for f in FIELDS]
+STATS = ("min", "mean", "max")
+
+
+class _Level:
+    def __init__(self, factor: int, capacity: int, n_series: int, raw: bool = False):
+        self.factor = factor
+        self.raw = raw
+        self.capacity = capacity
+        self.n = n_series
+        self.count = 0  # muestras escritas en total (no solo las retenidas)
+        self.t = array("d", bytes(8 * capacity))
+        if raw:
+            # en crudo min = media = máx: un solo arreglo
+            uno = array("d", bytes(8 * capacity * n_series))
+            self.data = dict.fromkeys(STATS, uno)
+        else:
+            self.data = {s: array("d", bytes(8 * capacity * n_series)) for s in STATS}
+        # lo acumulado para la próxima muestra de este nivel
+        self.pend_n = 0
+        self.pend_t = 0.0
+        self.pend_min = [0.0] * n_series
+        self.pend_sum = [0.0] * n_series
+        self.pend_max = [0.0] * n_series
+
+    def push(self, t: float, mins: Sequence[float], means: Sequence[float], maxs: Sequence[float]) -> None:
+        slot = self.count % self.capacity
+        self.t[slot] = t
+        base = slot * self.n
+        if self.raw:
+            self.data["mean"][base:base + self.n] = array("d", means)
+            self.count += 1
+            return
+        self.data["min"][base:base + self.n] = array("d", mins)
+        self.data["mean"][base:base + self.n] = array("d", means)
+        self.data["max"][base:base + self.n] = array("d", maxs)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+
+class SnapshotHistory:
+    def __init__(self, series: Sequence[str] = SERIES,
+                 levels: Sequence[Tuple[int, int]] = HISTORY_LEVELS):
+        """`levels`: (factor respecto del nivel anterior, capacidad) por nivel; el primero es crudo."""
+        self.series = list(series)
+        self.index = {name: i for i, name in enumerate(self.series)}
+        self.level_spec = list(levels)
+        self.clear()
+
+    def clear(self) -> None:
+        self.levels = [_Level(f, c, len(self.series), raw=(k == 0)) for k, (f, c) in enumerate(self.level_spec)]
+
+    def record(self, t: float, values: Sequence[float]) -> None:
+        mins = maxs = means = values
+        for k, level in enumerate(self.levels):
+            if k == 0:
+                level.push(t, values, values, values)
+                continue
+            # el nivel k recibe cada muestra que se cerró en el nivel k-1
+            if level.pend_n == 0:
+                level.pend_t = t
+                level.pend_min[:] = mins
+                level.pend_sum[:] = means
+                level.pend_max[:] = maxs
+            else:
+                for i in range(level.n):
+                    if mins[i] < level.pend_min[i]:
+                        level.pend_min[i] = mins[i]
+                    if maxs[i] > level.pend_max[i]:
+                        level.pend_max[i] = maxs[i]
+                    level.pend_sum[i] += means[i]
+            level.pend_n += 1
+            if level.pend_n < level.factor:
+                return
+            n = level.pend_n
+            mins, means, maxs = list(level.pend_min), [s / n for s in level.pend_sum], list(level.pend_max)
+            level.push(level.pend_t, mins, means, maxs)
+            level.pend_n = 0
+
+    def record_snapshot(self, t: float, snap: Dict[str, Any]) -> None:
+        sems = snap["semaforos"]
+        values = []
+        for name in self.series:
+            d, f = name.split(".", 1)
+            values.append(float(sems[d].get(f, 0.0)))
+        self.record(t, values)
+
+    def pick_level(self, max_points: int) -> int:
+        """El nivel más grueso con al menos `max_points` / 2 muestras (si no, el crudo).
+
+        Así el gráfico muestra entre la mitad y el total de `max_points`
+        puntos y abarca cada vez más tiempo a medida que avanza la corrida.
+        """
+        for k in range(len(self.levels) - 1, 0, -1):
+            if len(self.levels[k]) >= max_points // 2:
+                return k
+        return 0
+
+    def points(self, name: str, level: int = 0, last: int | None = None,
+               stat: str = "mean") -> Tuple[List[float], List[float]]:
+        """(tiempos, valores) de una serie en un nivel, de la más vieja a la más nueva."""
+        lv = self.levels[level]
+        i = self.index[name]
+        n = len(lv) if last is None else min(last, len(lv))
+        data = lv.data[stat]
+        ts: List[float] = []
+        vs: List[float] = []
+        for c in range(lv.count - n, lv.count):
+            slot = c % lv.capacity
+            ts.append(lv.t[slot])
+            vs.append(data[slot * lv.n + i])
+        return ts, vs
+
+    def memory_bytes(self) -> int:
+        total = 0
+        for lv in self.levels:
+            arrays = {id(a): a for a in lv.data.values()}  # en crudo las tres stats comparten arreglo
+            total += lv.t.itemsize * len(lv.t) + sum(a.itemsize * len(a) for a in arrays.values())
+        return total
@@ -0,0 +1,327 @@
+"""Métricas en vivo de la simulación, en formato de texto de Prometheus.
+
+Los contadores viven en un arreglo plano de doubles: una lista en modo hilos y
+un `RawArray` compartido en modo procesos. Cada casilla tiene un solo escritor
+(su worker), así que ni escribir ni leer necesita el lock de la simulación.
+"""
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Tuple
+
+DIRS = ["N", "S", "E", "O"]
+WORKERS = [f"Semaforo-{d}" for d in DIRS] + ["Controlador", "MainProcess"]
+
+# Límites superiores (segundos) del histograma de espera
+WAIT_BUCKETS = [0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0, 120.0]
+QUANTILES = [0.5, 0.9, 0.99]
+
+# period_*: intervalo entre ticks consecutivos (solo workers de semáforo), para el jitter
+_WORKER_FIELDS = ["ticks", "lock_wait", "ipc", "period_sum", "period_sq"]
+_DIR_FIELDS = ["cola", "cruzaron", "rechazados", "wait_sum"] + [f"b{i}" for i in range(len(WAIT_BUCKETS) + 1)]
+_GLOBAL_FIELDS = ["snapshots", "snapshot_sum", "snapshot_last"]
+
+
+def _layout() -> Dict[str, int]:
+    slots: Dict[str, int] = {}
+    for w in WORKERS:
+        for f in _WORKER_FIELDS:
+            slots[f"{w}:{f}"] = len(slots)
+    for d in DIRS:
+        for f in _DIR_FIELDS:
+            slots[f"{d}:{f}"] = len(slots)
+    for f in _GLOBAL_FIELDS:
+        slots[f] = len(slots)
+    return slots
+
+
+SLOTS = _layout()
+
+
+class SimMetrics:
+    """Contadores de una simulación. `shared=True` para cruzar procesos."""
+
+    def __init__(self, shared: bool = False):
+        n = len(SLOTS)
+        if shared:
+            import multiprocessing  # solo el backend de procesos lo necesita
+            self.values: Any = multiprocessing.RawArray("d", n)
+        else:
+            self.values = [0.0] * n
+
+    def slot(self, name: str) -> int:
+        return SLOTS[name]
+
+    def add(self, slot: int, value: float = 1.0) -> None:
+        self.values[slot] += value
+
+    def set(self, slot: int, value: float) -> None:
+        self.values[slot] = value
+
+    def read(self) -> List[float]:
+        # copia sin lock: puede mezclar valores de ticks vecinos, nunca bloquea
+        return list(self.values)
+
+    def observe_snapshot(self, seconds: float) -> None:
+        # el "tick" del proceso principal es cada consulta de snapshot
+        self.values[SLOTS["MainProcess:ticks"]] += 1
+        self.values[SLOTS["snapshots"]] += 1
+        self.values[SLOTS["snapshot_sum"]] += seconds
+        self.values[SLOTS["snapshot_last"]] = seconds
+
+
+class WorkerMetrics:
+    """Casillas precalculadas de un worker, para no buscar nombres en cada tick."""
+
+    def __init__(self, metrics: SimMetrics, worker: str, direccion: str | None = None):
+        self.values = metrics.values
+        self.ticks = SLOTS[f"{worker}:ticks"]
+        self.lock_wait = SLOTS[f"{worker}:lock_wait"]
+        self.ipc = SLOTS[f"{worker}:ipc"]
+        self.period_sum = SLOTS[f"{worker}:period_sum"]
+        self.period_sq = SLOTS[f"{worker}:period_sq"]
+        self._t_prev: float | None = None
+        self._periodico = direccion is not None  # el controlador no tickea a ritmo fijo
+        if direccion is not None:
+            self.cola = SLOTS[f"{direccion}:cola"]
+            self.cruzaron = SLOTS[f"{direccion}:cruzaron"]
+            self.rechazados = SLOTS[f"{direccion}:rechazados"]
+            self.wait_sum = SLOTS[f"{direccion}:wait_sum"]
+            self.bucket0 = SLOTS[f"{direccion}:b0"]
+
+    def tick(self, lock_wait: float, ipc: int = 0) -> None:
+        v = self.values
+        v[self.ticks] += 1
+        v[self.lock_wait] += lock_wait
+        if ipc:
+            v[self.ipc] += ipc
+        if self._periodico:
+            now = time.perf_counter()
+            if self._t_prev is not None:
+                dt = now - self._t_prev
+                v[self.period_sum] += dt
+                v[self.period_sq] += dt * dt
+            self._t_prev = now
+
+    def semaforo(self, sem: Any) -> None:
+        v = self.values
+        v[self.cola] = len(sem.cola)
+        v[self.cruzaron] = sem.cruzaron
+        v[self.rechazados] = sem.rechazados
+
+
+class WaitRecorder:
+    """Sink de `Semaforo.avanzar_n` que llena el histograma de espera.
+
+    Si recibe otro sink (p. ej. `ColumnarSink`) le reenvía el lote.
+    """
+
+    def __init__(self, worker: WorkerMetrics, siguiente: Any = None):
+        self.values = worker.values
+        self.wait_sum = worker.wait_sum
+        self.bucket0 = worker.bucket0
+        self.siguiente = siguiente
+
+    def registrar(self, lote: list, t_salida: float, ciclo: int, origen: str) -> None:
+        v = self.values
+        for veh in lote:
+            espera = t_salida - veh.t_llegada
+            v[self.wait_sum] += espera
+            v[self.bucket0 + bisect_left(WAIT_BUCKETS, espera)] += 1
+        if self.siguiente is not None:
+            self.siguiente.registrar(lote, t_salida, ciclo, origen)
+
+
+# ---------- Exportación ----------
+
+def tick_period(v: List[float], workers: List[str] = WORKERS[:4]) -> Tuple[float, float, float]:
+    """(ticks, suma y suma de cuadrados del período entre ticks) sobre `workers`.
+
+    Restando dos lecturas, media = Δsuma / Δticks y jitter = desvío estándar
+    del período en ese intervalo (ver `period_stats`).
+    """
+    return (
+        sum(v[SLOTS[f"{w}:ticks"]] for w in workers),
+        sum(v[SLOTS[f"{w}:period_sum"]] for w in workers),
+        sum(v[SLOTS[f"{w}:period_sq"]] for w in workers),
+    )
+
+
+def period_stats(n: float, suma: float, cuadrados: float) -> Tuple[float, float]:
+    """(período medio, desvío estándar) de `n` períodos."""
+    if n <= 0:
+        return 0.0, 0.0
+    media = suma / n
+    return media, math.sqrt(max(0.0, cuadrados / n - media * media))
+
+
+def _quantile(counts: List[float], q: float) -> float:
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    objetivo = q * total
+    acumulado = 0.0
+    for i, c in enumerate(counts):
+        if acumulado + c >= objetivo:
+            lo = WAIT_BUCKETS[i - 1] if i > 0 else 0.0
+            hi = WAIT_BUCKETS[i] if i < len(WAIT_BUCKETS) else WAIT_BUCKETS[-1]
+            return lo + (hi - lo) * ((objetivo - acumulado) / c if c else 0.0)
+        acumulado += c
+    return WAIT_BUCKETS[-1]
+
+
+class MetricsExporter:
+    """Convierte los contadores de la simulación actual a texto de Prometheus.
+
+    `source` devuelve las métricas vigentes (la GUI puede cambiar de simulación).
+    """
+
+    def __init__(self, source: Callable[[], SimMetrics | None], labels: Dict[str, str] | None = None):
+        self.source = source
+        self.labels = labels or {}
+        self._last_ts: float | None = None
+        self._last_ticks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _fmt(self, extra: Dict[str, str]) -> str:
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+    def render(self) -> str:
+        metrics = self.source()
+        if metrics is None:
+            return "# sin simulación activa\n"
+        v = metrics.read()
+        now = time.monotonic()
+        out: List[str] = []
+
+        with self._lock:
+            dt = now - self._last_ts if self._last_ts is not None else 0.0
+            out.append("# HELP traffic_ticks_total Ticks ejecutados por worker.")
+            out.append("# TYPE traffic_ticks_total counter")
+            rates = {}
+            for w in WORKERS:
+                ticks = v[SLOTS[f"{w}:ticks"]]
+                out.append(f"traffic_ticks_total{self._fmt({'worker': w})} {ticks:.0f}")
+                prev = self._last_ticks.get(w)
+                rates[w] = (ticks - prev) / dt if dt > 0 and prev is not None and ticks >= prev else 0.0
+                self._last_ticks[w] = ticks
+            self._last_ts = now
+
+        out.append("# HELP traffic_ticks_per_second Ticks por segundo desde el scrape anterior.")
+        out.append("# TYPE traffic_ticks_per_second gauge")
+        for w, r in rates.items():
+            out.append(f"traffic_ticks_per_second{self._fmt({'worker': w})} {r:.3f}")
+
+        out.append("# HELP traffic_tick_jitter_seconds Desvío estándar del período entre ticks de cada semáforo.")
+        out.append("# TYPE traffic_tick_jitter_seconds gauge")
+        for w in WORKERS[:4]:
+            n, suma, cuadrados = tick_period(v, [w])
+            _, jitter = period_stats(n - 1, suma, cuadrados)  # n ticks, n - 1 períodos
+            out.append(f"traffic_tick_jitter_seconds{self._fmt({'worker': w})} {jitter:.6f}")
+
+        out.append("# HELP traffic_lock_wait_seconds_total Tiempo esperando el lock de la simulación.")
+        out.append("# TYPE traffic_lock_wait_seconds_total counter")
+        for w in WORKERS:
+            out.append(f"traffic_lock_wait_seconds_total{self._fmt({'worker': w})} {v[SLOTS[f'{w}:lock_wait']]:.6f}")
+
+        out.append("# HELP traffic_ipc_roundtrips_total Llamadas al Manager (solo modo procesos).")
+        out.append("# TYPE traffic_ipc_roundtrips_total counter")
+        for w in WORKERS:
+            out.append(f"traffic_ipc_roundtrips_total{self._fmt({'worker': w})} {v[SLOTS[f'{w}:ipc']]:.0f}")
+
+        for name, field, kind, help_txt in (
+            ("traffic_queue_length", "cola", "gauge", "Vehículos en cola."),
+            ("traffic_crossed_total", "cruzaron", "counter", "Vehículos que cruzaron."),
+            ("traffic_rejected_total", "rechazados", "counter", "Llegadas descartadas por cola llena."),
+        ):
+            out.append(f"# HELP {name} {help_txt}")
+            out.append(f"# TYPE {name} {kind}")
+            for d in DIRS:
+                out.append(f"{name}{self._fmt({'dir': d})} {v[SLOTS[f'{d}:{field}']]:.0f}")
+
+        out.append("# HELP traffic_wait_seconds Espera de cada vehículo al cruzar.")
+        out.append("# TYPE traffic_wait_seconds histogram")
+        quantiles = {}
+        for d in DIRS:
+            b0 = SLOTS[f"{d}:b0"]
+            counts = v[b0:b0 + len(WAIT_BUCKETS) + 1]
+            acumulado = 0.0
+            for le, c in zip([*map(str, WAIT_BUCKETS), "+Inf"], counts):
+                acumulado += c
+                out.append(f"traffic_wait_seconds_bucket{self._fmt({'dir': d, 'le': le})} {acumulado:.0f}")
+            out.append(f"traffic_wait_seconds_sum{self._fmt({'dir': d})} {v[SLOTS[f'{d}:wait_sum']]:.6f}")
+            out.append(f"traffic_wait_seconds_count{self._fmt({'dir': d})} {acumulado:.0f}")
+            quantiles[d] = {q: _quantile(counts, q) for q in QUANTILES}
+
+        out.append("# HELP traffic_wait_quantile_seconds Percentiles de espera estimados del histograma.")
+        out.append("# TYPE traffic_wait_quantile_seconds gauge")
+        for d, qs in quantiles.items():
+            for q, val in qs.items():
+                out.append(f"traffic_wait_quantile_seconds{self._fmt({'dir': d, 'quantile': str(q)})} {val:.4f}")
+
+        out.append("# HELP traffic_snapshot_latency_seconds Duración de get_snapshot.")
+        out.append("# TYPE traffic_snapshot_latency_seconds summary")
+        out.append(f"traffic_snapshot_latency_seconds_sum{self._fmt({})} {v[SLOTS['snapshot_sum']]:.6f}")
+        out.append(f"traffic_snapshot_latency_seconds_count{self._fmt({})} {v[SLOTS['snapshots']]:.0f}")
+        out.append("# TYPE traffic_snapshot_latency_last_seconds gauge")
+        out.append(f"traffic_snapshot_latency_last_seconds{self._fmt({})} {v[SLOTS['snapshot_last']]:.6f}")
+        return "\n".join(out) + "\n"
+
+
+def serve_http(exporter: MetricsExporter, port: int, host: str = "127.0.0.1") -> Any:
+    """Sirve `/metrics` en un hilo daemon. Devuelve el servidor (llamar a `shutdown()` al terminar)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = exporter.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Metrics-HTTP", daemon=True).start()
+    return server
+
+
+class MetricsFileWriter:
+    """Reescribe el archivo de métricas cada `interval` segundos (reemplazo atómico)."""
+
+    def __init__(self, exporter: MetricsExporter, path: str, interval: float = 1.0):
+        self.exporter = exporter
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="Metrics-File", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval * 2)
+        self._write()
+
+    def _write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.exporter.render())
+        os.replace(tmp, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write()
@@ -1,27 +1,111 @@
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
-FASES: List[Tuple[List[str], List[str]]] = [
-    (["N", "S"], ["E", "O"]),
-    (["E", "O"], ["N", "S"]),
-]
+from ..config import CONTROL_MODE, GAP_TIME, GREEN_TIME, MAX_GREEN, MIN_GREEN, PHASE_GREEN_TIMES
+from .fases import PLAN, PlanFases
+
+CONTROL_MODES = ("fixed", "actuated")
+
+# (verdes, rojos) por fase del plan configurado (PHASE_PLAN)
+FASES: List[Tuple[List[str], List[str]]] = PLAN.como_listas()
 
 @dataclass
 class ControladorTrafico:
     fase_idx: int = 0
     ciclo: int = 0
+    en_amarillo: bool = False
+    t_fase: float = 0.0  # instante en que empezó el verde/amarillo actual
+    verdes: Tuple[float, ...] | None = PHASE_GREEN_TIMES  # verde por fase (None = GREEN_TIME)
+    plan: PlanFases = PLAN
 
-    def siguiente_fase(self) -> Tuple[List[str], List[str]]:
-        self.fase_idx = (self.fase_idx + 1) % len(FASES)
-        self.ciclo += 1
-        return FASES[self.fase_idx]
+    modo: str = CONTROL_MODE  # "fixed" | "actuated"
+    min_verde: float = MIN_GREEN
+    max_verde: float = MAX_GREEN
+    brecha: float = GAP_TIME
+    gap_outs: int = 0  # verdes cortados por falta de demanda
+    max_outs: int = 0  # verdes cortados por llegar a max_verde
+
+    def __post_init__(self) -> None:
+        n = len(self.plan)
+        if self.verdes is not None and len(self.verdes) != n:
+            raise ValueError(f"hay {len(self.verdes)} verdes por fase (PHASE_GREEN_TIMES) para un plan de {n} fases")
+        if not 0 <= self.fase_idx < n:
+            raise ValueError(f"fase_idx={self.fase_idx} no existe en un plan de {n} fases")
 
-    def fase_actual(self) -> Tuple[List[str], List[str]]:
-        return FASES[self.fase_idx]
+    def verde_actual(self) -> float:
+        """Duración del verde de la fase en curso."""
+        if self.verdes is None:
+            return GREEN_TIME
+        return self.verdes[self.fase_idx]
 
-    def aplicar_fase(self, semaforos: Dict[str, "Semaforo"]) -> None:
+    def siguiente_fase(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        self.fase_idx = (self.fase_idx + 1) % len(self.plan)
+        self.ciclo += 1
+        return self.fase_actual()
+
+    def fin_de_verde(self, now: float, sensor: Callable[[str], Tuple[float, float]] | None = None) -> bool:
+        """¿Hay que pasar a amarillo? `sensor(d)` -> (cola, instante de la última llegada)."""
+        transcurrido = now - self.t_fase + 1e-9
+        if self.modo != "actuated" or sensor is None:
+            return transcurrido >= self.verde_actual()
+        if transcurrido < self.min_verde:
+            return False
+        # el descanso en verde también tiene tope: sin demanda los ciclos siguen avanzando
+        if transcurrido >= self.max_verde:
+            self.max_outs += 1
+            return True
         verdes, rojos = self.fase_actual()
+        if not any(sensor(d)[0] > 0 for d in rojos):
+            return False  # nadie espera en rojo: el verde descansa (hasta max_verde)
         for d in verdes:
-            semaforos[d].estado = "VERDE"
-        for d in rojos:
-            semaforos[d].estado = "ROJO"
\ No newline at end of file
+            cola, t_ultima = sensor(d)
+            if cola > 0 or now - t_ultima < self.brecha:
+                return False
+        self.gap_outs += 1
+        return True
+
+    def proxima_decision(self, now: float,
+                         sensor: Callable[[str], Tuple[float, float]] | None = None) -> float:
+        """Primer instante en que `fin_de_verde` puede dar True si los sensores no cambian.
+
+        Un cambio de los sensores (una llegada, una cola que se vacía) puede
+        adelantarlo. Para dormir hasta ahí en vez de preguntar cada tick.
+        """
+        if self.modo != "actuated" or sensor is None:
+            return self.t_fase + self.verde_actual()
+        if now - self.t_fase < self.min_verde:
+            return self.t_fase + self.min_verde
+        verdes, rojos = self.fase_actual()
+        t_max = self.t_fase + self.max_verde
+        if not any(sensor(d)[0] > 0 for d in rojos):
+            return t_max  # el verde descansa hasta el tope
+        if any(sensor(d)[0] > 0 for d in verdes):
+            return t_max  # antes, solo si la cola se vacía
+        return min(t_max, max(sensor(d)[1] + self.brecha for d in verdes))
+
+    def fase_actual(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        return self.plan.verdes[self.fase_idx], self.plan.rojos[self.fase_idx]
+
+    def luces(self) -> bytes:
+        """Luz de cada aproximación del plan (en el orden de `plan.aproximaciones`)."""
+        return self.plan.luces[self.fase_idx][self.en_amarillo]
+
+    def poner_amarillo(self, semaforos: Dict[str, "Semaforo"] | None = None, now: float | None = None) -> None:
+        """Pasa a amarillo solo los que estaban en verde."""
+        self.en_amarillo = True
+        self.t_fase = now if now is not None else time.time()
+        if semaforos is not None:
+            self._pintar(semaforos)
+
+    def aplicar_fase(self, semaforos: Dict[str, "Semaforo"] | None = None, now: float | None = None) -> None:
+        self.en_amarillo = False
+        self.t_fase = now if now is not None else time.time()
+        if semaforos is not None:
+            self._pintar(semaforos)
+
+    def _pintar(self, semaforos: Dict[str, "Semaforo"]) -> None:
+        for d, luz in zip(self.plan.aproximaciones, self.luces()):
+            s = semaforos[d]
+            s.estado = luz
+            s.ciclo = self.ciclo
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Estados de luz como enteros y planes de fases precompilados.
+
+Una luz es un entero chico (`ROJO`, `AMARILLO`, `VERDE`, `APAGADO`): compararla
+en cada tick es comparar enteros y viaja entre procesos en un byte. Un plan
+es la lista de fases, cada una con las aproximaciones que van en verde (el
+resto, en rojo). Cada aproximación tiene un bit y `PlanFases` precalcula, por
+fase, la máscara de verdes y las luces de todas las aproximaciones en verde y
+en amarillo, así aplicar una fase es copiar una tabla.
+
+Las aproximaciones son nombres libres: "N".."O" o giros protegidos como
+"N.izq". Los backends en vivo tienen un worker por cada una de N, S, E, O,
+así que ahí el plan puede tener cualquier número de fases pero solo esas
+cuatro aproximaciones; el motor virtual y `analitico` aceptan cualquiera.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from ..config import PHASE_PLAN
+
+ROJO, AMARILLO, VERDE, APAGADO = range(4)
+NOMBRES_LUZ = ("ROJO", "AMARILLO", "VERDE", "APAGADO")
+
+DIRS = ("N", "S", "E", "O")
+PLAN_POR_DEFECTO = (("N", "S"), ("E", "O"))
+
+
+def codigo_luz(estado: int | str) -> int:
+    """Código de una luz; acepta también el nombre (checkpoints viejos)."""
+    return NOMBRES_LUZ.index(estado) if isinstance(estado, str) else int(estado)
+
+
+class PlanFases:
+    def __init__(self, fases: Sequence[Sequence[str]] = PLAN_POR_DEFECTO,
+                 aproximaciones: Sequence[str] | None = None):
+        if not fases or any(not f for f in fases):
+            raise ValueError("un plan necesita al menos una fase y cada fase al menos una aproximación en verde")
+        if aproximaciones is None:
+            # primero las cuatro de siempre, después los giros en orden de aparición
+            usadas = [a for f in fases for a in f]
+            aproximaciones = [d for d in DIRS if d in usadas] + [a for a in dict.fromkeys(usadas) if a not in DIRS]
+        self.aproximaciones: Tuple[str, ...] = tuple(aproximaciones)
+        self.bit: Dict[str, int] = {a: 1 << i for i, a in enumerate(self.aproximaciones)}
+        desconocidas = {a for f in fases for a in f} - set(self.bit)
+        if desconocidas:
+            raise ValueError(f"aproximaciones fuera del plan: {sorted(desconocidas)}")
+
+        self.mascara: Tuple[int, ...] = tuple(sum(self.bit[a] for a in set(f)) for f in fases)
+        self.verdes: Tuple[Tuple[str, ...], ...] = tuple(
+            tuple(a for a in self.aproximaciones if m & self.bit[a]) for m in self.mascara
+        )
+        self.rojos: Tuple[Tuple[str, ...], ...] = tuple(
+            tuple(a for a in self.aproximaciones if not m & self.bit[a]) for m in self.mascara
+        )
+        # luces[fase][en_amarillo] -> un byte por aproximación
+        self.luces: Tuple[Tuple[bytes, bytes], ...] = tuple(
+            (
+                bytes(VERDE if m & self.bit[a] else ROJO for a in self.aproximaciones),
+                bytes(AMARILLO if m & self.bit[a] else ROJO for a in self.aproximaciones),
+            )
+            for m in self.mascara
+        )
+
+    def __len__(self) -> int:
+        return len(self.mascara)
+
+    def __repr__(self) -> str:
+        return f"PlanFases({[list(v) for v in self.verdes]})"
+
+    def exigir(self, aproximaciones: Sequence[str] = DIRS) -> "PlanFases":
+        """Valida que el plan use exactamente estas aproximaciones (las de un backend en vivo)."""
+        if set(self.aproximaciones) != set(aproximaciones):
+            raise ValueError(
+                f"el plan usa {list(self.aproximaciones)}; este backend solo simula {list(aproximaciones)}"
+            )
+        return self
+
+    def como_listas(self) -> List[Tuple[List[str], List[str]]]:
+        """(verdes, rojos) por fase, con nombres."""
+        return [(list(v), list(r)) for v, r in zip(self.verdes, self.rojos)]
+
+
+PLAN = PlanFases(PHASE_PLAN if PHASE_PLAN is not None else PLAN_POR_DEFECTO)
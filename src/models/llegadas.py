@@ -0,0 +1,246 @@
+import csv
+import hashlib
+import itertools
+import math
+import mmap
+import random
+import struct
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+# Registro binario de traza: (t segundos desde el inicio, dirección, conteo)
+REGISTRO_BIN = struct.Struct("<d1sI")
+_REGISTROS_POR_BLOQUE = 65536
+
+
+class LectorLlegadas(ABC):
+    """Flujo de llegadas de una sola dirección, consumido tick a tick por un worker."""
+
+    @abstractmethod
+    def llegadas(self, t: float) -> int:
+        """Vehículos que llegan desde la última llamada hasta `t` (segundos desde el inicio)."""
+        ...
+
+    @abstractmethod
+    def posicion(self) -> Any:
+        """Estado mínimo (picklable/JSON) para reanudar el flujo en el mismo punto."""
+        ...
+
+    @abstractmethod
+    def saltar(self, posicion: Any) -> None:
+        """Avanza un lector recién abierto hasta `posicion`."""
+        ...
+
+    def proxima_llegada(self, t: float, tick: float, max_ticks: int) -> float | None:
+        """Próximo instante `t + k * tick` (1 <= k <= `max_ticks`) con llegadas, para dormir hasta ahí.
+
+        Los ticks vacíos intermedios se dan por leídos; la llegada se entrega
+        llamando a `llegadas` con ese instante. None si no hay ninguna en
+        `max_ticks` ticks. Por defecto no se sabe de antemano: el tick siguiente.
+        """
+        return t + tick
+
+
+class FuenteLlegadas(ABC):
+    """Origen de la demanda. Debe ser picklable: en modo procesos cada worker la abre por su lado."""
+
+    @abstractmethod
+    def abrir(self, direccion: str, instancia: int = 0) -> LectorLlegadas:
+        """Lector de una dirección. `instancia` distingue intersecciones que comparten la fuente."""
+        ...
+
+    def huella(self) -> Dict[str, Any] | None:
+        """Qué determina las llegadas, para la caché de resultados; None si cada corrida sortea las suyas."""
+        return None
+
+
+# ---------- Bernoulli (comportamiento original) ----------
+
+class _LectorBernoulli(LectorLlegadas):
+    def __init__(self, prob: float, semilla: str):
+        self.prob = prob
+        self.semilla = semilla
+        self.rng = random.Random(semilla)
+        self.extracciones = 0
+        self._adelantada = False  # éxito ya sorteado por `proxima_llegada`, sin entregar
+
+    def llegadas(self, t: float) -> int:
+        if self._adelantada:
+            self._adelantada = False
+            return 1
+        self.extracciones += 1
+        return 1 if self.rng.random() < self.prob else 0
+
+    def proxima_llegada(self, t: float, tick: float, max_ticks: int) -> float | None:
+        # las mismas extracciones que haría un worker tick a tick, de corrido: mismas llegadas
+        rng = self.rng.random
+        for k in range(1, max_ticks + 1):
+            self.extracciones += 1
+            if rng() < self.prob:
+                self._adelantada = True
+                return t + k * tick
+        return None
+
+    def posicion(self) -> Any:
+        # semilla + número de extracciones: más compacto que el estado del Mersenne Twister
+        return [self.semilla, self.extracciones - self._adelantada]
+
+    def saltar(self, posicion: Any) -> None:
+        semilla, n = posicion
+        self.semilla = semilla
+        self.rng = random.Random(semilla)
+        for _ in range(n):
+            self.rng.random()
+        self.extracciones = n
+        self._adelantada = False
+
+
+class FuenteBernoulli(FuenteLlegadas):
+    """Una prueba de Bernoulli por tick con probabilidad constante."""
+
+    def __init__(self, prob: float, seed: int | None = None):
+        self.prob = prob
+        self.seed = seed
+
+    def abrir(self, direccion: str, instancia: int = 0) -> LectorLlegadas:
+        # sin semilla se sortea una, para que el flujo se pueda reanudar igual
+        seed = self.seed if self.seed is not None else random.SystemRandom().randrange(2 ** 63)
+        # la instancia 0 conserva la semilla de siempre; las demás ven flujos independientes
+        semilla = f"{seed}:{direccion}" if instancia == 0 else f"{seed}:{direccion}:{instancia}"
+        return _LectorBernoulli(self.prob, semilla)
+
+    def huella(self) -> Dict[str, Any] | None:
+        if self.seed is None:
+            return None
+        return {"tipo": "bernoulli", "prob": self.prob, "seed": self.seed}
+
+
+# ---------- Trazas (conteos de detectores) ----------
+
+def _leer_csv(path: Path, direccion: str) -> Iterator[Tuple[float, int]]:
+    # El archivo se recorre línea a línea: nunca se carga completo en memoria.
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        for fila in reader:
+            if not fila or fila[0].startswith("#"):
+                continue
+            try:
+                t = float(fila[0])
+            except ValueError:
+                continue  # cabecera
+            if len(fila) < 3 or fila[1].strip() != direccion:
+                continue  # fila corta u otra dirección
+            try:
+                n = int(fila[2])
+            except ValueError:
+                continue  # conteo ilegible: la fila se salta como una cabecera
+            yield t, n
+
+
+def _leer_binario(path: Path, direccion: str) -> Iterator[Tuple[float, int]]:
+    objetivo = direccion.encode("ascii")
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            usable = len(mm) - len(mm) % REGISTRO_BIN.size
+            bloque = REGISTRO_BIN.size * _REGISTROS_POR_BLOQUE
+            for ini in range(0, usable, bloque):
+                # Solo un bloque a la vez vive en memoria de Python.
+                for t, d, n in REGISTRO_BIN.iter_unpack(mm[ini:min(ini + bloque, usable)]):
+                    if d == objetivo:
+                        yield t, n
+
+
+def leer_traza(path: str | Path, direccion: str) -> Iterator[Tuple[float, int]]:
+    """Generador perezoso de (t, conteo) para una dirección; formato según la extensión."""
+    path = Path(path)
+    if path.suffix.lower() in (".bin", ".dat"):
+        return _leer_binario(path, direccion)
+    return _leer_csv(path, direccion)
+
+
+def escribir_traza_binaria(registros: Iterable[Tuple[float, str, int]], path: str | Path) -> int:
+    """Vuelca (t, dirección, conteo) al formato binario por bloques. Devuelve los registros escritos."""
+    total = 0
+    buf = bytearray()
+    with open(path, "wb") as f:
+        for t, d, n in registros:
+            buf += REGISTRO_BIN.pack(float(t), d.encode("ascii"), int(n))
+            total += 1
+            if len(buf) >= REGISTRO_BIN.size * _REGISTROS_POR_BLOQUE:
+                f.write(buf)
+                buf.clear()
+        f.write(buf)
+    return total
+
+
+class _LectorTraza(LectorLlegadas):
+    def __init__(self, registros: Iterator[Tuple[float, int]], escala: float, inicio: float):
+        self._registros = itertools.dropwhile(lambda r: r[0] < inicio, registros)
+        self._escala = escala
+        self._inicio = inicio
+        self._pendiente: Tuple[float, int] | None = None
+        self._agotado = False
+        self._t = 0.0
+
+    def llegadas(self, t: float) -> int:
+        self._t = t
+        # t real -> t de traza
+        limite = self._inicio + t * self._escala
+        total = 0
+        while not self._agotado:
+            if self._pendiente is None:
+                self._pendiente = next(self._registros, None)
+                if self._pendiente is None:
+                    self._agotado = True
+                    break
+            t_reg, n = self._pendiente
+            if t_reg > limite:
+                break
+            total += n
+            self._pendiente = None
+        return total
+
+    def proxima_llegada(self, t: float, tick: float, max_ticks: int) -> float | None:
+        if self._pendiente is None and not self._agotado:
+            self._pendiente = next(self._registros, None)
+            self._agotado = self._pendiente is None
+        if self._pendiente is None:
+            return None
+        # t de traza -> t real, redondeado hacia arriba al tick
+        t_real = (self._pendiente[0] - self._inicio) / self._escala
+        k = max(1, math.ceil((t_real - t) / tick - 1e-9))
+        return t + k * tick if k <= max_ticks else None
+
+    def posicion(self) -> Any:
+        return self._t
+
+    def saltar(self, posicion: Any) -> None:
+        self.llegadas(float(posicion))
+
+
+class FuenteTraza(FuenteLlegadas):
+    """Llegadas leídas de un archivo de conteos (CSV `t,direccion,conteo` o binario `.bin`).
+
+    `escala` comprime el tiempo de la traza (60 = un minuto de traza por segundo real)
+    e `inicio` salta a un instante de la traza.
+    """
+
+    def __init__(self, path: str | Path, escala: float = 1.0, inicio: float = 0.0):
+        self.path = str(path)
+        self.escala = escala
+        self.inicio = inicio
+
+    def abrir(self, direccion: str, instancia: int = 0) -> LectorLlegadas:
+        # la traza es una sola: todas las intersecciones la reproducen
+        return _LectorTraza(leer_traza(self.path, direccion), self.escala, self.inicio)
+
+    def huella(self) -> Dict[str, Any] | None:
+        # el contenido, no el nombre: la misma ruta puede traer otra traza
+        h = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+        return {"tipo": "traza", "sha256": h.hexdigest(), "escala": self.escala, "inicio": self.inicio}
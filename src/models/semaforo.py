@@ -1,29 +1,291 @@
+import os
+import struct
+import sys
+import tempfile
 from dataclasses import dataclass, field
-from typing import List
+from operator import attrgetter
+from typing import Any, Dict, List, Tuple
+from ..config import LANES, SATURATION_FLOW, QUEUE_CAPACITY, QUEUE_POLICY, SPILL_DIR, SPILL_MAX_BYTES
+from .fases import ROJO, VERDE, codigo_luz
 from .vehiculo import Vehiculo
+from .ventanas import HistorialCiclos, VentanaDeslizante
+
+_T_LLEGADA = attrgetter("t_llegada")
+
+# Registro de un vehículo derramado a disco: (id, t_llegada)
+_REGISTRO_DERRAME = struct.Struct("<qd")
+
+_O_BINARY = getattr(os, "O_BINARY", 0)  # Windows: sin traducción de fin de línea
+
+# Descriptores de derrame abiertos en este proceso: ruta -> (pid, fd). Solo
+# los cachea quien escribe (el worker de la dirección); otro proceso que lee
+# (el principal capturando un checkpoint) abre, lee y cierra. Viven fuera del
+# Semaforo para que siga siendo picklable (modo procesos); el pid evita usar
+# un descriptor heredado por fork.
+_DESCRIPTORES: Dict[str, Tuple[int, int]] = {}
+
+
+def _descriptor(path: str) -> int:
+    pid, fd = _DESCRIPTORES.get(path, (None, -1))
+    if pid != os.getpid():
+        # O_APPEND sin búfer: cada escritura llega entera al final y otro proceso la ve al leer
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND | _O_BINARY, 0o600)
+        _DESCRIPTORES[path] = (os.getpid(), fd)
+    return fd
+
+
+def _cerrar_descriptor(path: str) -> None:
+    pid, fd = _DESCRIPTORES.pop(path, (None, -1))
+    if pid == os.getpid():
+        os.close(fd)
+
+
+def _leer_en(fd: int, pos: int, n: int) -> bytes:
+    # lseek + read en vez de pread, que no existe en Windows; las escrituras
+    # son O_APPEND, así que mover el offset no las afecta
+    os.lseek(fd, pos, os.SEEK_SET)
+    partes = []
+    while n > 0:
+        parte = os.read(fd, n)
+        if not parte:
+            break
+        partes.append(parte)
+        n -= len(parte)
+    return b"".join(partes)
+
+
+def _bytes_por_vehiculo() -> int:
+    v = Vehiculo(0, "N", 0.0)
+    return sys.getsizeof(v) + sys.getsizeof(v.__dict__) + sys.getsizeof(v.t_llegada) + sys.getsizeof(1 << 40)
+
+
+_BYTES_VEHICULO = _bytes_por_vehiculo()
+
+# Campos escalares que viajan en un checkpoint (la cola y el derrame van aparte)
+CAMPOS_ESTADO = (
+    "estado", "cruzaron", "suma_espera", "carriles", "flujo_saturacion", "credito", "ciclo",
+    "capacidad_cola", "politica_cola", "rechazados", "bloqueados", "retenidos", "derramados",
+    "creados", "pos_llegadas",
+)
 
 @dataclass
 class Semaforo:
     direccion: str
-    estado: str = "ROJO"
+    estado: int = ROJO  # código de luz de src/models/fases.py
     cola: List[Vehiculo] = field(default_factory=list)
 
     cruzaron: int = 0
     suma_espera: float = 0.0
 
+    carriles: int = LANES
+    flujo_saturacion: float = SATURATION_FLOW  # veh/h por carril
+    credito: float = 0.0  # fracción de vehículo acumulada entre ticks
+    ciclo: int = 0  # lo actualiza el controlador al aplicar cada fase
+
+    capacidad_cola: int | None = QUEUE_CAPACITY
+    politica_cola: str = QUEUE_POLICY  # "drop" | "spill" | "block"
+    rechazados: int = 0  # llegadas descartadas (drop)
+    bloqueados: int = 0  # llegadas que tuvieron que esperar aguas arriba (block)
+    retenidos: int = 0  # llegadas esperando aguas arriba ahora mismo (block)
+    derramados: int = 0  # vehículos enviados a disco en total (spill)
+    spill_path: str | None = None
+    spill_escritos: int = 0
+    spill_leidos: int = 0
+
+    creados: int = 0  # vehículos creados por el worker de esta dirección
+    pos_llegadas: Any = None  # posición del lector de llegadas (para reanudar)
+
+    # estadísticas recientes (no viajan en el checkpoint ni por el Manager: se reinician al reanudar)
+    ventana: VentanaDeslizante = field(default_factory=VentanaDeslizante)
+    por_ciclo: HistorialCiclos = field(default_factory=HistorialCiclos)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Las ventanas son del worker que las actualiza: no viajan por el Manager (modo
+        # procesos), que antes las copiaba dos veces por tick; se publican con `recientes`.
+        estado = self.__dict__.copy()
+        del estado["ventana"], estado["por_ciclo"]
+        return estado
+
+    def __setstate__(self, estado: Dict[str, Any]) -> None:
+        self.__dict__.update(estado)
+        self.ventana = VentanaDeslizante()
+        self.por_ciclo = HistorialCiclos()
+
+    def admitir(self, llegadas: int) -> int:
+        """Cuántos vehículos deben crearse y encolarse este tick.
+
+        Aplica la política de la cola a las `llegadas` nuevas (y, con "block",
+        a las retenidas de ticks anteriores, que tienen prioridad).
+        """
+        if self.capacidad_cola is None:
+            return llegadas
+        libre = max(0, self.capacidad_cola - len(self.cola))
+        if self.politica_cola == "spill":
+            if SPILL_MAX_BYTES is None:
+                return llegadas
+            # con el disco lleno lo que no entra se descarta, como en "drop"
+            libre += max(0, SPILL_MAX_BYTES // _REGISTRO_DERRAME.size - self.en_disco())
+        if self.politica_cola == "block":
+            pendientes = self.retenidos + llegadas
+            n = min(libre, pendientes)
+            self.bloqueados += llegadas - min(llegadas, max(0, libre - self.retenidos))
+            self.retenidos = pendientes - n
+            return n
+        n = min(libre, llegadas)
+        self.rechazados += llegadas - n
+        return n
+
     def enqueue(self, v: Vehiculo) -> None:
+        if self.capacidad_cola is not None and self.politica_cola == "spill" and (
+            len(self.cola) >= self.capacidad_cola or self.spill_leidos < self.spill_escritos
+        ):
+            self._derramar(v)
+            return
         self.cola.append(v)
 
+    def en_disco(self) -> int:
+        return self.spill_escritos - self.spill_leidos
+
+    def memoria_cola(self) -> int:
+        """Estimación en bytes de lo que ocupa la cola en memoria."""
+        return sys.getsizeof(self.cola) + len(self.cola) * _BYTES_VEHICULO
+
+    def descartar_derrame(self) -> None:
+        """Borra el archivo de derrame (al terminar la simulación)."""
+        if self.spill_path is not None:
+            _cerrar_descriptor(self.spill_path)
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def capturar(self) -> Dict[str, Any]:
+        """Copia consistente del estado (llamar con el lock tomado).
+
+        La cola se copia superficialmente: los vehículos no se modifican después
+        de creados, así que convertirla a bytes puede hacerse ya fuera del lock.
+        """
+        derrame: List[Tuple[int, float]] = []
+        if self.en_disco() > 0 and self.spill_path is not None:
+            derrame = list(_REGISTRO_DERRAME.iter_unpack(self._leer_derrame(self.en_disco())))
+        return {
+            "campos": {c: getattr(self, c) for c in CAMPOS_ESTADO},
+            "cola": list(self.cola),
+            "derrame": derrame,
+        }
+
+    @classmethod
+    def restaurar(cls, direccion: str, captura: Dict[str, Any], desplazamiento: float = 0.0) -> "Semaforo":
+        """Reconstruye un semáforo capturado; los tiempos de llegada se corren `desplazamiento` s."""
+        s = cls(direccion, **captura["campos"])
+        s.estado = codigo_luz(s.estado)
+        s.cola = [Vehiculo(v.id, direccion, v.t_llegada + desplazamiento) for v in captura["cola"]]
+        # el derrame restaurado no cuenta como derrame nuevo
+        s._escribir_derrame([(i, t + desplazamiento) for i, t in captura["derrame"]])
+        if s.spill_path is not None:
+            # quien restaura no es necesariamente quien va a escribir (modo procesos)
+            _cerrar_descriptor(s.spill_path)
+        return s
+
+    def _derramar(self, v: Vehiculo) -> None:
+        self._escribir_derrame([(v.id, v.t_llegada)])
+        self.derramados += 1
+
+    def _escribir_derrame(self, registros: List[Tuple[int, float]]) -> None:
+        # Solo se guardan enteros y la ruta: el objeto sigue siendo picklable.
+        if not registros:
+            return
+        if self.spill_path is None:
+            base = SPILL_DIR or tempfile.gettempdir()
+            self.spill_path = os.path.join(base, f"spill-{self.direccion}-{os.getpid()}-{id(self):x}.bin")
+        os.write(_descriptor(self.spill_path), b"".join(_REGISTRO_DERRAME.pack(i, t) for i, t in registros))
+        self.spill_escritos += len(registros)
+
+    def _leer_derrame(self, n: int) -> bytes:
+        """Los próximos `n` registros sin leer (quedan en disco hasta `_recargar`)."""
+        pos, tam = self.spill_leidos * _REGISTRO_DERRAME.size, n * _REGISTRO_DERRAME.size
+        pid, fd = _DESCRIPTORES.get(self.spill_path, (None, -1))
+        if pid == os.getpid():
+            return _leer_en(fd, pos, tam)
+        fd = os.open(self.spill_path, os.O_RDONLY | _O_BINARY)
+        try:
+            return _leer_en(fd, pos, tam)
+        finally:
+            os.close(fd)
+
+    def _recargar(self) -> None:
+        """Devuelve a la cola, en orden, lo derramado que ya cabe."""
+        pendientes = self.en_disco()
+        if pendientes <= 0 or self.spill_path is None:
+            return
+        k = min(pendientes, self.capacidad_cola - len(self.cola)) if self.capacidad_cola is not None else pendientes
+        if k <= 0:
+            return
+        datos = self._leer_derrame(k)
+        self.cola.extend(Vehiculo(i, self.direccion, t) for i, t in _REGISTRO_DERRAME.iter_unpack(datos))
+        self.spill_leidos += k
+        if self.spill_leidos == self.spill_escritos:
+            # vacío: se trunca para que el disco no crezca sin límite
+            _cerrar_descriptor(self.spill_path)
+            os.remove(self.spill_path)
+            self.spill_path = None
+            self.spill_escritos = self.spill_leidos = 0
+
     def puede_avanzar(self) -> bool:
-        return self.estado == "VERDE" and len(self.cola) > 0
+        return self.estado == VERDE and len(self.cola) > 0
 
     def avanzar_uno(self, now: float) -> None:
         """Simula que 1 vehículo cruza si está en verde."""
-        if not self.puede_avanzar():
-            return
-        v = self.cola.pop(0)
-        self.cruzaron += 1
-        self.suma_espera += v.tiempo_espera(now)
+        self.avanzar_n(now, 1)
+
+    def capacidad(self, dt: float) -> int:
+        """Vehículos que pueden cruzar en `dt` segundos según el flujo de saturación.
+
+        La parte fraccionaria se acumula en `credito` mientras dure el verde,
+        así un tick grueso descarga lo mismo que varios ticks finos.
+        """
+        if self.estado != VERDE:
+            self.credito = 0.0
+            return 0
+        self.credito += self.carriles * self.flujo_saturacion * dt / 3600.0
+        n = int(self.credito)
+        self.credito -= n
+        return n
+
+    def avanzar_n(self, now: float, n: int, sink: Any = None) -> int:
+        """Simula que hasta `n` vehículos crucen de una vez si está en verde.
+
+        Devuelve cuántos cruzaron. La espera del lote se suma en un solo paso:
+        sum(now - t_llegada) = k * now - sum(t_llegada). Si hay `sink`
+        (p. ej. `ColumnarSink`) el lote se registra vehículo a vehículo.
+        """
+        if n <= 0 or not self.puede_avanzar():
+            return 0
+        k = min(n, len(self.cola))
+        lote = self.cola[:k]
+        del self.cola[:k]
+        self.cruzaron += k
+        espera = max(0.0, k * now - sum(map(_T_LLEGADA, lote)))
+        self.suma_espera += espera
+        self.ventana.registrar_cruces(now, k, espera)
+        self.por_ciclo.registrar_cruces(self.ciclo, k, espera)
+        if sink is not None:
+            sink.registrar(lote, now, self.ciclo, self.direccion)
+        if self.spill_escritos:
+            self._recargar()
+        return k
+
+    def muestrear(self, now: float, llegadas: int) -> None:
+        """Llegadas del tick y cola actual para las estadísticas recientes (una vez por tick)."""
+        cola = len(self.cola) + self.en_disco()
+        self.ventana.registrar_tick(now, llegadas, cola)
+        self.por_ciclo.registrar_tick(self.ciclo, llegadas, cola)
+
+    def recientes(self) -> Dict[str, Any]:
+        """Ventana deslizante y último ciclo completo, para `get_snapshot`."""
+        ciclos = self.por_ciclo.ciclos(self.ciclo - 1)
+        return {"ventana": self.ventana.resumen(), "ultimo_ciclo": ciclos[-1] if ciclos else None}
 
     def espera_promedio(self) -> float:
         if self.cruzaron == 0:
@@ -0,0 +1,137 @@
+"""Estadísticas en ventana deslizante, actualizadas en O(1).
+
+`VentanaDeslizante` agrupa el tiempo en `cubetas` de `ancho / cubetas`
+segundos sobre un anillo fijo: cada registro suma en la cubeta actual y
+mantiene totales corridos, así que al avanzar el reloj solo se restan y
+vacían las cubetas que salen de la ventana (cada una, como mucho una vez).
+`HistorialCiclos` guarda lo mismo por ciclo del controlador (cada cambio de
+fase incrementa `ciclo`) en un anillo de los últimos `n` ciclos.
+
+Ninguna de las dos recorre la historia: sirven para actualizar en cada
+cruce y leer en cada snapshot.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from ..config import CYCLE_HISTORY, WINDOW_BUCKETS, WINDOW_SECONDS
+
+
+@dataclass
+class VentanaDeslizante:
+    ancho: float = WINDOW_SECONDS
+    cubetas: int = WINDOW_BUCKETS
+
+    cruces: List[int] = field(default_factory=list)
+    espera: List[float] = field(default_factory=list)
+    llegadas: List[int] = field(default_factory=list)
+    cola_max: List[int] = field(default_factory=list)
+    tot_cruces: int = 0
+    tot_espera: float = 0.0
+    tot_llegadas: int = 0
+    actual: int = -1  # índice absoluto de la cubeta actual (-1 = vacía)
+    t_inicio: float = 0.0
+    t_ultimo: float = 0.0
+
+    def __post_init__(self) -> None:
+        n = self.cubetas
+        self.cruces, self.espera, self.llegadas, self.cola_max = [0] * n, [0.0] * n, [0] * n, [0] * n
+
+    def _cubeta(self, now: float) -> int:
+        k = int(now * self.cubetas // self.ancho)
+        if self.actual < 0:
+            self.actual, self.t_inicio = k, now
+        elif k > self.actual:
+            for j in range(self.actual + 1, self.actual + 1 + min(k - self.actual, self.cubetas)):
+                i = j % self.cubetas
+                self.tot_cruces -= self.cruces[i]
+                self.tot_espera -= self.espera[i]
+                self.tot_llegadas -= self.llegadas[i]
+                self.cruces[i] = self.llegadas[i] = self.cola_max[i] = 0
+                self.espera[i] = 0.0
+            self.actual = k
+        # un reloj que retrocede (no debería) suma en la cubeta actual
+        self.t_ultimo = max(self.t_ultimo, now)
+        return self.actual % self.cubetas
+
+    def registrar_cruces(self, now: float, n: int, suma_espera: float) -> None:
+        i = self._cubeta(now)
+        self.cruces[i] += n
+        self.espera[i] += suma_espera
+        self.tot_cruces += n
+        self.tot_espera += suma_espera
+
+    def registrar_tick(self, now: float, llegadas: int, cola: int) -> None:
+        i = self._cubeta(now)
+        self.llegadas[i] += llegadas
+        self.tot_llegadas += llegadas
+        if cola > self.cola_max[i]:
+            self.cola_max[i] = cola
+
+    def resumen(self) -> Dict[str, float]:
+        """Flujo y llegadas (veh/h), espera media (s) y cola máxima en la ventana."""
+        if self.actual < 0:
+            return {"flujo_vh": 0.0, "llegadas_vh": 0.0, "espera_prom": 0.0, "cola_max": 0}
+        # la ventana abarca las cubetas completas más lo transcurrido de la actual
+        dt = self.ancho / self.cubetas
+        span = min(self.ancho - dt + (self.t_ultimo - self.actual * dt), self.t_ultimo - self.t_inicio)
+        span = max(span, dt)
+        return {
+            "flujo_vh": round(self.tot_cruces * 3600.0 / span, 1),
+            "llegadas_vh": round(self.tot_llegadas * 3600.0 / span, 1),
+            "espera_prom": round(self.tot_espera / self.tot_cruces, 2) if self.tot_cruces else 0.0,
+            "cola_max": max(self.cola_max),
+        }
+
+
+@dataclass
+class HistorialCiclos:
+    n: int = CYCLE_HISTORY
+
+    ciclo: List[int] = field(default_factory=list)  # ciclo que ocupa cada casilla (-1 = libre)
+    cruces: List[int] = field(default_factory=list)
+    espera: List[float] = field(default_factory=list)
+    llegadas: List[int] = field(default_factory=list)
+    cola_max: List[int] = field(default_factory=list)
+    ultimo: int = -1
+
+    def __post_init__(self) -> None:
+        n = self.n
+        self.ciclo, self.cruces, self.espera = [-1] * n, [0] * n, [0.0] * n
+        self.llegadas, self.cola_max = [0] * n, [0] * n
+
+    def _casilla(self, ciclo: int) -> int:
+        i = ciclo % self.n
+        if self.ciclo[i] != ciclo:
+            self.ciclo[i] = ciclo
+            self.cruces[i] = self.llegadas[i] = self.cola_max[i] = 0
+            self.espera[i] = 0.0
+        self.ultimo = max(self.ultimo, ciclo)
+        return i
+
+    def registrar_cruces(self, ciclo: int, n: int, suma_espera: float) -> None:
+        i = self._casilla(ciclo)
+        self.cruces[i] += n
+        self.espera[i] += suma_espera
+
+    def registrar_tick(self, ciclo: int, llegadas: int, cola: int) -> None:
+        i = self._casilla(ciclo)
+        self.llegadas[i] += llegadas
+        if cola > self.cola_max[i]:
+            self.cola_max[i] = cola
+
+    def ciclos(self, hasta: int | None = None) -> List[Dict[str, Any]]:
+        """Los ciclos guardados hasta `hasta` inclusive (por defecto todos), del más viejo al más nuevo."""
+        hasta = self.ultimo if hasta is None else min(hasta, self.ultimo)
+        out = []
+        for c in range(max(0, hasta - self.n + 1), hasta + 1):
+            i = c % self.n
+            if self.ciclo[i] != c:
+                continue  # ciclo sin actividad registrada
+            out.append({
+                "ciclo": c,
+                "cruzaron": self.cruces[i],
+                "llegadas": self.llegadas[i],
+                "espera_prom": round(self.espera[i] / self.cruces[i], 2) if self.cruces[i] else 0.0,
+                "cola_max": self.cola_max[i],
+            })
+        return out
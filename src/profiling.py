@@ -0,0 +1,237 @@
+"""Perfilado por hilo y por proceso (`--profile`).
+
+La configuración viaja en una variable de entorno para que los procesos hijos
+la hereden tanto con fork como con spawn. Cada worker (Semaforo-N, Controlador,
+GUI, ...) se ejecuta con `run_profiled`, que escribe un archivo por worker;
+`merge_reports` los junta al final de la corrida.
+
+Desde Python 3.12 cProfile usa `sys.monitoring`, que admite un solo perfilador
+por proceso y ve todos los hilos: ahí los workers de un mismo proceso (modo
+hilos y pool) comparten un perfil, que se escribe con todos sus nombres
+(`Headless+Semaforo-N+...`) cuando termina el último.
+"""
+import io
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+ENV_VAR = "TRAFFIC_PROFILE"
+MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL = 0.005  # segundos entre muestras
+
+_seq = itertools.count()
+
+
+def configure(mode: str, out_dir: str | Path) -> Path:
+    """Activa el perfilado para este proceso y sus hijos. Devuelve el directorio de la corrida."""
+    if mode not in MODES:
+        raise ValueError(f"modo de perfilado desconocido: {mode}")
+    run_dir = Path(out_dir).resolve() / f"run-{time.strftime('%Y%m%d-%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    os.environ[ENV_VAR] = f"{mode}:{run_dir}"
+    return run_dir
+
+
+def settings() -> Tuple[str, Path] | None:
+    value = os.environ.get(ENV_VAR)
+    if not value:
+        return None
+    mode, _, out_dir = value.partition(":")
+    return mode, Path(out_dir)
+
+
+def _output_path(out_dir: Path, name: str, ext: str) -> Path:
+    return out_dir / f"{name}.{os.getpid()}.{next(_seq)}.{ext}"
+
+
+def run_profiled(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Ejecuta `fn` perfilando el hilo actual bajo la etiqueta `name`.
+
+    Sin perfilado activo es una llamada directa. Se usa como `target` de hilos
+    y procesos (es una función de módulo, así que se puede picklear).
+    """
+    cfg = settings()
+    if cfg is None:
+        return fn(*args, **kwargs)
+    mode, out_dir = cfg
+
+    if mode == "cprofile" and _PERFIL_POR_PROCESO:
+        _perfil.entrar(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _perfil.salir(out_dir)
+
+    if mode == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+            prof.dump_stats(_output_path(out_dir, name, "prof"))
+
+    sampler = _get_sampler()
+    ident = threading.get_ident()
+    sampler.add(ident, name)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        counts = sampler.remove(ident)
+        with open(_output_path(out_dir, name, "folded"), "w") as f:
+            for stack, n in counts.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+# ---------- cProfile compartido (Python >= 3.12) ----------
+
+_PERFIL_POR_PROCESO = sys.version_info >= (3, 12)
+
+
+class _PerfilCompartido:
+    """Un `cProfile.Profile` por proceso, activo mientras corra algún worker."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._prof: Any = None
+        self._pid: int | None = None
+        self._nombres: list = []
+        self._activos = 0
+
+    def entrar(self, name: str) -> None:
+        with self._lock:
+            if self._prof is not None and self._pid != os.getpid():
+                # heredado por fork: sigue ocupando el perfilador de este proceso
+                self._prof.disable()
+                self._prof = None
+            if self._prof is None:
+                import cProfile
+                self._prof = cProfile.Profile()
+                self._prof.enable()
+                self._pid, self._nombres, self._activos = os.getpid(), [], 0
+            self._nombres.append(name)
+            self._activos += 1
+
+    def salir(self, out_dir: Path) -> None:
+        with self._lock:
+            self._activos -= 1
+            if self._activos > 0:
+                return
+            self._prof.disable()
+            self._prof.dump_stats(_output_path(out_dir, "+".join(self._nombres), "prof"))
+            self._prof = None
+
+
+_perfil = _PerfilCompartido()
+
+
+# ---------- Muestreo ----------
+
+class _Sampler:
+    """Un hilo por proceso que muestrea las pilas de los hilos registrados."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._targets: Dict[int, str] = {}
+        self._counts: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def add(self, ident: int, name: str) -> None:
+        with self._lock:
+            self._targets[ident] = name
+            self._counts[ident] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="Profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, ident: int) -> Counter:
+        with self._lock:
+            self._targets.pop(ident, None)
+            return self._counts.pop(ident, Counter())
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for ident, name in self._targets.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    # se corta en run_profiled: lo de afuera (fork, bootstrap) es ruido
+                    while frame is not None and frame.f_code is not run_profiled.__code__:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}")
+                        frame = frame.f_back
+                    stack.append(name)
+                    self._counts[ident][";".join(reversed(stack))] += 1
+
+
+_sampler: _Sampler | None = None
+_sampler_pid: int | None = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler() -> _Sampler:
+    global _sampler, _sampler_pid
+    with _sampler_lock:
+        # tras un fork el muestreador del padre no tiene hilo en el hijo
+        if _sampler is None or _sampler_pid != os.getpid():
+            _sampler = _Sampler()
+            _sampler_pid = os.getpid()
+        return _sampler
+
+
+# ---------- Reporte combinado ----------
+
+def merge_reports(run_dir: str | Path, top: int = 25) -> Path | None:
+    """Junta los archivos de todos los workers en un solo reporte.
+
+    cProfile -> `combined.prof` (pstats) + `combined.txt` (resumen por worker y total).
+    Muestreo -> `combined.folded`, apto para flamegraph.pl / speedscope.
+    """
+    run_dir = Path(run_dir)
+    folded = sorted(p for p in run_dir.glob("*.folded") if not p.name.startswith("combined."))
+    if folded:
+        out = run_dir / "combined.folded"
+        merged: Counter = Counter()
+        for path in folded:
+            for line in path.read_text().splitlines():
+                stack, _, n = line.rpartition(" ")
+                if stack:
+                    merged[stack] += int(n)
+        with open(out, "w") as f:
+            for stack, n in merged.most_common():
+                f.write(f"{stack} {n}\n")
+        return out
+
+    profs = sorted(p for p in run_dir.glob("*.prof") if not p.name.startswith("combined."))
+    if not profs:
+        return None
+    import pstats
+    buf = io.StringIO()
+    by_worker: Dict[str, list] = {}
+    for path in profs:
+        by_worker.setdefault(path.name.split(".")[0], []).append(str(path))
+    for worker, paths in sorted(by_worker.items()):
+        stats = pstats.Stats(*paths, stream=buf)
+        buf.write(f"===== {worker} ({len(paths)} archivo/s) | {stats.total_tt:.3f}s =====\n")
+        stats.sort_stats("cumulative").print_stats(top)
+    combined = pstats.Stats(*map(str, profs), stream=buf)
+    buf.write(f"===== TOTAL | {combined.total_tt:.3f}s =====\n")
+    combined.sort_stats("cumulative").print_stats(top)
+    combined.dump_stats(run_dir / "combined.prof")
+    out = run_dir / "combined.txt"
+    out.write_text(buf.getvalue())
+    return out
@@ -0,0 +1,122 @@
+import json
+import mmap
+from array import array
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    _NUMPY_AVAILABLE = True
+except ImportError:
+    _NUMPY_AVAILABLE = False
+    np = None  # type: ignore
+
+# nombre -> typecode de `array` (un archivo crudo por columna)
+COLUMNAS: List[Tuple[str, str]] = [
+    ("id", "q"),
+    ("origen", "B"),
+    ("t_llegada", "d"),
+    ("t_salida", "d"),
+    ("ciclo", "i"),
+]
+_NUMPY_DTYPES = {"q": "<i8", "B": "u1", "d": "<f8", "i": "<i4"}
+
+_ID = attrgetter("id")
+_T_LLEGADA = attrgetter("t_llegada")
+
+
+class ColumnarSink:
+    """Registro por vehículo en columnas; se vuelca a disco en bloques grandes.
+
+    Cada columna es un archivo `<nombre>.bin` de valores nativos contiguos, más
+    un `meta.json` con typecodes, códigos de origen y número de filas.
+    """
+
+    def __init__(self, path: str | Path, chunk_rows: int = 65536):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self.filas = 0
+        self._cols: Dict[str, array] = {nombre: array(tc) for nombre, tc in COLUMNAS}
+        self._files = {nombre: open(self.path / f"{nombre}.bin", "wb") for nombre, _ in COLUMNAS}
+        self._origenes: Dict[str, int] = {}
+
+    def registrar(self, lote: list, t_salida: float, ciclo: int, origen: str) -> None:
+        """Añade un lote de vehículos que cruzaron juntos en `t_salida`."""
+        k = len(lote)
+        if k == 0:
+            return
+        codigo = self._origenes.get(origen)
+        if codigo is None:
+            codigo = self._origenes[origen] = len(self._origenes)
+        cols = self._cols
+        cols["id"].extend(map(_ID, lote))
+        cols["t_llegada"].extend(map(_T_LLEGADA, lote))
+        cols["origen"].frombytes(bytes((codigo,)) * k)
+        cols["t_salida"].extend((t_salida,) * k)
+        cols["ciclo"].extend((ciclo,) * k)
+        if len(cols["id"]) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        n = len(self._cols["id"])
+        if n == 0:
+            return
+        for nombre, col in self._cols.items():
+            col.tofile(self._files[nombre])
+            del col[:]
+        self.filas += n
+        self._write_meta()
+
+    def close(self) -> None:
+        if not self._files:
+            return
+        self.flush()
+        self._write_meta()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def _write_meta(self) -> None:
+        meta = {
+            "filas": self.filas,
+            "columnas": dict(COLUMNAS),
+            "origenes": {str(c): o for o, c in self._origenes.items()},
+        }
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        tmp.replace(self.path / "meta.json")
+
+
+def load_columns(path: str | Path) -> Tuple[Dict[str, object], Dict[int, str]]:
+    """Mapea en memoria las columnas de un directorio escrito por `ColumnarSink`.
+
+    Devuelve (columnas, origenes). Las columnas son `numpy.memmap` si numpy está
+    disponible, si no `memoryview` tipadas; en ambos casos no se copian datos.
+    """
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text())
+    filas = meta["filas"]
+    columnas: Dict[str, object] = {}
+    for nombre, tc in meta["columnas"].items():
+        archivo = path / f"{nombre}.bin"
+        if filas == 0:
+            columnas[nombre] = np.empty(0, dtype=_NUMPY_DTYPES[tc]) if _NUMPY_AVAILABLE else memoryview(array(tc))
+            continue
+        if _NUMPY_AVAILABLE:
+            columnas[nombre] = np.memmap(archivo, dtype=_NUMPY_DTYPES[tc], mode="r", shape=(filas,))
+            continue
+        with open(archivo, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        itemsize = array(tc).itemsize
+        columnas[nombre] = memoryview(mm)[:filas * itemsize].cast(tc)
+    origenes = {int(c): o for c, o in meta["origenes"].items()}
+    return columnas, origenes
+
+
+def iter_parts(root: str | Path) -> Iterator[Tuple[Path, Tuple[Dict[str, object], Dict[int, str]]]]:
+    """Recorre las particiones (`part-*`) de una corrida, una por worker."""
+    for part in sorted(Path(root).glob("part-*")):
+        if (part / "meta.json").exists():
+            yield part, load_columns(part)
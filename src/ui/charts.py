@@ -0,0 +1,52 @@
+"""Fila de gráficos de líneas sobre un Canvas, compartida por las dos GUIs.
+
+Los items (marco, título, máximo y una línea por serie) se crean una sola
+vez; cada actualización solo mueve coordenadas, así que redibujar no crea
+ni borra nada en el Canvas.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+Serie = Tuple[List[float], List[float]]  # (tiempos, valores)
+
+
+class LineCharts:
+    def __init__(self, canvas: Any, charts: Sequence[Tuple[str, str]], colors: Dict[str, str],
+                 width: int, height: int):
+        """`charts`: (clave, título) de cada gráfico; `colors`: color de cada serie; `width`: ancho de cada gráfico."""
+        self.canvas = canvas
+        self.charts = list(charts)
+        self.width = width
+        self.height = height
+        self._max: Dict[str, int] = {}
+        self._lines: Dict[str, Dict[str, int]] = {}
+        c = canvas
+        for k, (clave, titulo) in enumerate(self.charts):
+            x0 = k * width + 6
+            c.create_rectangle(x0, 16, x0 + width - 12, height - 2, outline="#cccccc")
+            c.create_text(x0, 2, text=titulo, anchor="nw", font=("Arial", 9, "bold"))
+            self._max[clave] = c.create_text(x0 + width - 12, 2, text="", anchor="ne", font=("Arial", 8))
+            self._lines[clave] = {
+                serie: c.create_line(0, 0, 0, 0, fill=color, width=1.5, state="hidden")
+                for serie, color in colors.items()
+            }
+
+    def update(self, data: Dict[str, Dict[str, Serie]]) -> None:
+        """`data[clave][serie]` -> (tiempos, valores); cada gráfico se escala a su máximo."""
+        c = self.canvas
+        for k, (clave, _) in enumerate(self.charts):
+            series = data.get(clave, {})
+            top = max((max(vs) for _, vs in series.values() if vs), default=0.0) or 1.0
+            c.itemconfig(self._max[clave], text=f"máx {top:.1f}")
+            x0, y0, x1, y1 = k * self.width + 8, 18, (k + 1) * self.width - 8, self.height - 4
+            for serie, line in self._lines[clave].items():
+                ts, vs = series.get(serie, ([], []))
+                if len(vs) < 2 or ts[-1] <= ts[0]:
+                    c.itemconfig(line, state="hidden")
+                    continue
+                sx = (x1 - x0) / (ts[-1] - ts[0])
+                sy = (y1 - y0) / top
+                coords = []
+                for ti, v in zip(ts, vs):
+                    coords += [x0 + (ti - ts[0]) * sx, y1 - v * sy]
+                c.coords(line, *coords)
+                c.itemconfig(line, state="normal")
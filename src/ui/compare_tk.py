@@ -0,0 +1,285 @@
+"""Comparación en vivo de varios backends en una misma sesión.
+
+Cada backend corre su propia simulación, todas a la vez, con la misma fuente
+de llegadas (misma semilla) y la misma config. Cada uno tiene su panel con la
+intersección en miniatura y sus números; abajo, gráficos compartidos con una
+línea por backend para ticks/s, jitter del tick, latencia de `get_snapshot` y
+CPU. Al correr juntas compiten por los mismos núcleos (y los backends de
+hilos, además, por el GIL con la GUI): la diferencia se mide en las mismas
+condiciones y no entre corridas sucesivas.
+"""
+import math
+import time
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Dict, List, Sequence
+
+from ..concurrency.base import BaseSimulation
+from ..config import TICK
+from ..headless import create_simulation, options_for
+from ..history import SnapshotHistory
+from ..metrics import period_stats, tick_period
+from ..models.fases import VERDE, codigo_luz
+from .charts import LineCharts
+from .gui_tk import CHART_H, CHART_POINTS, DIRS, LIGHT_ON
+
+PANE_W = 300
+PANE_H = 240
+ROAD = 36  # ancho de la calle en el panel
+QUEUE_MAX = 15  # vehículos que entran en la barra de cola
+SAMPLE_MS = 500
+CHART_W = 260
+
+MODE_COLORS = {"threads": "#e53935", "processes": "#1e88e5", "pool": "#43a047"}
+# (clave, título) de cada gráfico compartido
+TIMING = [("tps", "Ticks/s por semáforo"), ("jitter_ms", "Jitter del tick (ms)"),
+          ("snap_ms", "Snapshot (ms)"), ("cpu_pct", "CPU (%)")]
+
+
+class _Panel:
+    """Una simulación, su miniatura y las lecturas anteriores para calcular tasas."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.sim: BaseSimulation | None = None
+        self.canvas: tk.Canvas
+        self.lbl_stats: ttk.Label
+        self.lbl_timing: ttk.Label
+        self.lights: Dict[str, int] = {}
+        self.bars: Dict[str, int] = {}
+        self.counts: Dict[str, int] = {}
+        self.geo: Dict[str, tuple] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.prev: tuple | None = None  # (t, ticks, suma de períodos, cuadrados, cpu)
+        self.first: tuple | None = None
+        self.snap_sum = 0.0
+        self.snaps = 0
+        self.done = False  # terminó sus ciclos: los totales no incluyen el tiempo ocioso posterior
+        self.last: List[float] = [0.0] * len(TIMING)
+
+
+class ComparisonGUI:
+    def __init__(self, modes: Sequence[str], cycles: int, system_info: Dict[str, Any],
+                 sim_options: Dict[str, Any] | None = None):
+        if len(modes) < 2 or len(set(modes)) != len(modes):
+            raise ValueError("la comparación necesita al menos dos backends distintos")
+        self.system_info = system_info
+        self.cycles_target = cycles
+        self.sim_options = sim_options or {}
+        self.panels = [_Panel(m) for m in modes]
+        self._closing = False
+
+        self.history = SnapshotHistory(series=[f"{p.mode}.{k}" for p in self.panels for k, _ in TIMING])
+        self._line_charts: LineCharts | None = None
+
+        self.root = tk.Tk()
+        self.root.title("Simulación de Tráfico - Comparación de backends")
+        self._build_ui()
+        self._start_all()
+        self._tick_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _build_ui(self) -> None:
+        top = ttk.Frame(self.root, padding=10)
+        top.pack(fill="x")
+        fuente = self.sim_options.get("fuente")
+        huella = fuente.huella() if fuente is not None else None
+        info_txt = (
+            f"Python: {self.system_info['python_version']}\n"
+            f"OS: {self.system_info['os']} | CPU cores: {self.system_info['cpu_count']}\n"
+            f"Ciclos objetivo: {self.cycles_target} | Llegadas: {huella or 'sin semilla'}"
+        )
+        ttk.Label(top, text=info_txt, justify="left").pack(anchor="w")
+
+        panes = ttk.Frame(self.root, padding=(10, 0))
+        panes.pack(fill="x")
+        for col, p in enumerate(self.panels):
+            frame = ttk.Frame(panes, padding=4)
+            frame.grid(row=0, column=col, sticky="n")
+            uses_gil = "Habilitado" if p.mode in ("threads", "pool") else "Deshabilitado"
+            ttk.Label(frame, text=f"{p.mode.upper()} | GIL: {uses_gil}", foreground=MODE_COLORS.get(p.mode, "#111"),
+                      font=("Arial", 11, "bold")).pack(anchor="w")
+            p.canvas = tk.Canvas(frame, width=PANE_W, height=PANE_H, bg="#f4f4f4", highlightthickness=0)
+            p.canvas.pack(pady=4)
+            self._init_pane(p)
+            p.lbl_stats = ttk.Label(frame, text="", justify="left", font=("Courier", 9))
+            p.lbl_stats.pack(anchor="w")
+            p.lbl_timing = ttk.Label(frame, text="", justify="left", font=("Courier", 9))
+            p.lbl_timing.pack(anchor="w", pady=(4, 0))
+
+        bottom = ttk.Frame(self.root, padding=10)
+        bottom.pack(fill="x")
+        self.charts = tk.Canvas(bottom, width=CHART_W * len(TIMING), height=CHART_H + 14, bg="white",
+                                highlightthickness=0)
+        self.charts.pack(anchor="w")
+        self._init_charts()
+        ttk.Button(bottom, text="Reiniciar todas", command=self._restart_all).pack(anchor="e", pady=(6, 0))
+
+    # ---------- Simulaciones ----------
+
+    def _start_all(self) -> None:
+        for p in self.panels:
+            p.sim = create_simulation(p.mode, self.cycles_target, **options_for(p.mode, self.sim_options))
+        # se crean todas antes de arrancar: el arranque lento de una no atrasa a las otras
+        for p in self.panels:
+            p.sim.start()
+        print(f"[COMPARE] Corriendo a la vez: {', '.join(p.mode.upper() for p in self.panels)}")
+
+    def _stop_all(self) -> None:
+        for p in self.panels:
+            if p.sim is None:
+                continue
+            try:
+                p.sim.stop()
+            except Exception:
+                pass
+        for p in self.panels:
+            if p.first is not None and p.prev is not None:
+                print(f"[COMPARE] {p.mode.upper()}: {self._timing_text(self._totals(p))}")
+            p.sim = None
+            p.reset()
+
+    def _restart_all(self) -> None:
+        self._stop_all()
+        self.history.clear()
+        self._start_all()
+
+    # ---------- Panel en miniatura ----------
+
+    def _init_pane(self, p: _Panel) -> None:
+        c = p.canvas
+        cx, cy = PANE_W // 2, PANE_H // 2
+        c.create_rectangle(cx - ROAD // 2, 0, cx + ROAD // 2, PANE_H, fill="#bbbbbb", outline="")
+        c.create_rectangle(0, cy - ROAD // 2, PANE_W, cy + ROAD // 2, fill="#bbbbbb", outline="")
+        largo = min(cx, cy) - ROAD // 2 - 14
+        # (luz, barra desde la línea de detención hacia afuera) por dirección
+        geo = {
+            "N": ((cx - ROAD, cy - ROAD), (cx - 8, cy - ROAD // 2, cx - 2, cy - ROAD // 2 - largo)),
+            "S": ((cx + ROAD, cy + ROAD), (cx + 2, cy + ROAD // 2, cx + 8, cy + ROAD // 2 + largo)),
+            "E": ((cx + ROAD, cy - ROAD), (cx + ROAD // 2, cy - 8, cx + ROAD // 2 + largo, cy - 2)),
+            "O": ((cx - ROAD, cy + ROAD), (cx - ROAD // 2, cy + 2, cx - ROAD // 2 - largo, cy + 8)),
+        }
+        p.geo = geo
+        for d, ((lx, ly), _) in geo.items():
+            p.lights[d] = c.create_oval(lx - 7, ly - 7, lx + 7, ly + 7, fill="#333333", outline="#111111")
+            p.bars[d] = c.create_rectangle(0, 0, 0, 0, fill="#555555", outline="")
+            p.counts[d] = c.create_text(lx, ly + (14 if d in ("S", "O") else -14), text=d, font=("Arial", 8))
+
+    def _update_pane(self, p: _Panel, snap: Dict[str, Any]) -> None:
+        c = p.canvas
+        for d in DIRS:
+            s = snap["semaforos"][d]
+            luz = codigo_luz(s["estado"])
+            c.itemconfig(p.lights[d], fill=LIGHT_ON[luz][1] if luz in LIGHT_ON else "#333333")
+            x0, y0, x1, y1 = p.geo[d][1]
+            frac = min(int(s["cola"]), QUEUE_MAX) / QUEUE_MAX
+            if d in ("N", "S"):
+                c.coords(p.bars[d], x0, y0, x1, y0 + (y1 - y0) * frac)
+            else:
+                c.coords(p.bars[d], x0, y0, x0 + (x1 - x0) * frac, y1)
+            c.itemconfig(p.bars[d], fill="#2e7d32" if luz == VERDE else "#555555")
+            c.itemconfig(p.counts[d], text=f"{d} {s['cola']}")
+
+        lineas = [f"Ciclo {snap['cycle']} | Fase {snap['phase']}"]
+        for d in DIRS:
+            s = snap["semaforos"][d]
+            lineas.append(f"{d}: cola={s['cola']:>3} cruzaron={s['cruzaron']:>4} espera={s['espera_prom']:.2f}s")
+        if snap.get("total_time") is not None:
+            lineas.append(f"Terminó en {snap['total_time']}s")
+        p.lbl_stats.config(text="\n".join(lineas))
+
+    # ---------- Tiempos ----------
+
+    def _read(self, p: _Panel) -> tuple:
+        v = p.sim.metrics.read()  # type: ignore[union-attr]
+        return (time.monotonic(), *tick_period(v), p.sim.cpu_seconds())  # type: ignore[union-attr]
+
+    @staticmethod
+    def _rates(a: tuple, b: tuple) -> Dict[str, float]:
+        """Ticks/s, jitter y CPU entre dos lecturas de `_read`."""
+        dt = b[0] - a[0]
+        n = b[1] - a[1]
+        _, jitter = period_stats(n, b[2] - a[2], b[3] - a[3])
+        cpu = (b[4] - a[4]) / dt * 100 if dt > 0 and a[4] is not None and b[4] is not None else math.nan
+        return {
+            "tps": n / len(DIRS) / dt if dt > 0 else 0.0,
+            "jitter_ms": 1000 * jitter,
+            "cpu_pct": cpu,
+        }
+
+    def _totals(self, p: _Panel) -> Dict[str, float]:
+        out = self._rates(p.first, p.prev)  # type: ignore[arg-type]
+        out["snap_ms"] = 1000 * p.snap_sum / max(1, p.snaps)
+        return out
+
+    @staticmethod
+    def _timing_text(m: Dict[str, float]) -> str:
+        cpu = "n/d" if math.isnan(m["cpu_pct"]) else f"{m['cpu_pct']:.0f}%"
+        return (
+            f"ticks/s={m['tps']:.2f} (objetivo {1 / TICK:.2f}) | jitter={m['jitter_ms']:.1f}ms | "
+            f"snapshot={m['snap_ms']:.2f}ms | CPU={cpu}"
+        )
+
+    def _tick_ui(self) -> None:
+        if self._closing:
+            return
+        t = time.monotonic()
+        values: List[float] = []
+        for p in self.panels:
+            if p.sim is None or p.done:
+                values += p.last
+                continue
+            t0 = time.perf_counter()
+            try:
+                snap = p.sim.get_snapshot()
+            except Exception:
+                values += p.last
+                continue
+            lat = time.perf_counter() - t0
+            p.snap_sum += lat
+            p.snaps += 1
+            lectura = self._read(p)
+            m = self._rates(p.prev, lectura) if p.prev is not None else {"tps": 0.0, "jitter_ms": 0.0, "cpu_pct": 0.0}
+            m["snap_ms"] = 1000 * lat
+            if p.first is None:
+                p.first = lectura
+            p.prev = lectura
+            p.done = snap.get("total_time") is not None
+            self._update_pane(p, snap)
+            p.lbl_timing.config(text=self._timing_text(m).replace(" | ", "\n"))
+            p.last = [0.0 if math.isnan(m[k]) else m[k] for k, _ in TIMING]
+            values += p.last
+        self.history.record(t, values)
+        self._update_charts()
+        self.root.after(SAMPLE_MS, self._tick_ui)
+
+    # ---------- Gráficos compartidos ----------
+
+    def _init_charts(self) -> None:
+        c = self.charts
+        colores = {p.mode: MODE_COLORS.get(p.mode, "#111") for p in self.panels}
+        self._line_charts = LineCharts(c, TIMING, colores, CHART_W, CHART_H)
+        x = 6
+        for p in self.panels:
+            c.create_text(x, CHART_H + 2, text=f"— {p.mode}", anchor="nw", fill=MODE_COLORS.get(p.mode, "#111"),
+                          font=("Arial", 8, "bold"))
+            x += 90
+
+    def _update_charts(self) -> None:
+        level = self.history.pick_level(CHART_POINTS)
+        self._line_charts.update({
+            clave: {p.mode: self.history.points(f"{p.mode}.{clave}", level, CHART_POINTS) for p in self.panels}
+            for clave, _ in TIMING
+        })
+
+    # ---------- Cierre ----------
+
+    def _on_close(self) -> None:
+        self._closing = True
+        self._stop_all()
+        self.root.destroy()
+
+    def run(self) -> None:
+        self.root.mainloop()
@@ -1,19 +1,17 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 from pathlib import Path
+import hashlib
+import os
 import random
+import time
 
 from ..concurrency.base import BaseSimulation
-from ..concurrency.threads_impl import ThreadsSimulation
-from ..concurrency.processes_impl import ProcessesSimulation
-
-try:
-    from PIL import Image, ImageTk  # type: ignore
-    _PIL_AVAILABLE = True
-except ImportError:
-    _PIL_AVAILABLE = False
-    Image = ImageTk = None  # type: ignore
+from ..headless import create_simulation, options_for
+from ..history import SnapshotHistory
+from ..models.fases import AMARILLO, NOMBRES_LUZ, ROJO, VERDE, codigo_luz
+from .charts import LineCharts
 
 
 CANVAS_W = 900
@@ -26,6 +24,19 @@ SEM_DISTANCE = 110
 
 DIRS = ["N", "S", "E", "O"]
 
+# Gráficos de historia: (campo del snapshot, título); "cruzaron" se dibuja como flujo
+CHARTS = [("cola", "Cola (veh)"), ("espera_prom", "Espera prom. (s)"), ("cruzaron", "Flujo (veh/h)")]
+CHART_H = 90
+CHART_POINTS = 200  # puntos por línea: el costo de redibujar no crece con la corrida
+# Lámpara encendida y su color por código de luz (APAGADO: ninguna)
+LIGHT_ON = {ROJO: ("R", "#ff2b2b"), AMARILLO: ("Y", "#ffd400"), VERDE: ("G", "#00ff3b")}
+LIGHT_OFF = {"R": "#2b0000", "Y": "#2b2200", "G": "#003300"}
+DIR_COLORS = {"N": "#e53935", "S": "#1e88e5", "E": "#43a047", "O": "#fb8c00"}
+
+BASE_PATH = Path(__file__).resolve().parents[2]
+# Fondo ya redimensionado, en PPM (Tk lo carga sin PIL y sin decodificar JPEG)
+CACHE_DIR = BASE_PATH / ".cache"
+
 # Colores bien visibles sobre mapa
 CAR_COLORS = [
     "#ff1744", "#f50057", "#d500f9", "#651fff", "#2979ff",
@@ -49,16 +60,21 @@ def _darken(hex_color: str, factor: float = 0.55) -> str:
 
 
 class TrafficGUI:
-    def __init__(self, mode: str, cycles: int, system_info: Dict[str, Any]):
+    def __init__(self, mode: str, cycles: int, system_info: Dict[str, Any],
+                 sim_options: Dict[str, Any] | None = None):
         self.system_info = system_info
         self.mode = mode
         self.cycles_target = cycles
+        # kwargs extra para el backend (fuente de llegadas, resultados, ...)
+        self.sim_options = sim_options or {}
         self.sim: BaseSimulation | None = None
         self._resetting = False
+        # se llama al cerrar, con la simulación aún viva (p. ej. el checkpoint final)
+        self.before_stop: Callable[[], Any] | None = None
 
         self.root = tk.Tk()
         self.root.title("Simulación de Tráfico - Intersección (N,S,E,O)")
-        self.root.geometry(f"{CANVAS_W + 120}x{CANVAS_H + 260}")
+        self.root.geometry(f"{CANVAS_W + 120}x{CANVAS_H + 260 + CHART_H}")
 
         self._bg_photo = None
         self._bg_id = None
@@ -66,6 +82,7 @@ class TrafficGUI:
         self._lights: Dict[str, Dict[str, int]] = {}
         self._glow: Dict[str, Dict[str, int]] = {}
         self._dir_label: Dict[str, int] = {}
+        self._light_shown: Dict[str, int | None] = {d: None for d in DIRS}
 
         # carros en cola (reutilizables)
         self._cars: Dict[str, list[int]] = {d: [] for d in DIRS}
@@ -76,6 +93,11 @@ class TrafficGUI:
         self._prev_cola: Dict[str, int] = {d: 0 for d in DIRS}
         self._prev_cruzaron: Dict[str, int] = {d: 0 for d in DIRS}
 
+        # historia de snapshots (memoria fija) para los gráficos
+        self.history = SnapshotHistory()
+        self._line_charts: LineCharts | None = None
+        self._chart_span: int | None = None
+
         self._build_ui()
         self._init_scene()
         self._start_new_simulation(self.mode)
@@ -120,19 +142,23 @@ class TrafficGUI:
         self.lbl_stats = ttk.Label(bottom, text="", justify="left")
         self.lbl_stats.pack(anchor="w", pady=(6, 0))
 
+        self.charts = tk.Canvas(bottom, width=CANVAS_W, height=CHART_H, bg="white", highlightthickness=0)
+        self.charts.pack(anchor="w", pady=(6, 0))
+        self._init_charts()
+
         self.btn_reset = ttk.Button(bottom, text="Reiniciar / Cambiar modo", command=self._reset_simulation)
         self.btn_reset.pack(anchor="e", pady=(6, 0))
 
     # ---------- Gestión de simulación ----------
 
     def _create_simulation(self, mode: str) -> BaseSimulation:
-        selected = (mode or "threads").lower()
-        if selected == "processes":
-            return ProcessesSimulation(cycles=self.cycles_target)
-        return ThreadsSimulation(cycles=self.cycles_target)
+        sim = create_simulation(mode, self.cycles_target, **options_for(mode, self.sim_options))
+        # un checkpoint se reanuda una sola vez; los reinicios empiezan de cero
+        self.sim_options.pop("resume", None)
+        return sim
 
     def _mode_uses_gil(self, mode: str) -> bool:
-        return (mode or "threads").lower() == "threads"
+        return (mode or "threads").lower() in ("threads", "pool")
 
     def _start_new_simulation(self, mode: str) -> None:
         self.mode = (mode or "threads").lower()
@@ -168,9 +194,12 @@ class TrafficGUI:
 
         self.lbl_cycle.config(text="Ciclo: 0 | Fase: 0")
         self.lbl_stats.config(text="")
+        self.history.clear()
+        self._update_charts()
 
     def _reset_simulation(self) -> None:
-        new_mode = self._ask_mode(initial=self.mode)
+        # un visor remoto no elige modo: reiniciar es volver a conectarse
+        new_mode = self.mode if self.mode == "remote" else self._ask_mode(initial=self.mode)
         if not new_mode:
             return
 
@@ -364,11 +393,13 @@ class TrafficGUI:
         for d in DIRS:
             s = sems[d]
             stats_lines.append(
-                f"{d}: estado={s['estado']} | cola={s['cola']} | cruzaron={s['cruzaron']} | espera_prom={s['espera_prom']}s"
+                f"{d}: estado={NOMBRES_LUZ[codigo_luz(s['estado'])]} | cola={s['cola']} | cruzaron={s['cruzaron']} | espera_prom={s['espera_prom']}s"
             )
         self.lbl_stats.config(text="\n".join(stats_lines))
 
         self._update_scene(snap)
+        self.history.record_snapshot(time.monotonic(), snap)
+        self._update_charts()
         self.root.after(150, self._tick_ui)
 
     def _update_scene(self, snap: Dict[str, Any]):
@@ -382,7 +413,7 @@ class TrafficGUI:
         }
 
         for d, (x, y) in pos.items():
-            estado = str(sems[d]["estado"])
+            estado = codigo_luz(sems[d]["estado"])
             cola = int(sems[d]["cola"])
             cruzaron = int(sems[d]["cruzaron"])
 
@@ -431,36 +462,30 @@ class TrafficGUI:
         self.canvas.tag_raise("cars")
         self.canvas.tag_raise("moving")
 
-    def _set_light(self, d: str, estado: str):
+    def _set_light(self, d: str, estado: int):
+        # solo se toca el canvas si la luz cambió
+        if self._light_shown[d] == estado:
+            return
+        self._light_shown[d] = estado
         c = self.canvas
 
-        # apagado base (oscuro)
-        c.itemconfig(self._lights[d]["R"], fill="#2b0000")
-        c.itemconfig(self._lights[d]["Y"], fill="#2b2200")
-        c.itemconfig(self._lights[d]["G"], fill="#003300")
-
-        # apaga glows
-        c.itemconfig(self._glow[d]["R"], outline="")
-        c.itemconfig(self._glow[d]["Y"], outline="")
-        c.itemconfig(self._glow[d]["G"], outline="")
-
-        if estado == "ROJO":
-            c.itemconfig(self._lights[d]["R"], fill="#ff2b2b")
-            c.itemconfig(self._glow[d]["R"], outline="white")
-        elif estado == "AMARILLO":
-            c.itemconfig(self._lights[d]["Y"], fill="#ffd400")
-            c.itemconfig(self._glow[d]["Y"], outline="white")
-        elif estado == "VERDE":
-            c.itemconfig(self._lights[d]["G"], fill="#00ff3b")
-            c.itemconfig(self._glow[d]["G"], outline="white")
-
-    def _draw_queue_cars(self, d: str, x: int, y: int, cola: int, estado: str):
+        # apagado base (oscuro) y sin glow
+        for lamp, fill in LIGHT_OFF.items():
+            c.itemconfig(self._lights[d][lamp], fill=fill)
+            c.itemconfig(self._glow[d][lamp], outline="")
+
+        if estado in LIGHT_ON:
+            lamp, fill = LIGHT_ON[estado]
+            c.itemconfig(self._lights[d][lamp], fill=fill)
+            c.itemconfig(self._glow[d][lamp], outline="white")
+
+    def _draw_queue_cars(self, d: str, x: int, y: int, cola: int, estado: int):
         c = self.canvas
         cars = self._cars[d]
         colors = self._queue_colors[d]
 
         show = min(cola, self._max_cars_draw)
-        dark = (estado != "VERDE")  # si no está verde, se ven “apagados”
+        dark = (estado != VERDE)  # si no está verde, se ven “apagados”
 
         # más grandes para que se noten
         if d == "N":
@@ -496,6 +521,36 @@ class TrafficGUI:
         for i in range(show, len(cars)):
             c.itemconfig(cars[i], state="hidden")
 
+    # ---------- Gráficos de historia ----------
+
+    def _init_charts(self) -> None:
+        """Una línea por dirección en cada gráfico."""
+        c = self.charts
+        self._line_charts = LineCharts(c, CHARTS, {d: DIR_COLORS[d] for d in DIRS}, CANVAS_W // len(CHARTS), CHART_H)
+        self._chart_span = c.create_text(CANVAS_W - 6, CHART_H - 4, text="", anchor="se", font=("Arial", 8),
+                                         fill="#666666")
+
+    def _update_charts(self) -> None:
+        c = self.charts
+        level = self.history.pick_level(CHART_POINTS)
+        ts: list[float] = []
+        data = {}
+        for campo, _ in CHARTS:
+            series = {}
+            for d in DIRS:
+                ts, vs = self.history.points(f"{d}.{campo}", level, CHART_POINTS)
+                if campo == "cruzaron":
+                    # acumulado -> veh/h entre muestras consecutivas
+                    vs = [max(0.0, (vs[i] - vs[i - 1]) / (ts[i] - ts[i - 1]) * 3600.0) if ts[i] > ts[i - 1] else 0.0
+                          for i in range(1, len(vs))]
+                    ts = ts[1:]
+                series[d] = (ts, vs)
+            data[campo] = series
+        self._line_charts.update(data)
+        if self._chart_span is not None:
+            span = ts[-1] - ts[0] if len(ts) > 1 else 0.0
+            c.itemconfig(self._chart_span, text=f"últimos {span / 60:.1f} min | nivel {level}" if span else "")
+
     # ---------- Animación de cruce (el mismo color que salió de la cola) ----------
 
     def _spawn_crossing_car(self, d: str, color: str):
@@ -560,6 +615,8 @@ class TrafficGUI:
     def _on_close(self):
         if self.sim is not None:
             try:
+                if self.before_stop is not None:
+                    self.before_stop()
                 self.sim.stop()
             except Exception:
                 pass
@@ -571,20 +628,38 @@ class TrafficGUI:
         self.root.mainloop()
 
     def _load_background(self) -> None:
-        if not _PIL_AVAILABLE:
-            return
-
-        base_path = Path(__file__).resolve().parents[2]
         for candidate in ("fondo2.jpeg", "fondo.jpeg"):
-            img_path = base_path / candidate
+            img_path = BASE_PATH / candidate
             if not img_path.exists():
                 continue
             try:
-                with Image.open(img_path) as img:  # type: ignore[arg-type]
-                    resampling = getattr(Image, "Resampling", Image)
-                    resized = img.resize((CANVAS_W, CANVAS_H), resampling.LANCZOS)  # type: ignore[attr-defined]
-                    self._bg_photo = ImageTk.PhotoImage(resized)  # type: ignore[arg-type]
-                    return
+                cached = cached_background(img_path, CANVAS_W, CANVAS_H)
+                self._bg_photo = tk.PhotoImage(file=str(cached)) if cached is not None else None
             except Exception:
                 self._bg_photo = None
-                return
+            return
+
+
+def cached_background(img_path: Path, width: int, height: int) -> Path | None:
+    """Ruta del fondo redimensionado en caché; lo genera (con PIL) si no existe.
+
+    La clave es el hash del archivo original más el tamaño del canvas, así que
+    cambiar la imagen o las dimensiones invalida la caché sola. Devuelve None si
+    hace falta generarlo y PIL no está instalado.
+    """
+    digest = hashlib.sha1(img_path.read_bytes()).hexdigest()[:16]
+    cached = CACHE_DIR / f"{img_path.stem}-{digest}-{width}x{height}.ppm"
+    if cached.exists():
+        return cached
+    try:
+        from PIL import Image  # type: ignore
+    except ImportError:
+        return None
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(img_path) as img:
+        resampling = getattr(Image, "Resampling", Image)
+        resized = img.convert("RGB").resize((width, height), resampling.LANCZOS)  # type: ignore[attr-defined]
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    resized.save(tmp, format="PPM")
+    os.replace(tmp, cached)
+    return cached
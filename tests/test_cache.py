@@ -0,0 +1,42 @@
+import os
+
+from src.cache import RESULT_FILE, ResultCache, clave
+
+
+def _tamano(path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def test_expulsa_la_menos_usada(tmp_path):
+    cache = ResultCache(tmp_path)
+    for i, key in enumerate("abc"):
+        cache.put(key, {"i": i}, {"valor": i})
+        os.utime(tmp_path / key / RESULT_FILE, (1000 + i, 1000 + i))
+    # leer "a" la renueva: la menos usada pasa a ser "b"
+    assert cache.get("a")["result"] == {"valor": 0}
+    cache.max_bytes = _tamano(tmp_path / "a") + _tamano(tmp_path / "c")
+    assert cache.evict() == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "c"]
+
+
+def test_put_no_expulsa_la_recien_guardada(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1)
+    cache.put("a", {}, 1)
+    cache.put("b", {}, 2)
+    assert cache.get("a") is None
+    assert cache.get("b")["result"] == 2
+    assert cache.evicted == 1
+
+
+def test_desactivada_no_toca_el_disco(tmp_path):
+    cache = ResultCache(tmp_path / "c", enabled=False)
+    cache.put("a", {}, 1)
+    assert cache.get("a") is None
+    assert not (tmp_path / "c").exists()
+
+
+def test_clave_cambia_con_params_y_config():
+    base = clave({"cycles": 3})
+    assert clave({"cycles": 3}) == base
+    assert clave({"cycles": 4}) != base
+    assert clave({"cycles": 3}, {"GREEN_TIME": 99.0}) != base
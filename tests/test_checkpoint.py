@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from src.checkpoint import read_checkpoint, write_checkpoint
+from src.headless import create_simulation
+from src.models.llegadas import FuenteBernoulli
+
+MODES = ["threads", "processes"]
+
+
+def _opciones():
+    # una llegada por tick y dirección; E y O arrancan en rojo: 2 en cola y el resto en disco
+    return {"fuente": FuenteBernoulli(1.0, seed=0), "queue_capacity": 2, "queue_policy": "spill"}
+
+
+def _correr(sim, segundos):
+    sim.start()
+    try:
+        time.sleep(segundos)
+        return sim.checkpoint_state()
+    finally:
+        sim.stop()
+
+
+def _ids(s):
+    return [v.id for v in s["cola"]] + [i for i, _ in s["derrame"]]
+
+
+@pytest.fixture(scope="module", params=MODES)
+def guardado(request, tmp_path_factory):
+    """(captura en vivo, la misma leída del archivo) de una corrida con vehículos derramados."""
+    state = _correr(create_simulation(request.param, 20, **_opciones()), 1.2)
+    path = tmp_path_factory.mktemp("ck") / "estado.tsck"
+    write_checkpoint(state, path)
+    return state, read_checkpoint(path)
+
+
+def test_archivo_conserva_colas_y_derrame(guardado):
+    state, leido = guardado
+    assert any(s["derrame"] for s in state["semaforos"].values())
+    for d, s in state["semaforos"].items():
+        r = leido["semaforos"][d]
+        assert [v.id for v in r["cola"]] == [v.id for v in s["cola"]]
+        assert [i for i, _ in r["derrame"]] == [i for i, _ in s["derrame"]]
+        # las llegadas quedan relativas al instante de captura (t_captura = 0)
+        edades = [state["t_captura"] - t for _, t in s["derrame"]]
+        assert [-t for _, t in r["derrame"]] == pytest.approx(edades)
+        assert r["campos"]["pos_llegadas"] == s["campos"]["pos_llegadas"]
+        assert r["campos"]["creados"] == s["campos"]["creados"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_reanudar_restaura_derrame_y_sigue_los_ids(guardado, mode):
+    _, leido = guardado
+    sim = create_simulation(mode, 20, resume=leido, **_opciones())
+    # antes de arrancar, la captura es exactamente lo restaurado (derrame incluido)
+    inicial = sim.checkpoint_state()
+    for d, s in leido["semaforos"].items():
+        assert [i for i, _ in inicial["semaforos"][d]["derrame"]] == [i for i, _ in s["derrame"]]
+
+    state = _correr(sim, 1.0)
+    ids = [i for s in state["semaforos"].values() for i in _ids(s)]
+    assert len(ids) == len(set(ids))
+    for d, s in state["semaforos"].items():
+        # los ids siguen numerando por encima de los restaurados (cada backend numera a su modo)
+        previos = set(_ids(leido["semaforos"][d]))
+        nuevos = set(_ids(s)) - previos
+        assert nuevos and min(nuevos) > max(previos, default=0)
+        # el lector de llegadas siguió desde donde quedó, no desde el principio
+        assert s["campos"]["pos_llegadas"][1] > leido["semaforos"][d]["campos"]["pos_llegadas"][1]
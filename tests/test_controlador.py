@@ -0,0 +1,17 @@
+import pytest
+
+from src.models.controlador import ControladorTrafico
+from src.models.fases import PlanFases
+
+PLAN_3 = PlanFases((("N",), ("S",), ("E", "O")))
+
+
+def test_verdes_deben_cubrir_el_plan():
+    with pytest.raises(ValueError):
+        ControladorTrafico(verdes=(2.0, 3.0), plan=PLAN_3)
+    assert ControladorTrafico(verdes=(2.0, 3.0, 1.0), plan=PLAN_3).verde_actual() == 2.0
+
+
+def test_fase_reanudada_fuera_del_plan():
+    with pytest.raises(ValueError):
+        ControladorTrafico(fase_idx=3, verdes=None, plan=PLAN_3)
@@ -0,0 +1,31 @@
+import pytest
+
+from src.models.fases import AMARILLO, ROJO, VERDE, PlanFases, codigo_luz
+
+
+def test_plan_precalcula_verdes_rojos_y_luces():
+    plan = PlanFases((("N",), ("S",), ("E", "O")))
+    assert len(plan) == 3
+    assert plan.aproximaciones == ("N", "S", "E", "O")
+    assert plan.verdes[2] == ("E", "O")
+    assert plan.rojos[2] == ("N", "S")
+    assert plan.luces[0] == (bytes([VERDE, ROJO, ROJO, ROJO]), bytes([AMARILLO, ROJO, ROJO, ROJO]))
+
+
+def test_plan_con_giros_solo_fuera_de_los_backends_en_vivo():
+    plan = PlanFases((("N", "N.izq"), ("S",), ("E", "O")))
+    assert plan.aproximaciones == ("N", "S", "E", "O", "N.izq")
+    with pytest.raises(ValueError):
+        plan.exigir()
+
+
+def test_plan_vacio_o_fase_vacia():
+    with pytest.raises(ValueError):
+        PlanFases(())
+    with pytest.raises(ValueError):
+        PlanFases((("N",), ()))
+
+
+def test_codigo_luz_acepta_nombres_de_checkpoints_viejos():
+    assert codigo_luz("VERDE") == VERDE
+    assert codigo_luz(ROJO) == ROJO
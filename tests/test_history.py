@@ -0,0 +1,33 @@
+from src.history import SnapshotHistory
+
+
+def test_niveles_resumen_min_media_max():
+    h = SnapshotHistory(series=["a"], levels=[(1, 4), (2, 3)])
+    for t in range(8):
+        h.record(float(t), [float(t)])
+    # crudo: las últimas 4 muestras
+    assert h.points("a", 0) == ([4.0, 5.0, 6.0, 7.0], [4.0, 5.0, 6.0, 7.0])
+    # nivel 1: pares (0,1) (2,3) ... de los que quedan los últimos 3
+    ts, medias = h.points("a", 1)
+    assert ts == [2.0, 4.0, 6.0]
+    assert medias == [2.5, 4.5, 6.5]
+    assert h.points("a", 1, stat="min")[1] == [2.0, 4.0, 6.0]
+    assert h.points("a", 1, stat="max")[1] == [3.0, 5.0, 7.0]
+    assert h.points("a", 1, last=1) == ([6.0], [6.5])
+
+
+def test_memoria_fija_y_nivel_elegido():
+    h = SnapshotHistory(series=["a", "b"], levels=[(1, 10), (5, 10)])
+    antes = h.memory_bytes()
+    for t in range(1000):
+        h.record(float(t), [1.0, 2.0])
+    assert h.memory_bytes() == antes
+    assert h.pick_level(20) == 1
+    assert h.pick_level(40) == 0
+
+
+def test_snapshot_por_direccion():
+    h = SnapshotHistory(levels=[(1, 2)])
+    sems = {d: {"cola": 1, "cruzaron": 2, "espera_prom": 0.5} for d in "NSEO"}
+    h.record_snapshot(1.0, {"semaforos": sems})
+    assert h.points("E.cruzaron") == ([1.0], [2.0])
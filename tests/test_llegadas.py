@@ -0,0 +1,28 @@
+from src.models.llegadas import FuenteBernoulli, leer_traza
+
+
+def test_bernoulli_reanuda_en_la_misma_extraccion():
+    fuente = FuenteBernoulli(0.3, seed=7)
+    a = fuente.abrir("N")
+    for t in range(20):
+        a.llegadas(t)
+    b = fuente.abrir("N")
+    b.saltar(a.posicion())
+    assert [a.llegadas(t) for t in range(20, 80)] == [b.llegadas(t) for t in range(20, 80)]
+
+
+def test_bernoulli_reanuda_con_una_llegada_adelantada():
+    # modo por eventos: el éxito ya sorteado por proxima_llegada no se pierde ni se duplica
+    fuente = FuenteBernoulli(0.1, seed=3)
+    a = fuente.abrir("E")
+    t = a.proxima_llegada(0.0, 0.2, 500)
+    b = fuente.abrir("E")
+    b.saltar(a.posicion())
+    assert a.llegadas(t) == b.llegadas(t) == 1
+    assert [a.llegadas(i) for i in range(60)] == [b.llegadas(i) for i in range(60)]
+
+
+def test_csv_salta_filas_mal_formadas(tmp_path):
+    path = tmp_path / "traza.csv"
+    path.write_text("t,direccion,conteo\n1.0,N,2\n2.0\n3.0,N\n4.0,N,x\n5.0,N,3\n6.0,S,1\n")
+    assert list(leer_traza(path, "N")) == [(1.0, 2), (5.0, 3)]
@@ -0,0 +1,33 @@
+from src.models.ventanas import HistorialCiclos, VentanaDeslizante
+
+
+def test_ventana_olvida_lo_que_sale():
+    v = VentanaDeslizante(ancho=10.0, cubetas=10)
+    v.registrar_cruces(0.5, 4, 8.0)
+    v.registrar_tick(0.5, 6, 3)
+    r = v.resumen()
+    assert r["espera_prom"] == 2.0
+    assert r["cola_max"] == 3
+    # pasada una ventana entera, la primera cubeta ya no cuenta
+    v.registrar_cruces(11.0, 1, 1.0)
+    r = v.resumen()
+    assert r["espera_prom"] == 1.0
+    assert r["cola_max"] == 0
+    # el lapso son las 9 cubetas enteras más lo transcurrido de la actual (nada, en t=11)
+    assert r["flujo_vh"] == round(3600.0 / 9.0, 1)
+
+
+def test_ventana_vacia():
+    assert VentanaDeslizante().resumen() == {"flujo_vh": 0.0, "llegadas_vh": 0.0, "espera_prom": 0.0, "cola_max": 0}
+
+
+def test_historial_guarda_los_ultimos_n_ciclos():
+    h = HistorialCiclos(n=3)
+    for c in range(5):
+        h.registrar_tick(c, c + 1, c)
+        h.registrar_cruces(c, 2, 2.0 * c)
+    ciclos = h.ciclos()
+    assert [x["ciclo"] for x in ciclos] == [2, 3, 4]
+    assert ciclos[-1] == {"ciclo": 4, "cruzaron": 2, "llegadas": 5, "espera_prom": 4.0, "cola_max": 4}
+    # hasta un ciclo ya pisado por el anillo: solo lo que sigue guardado
+    assert [x["ciclo"] for x in h.ciclos(3)] == [2, 3]
@@ -0,0 +1,9 @@
+from src.experiments.virtual import simular
+from src.models.llegadas import FuenteBernoulli
+
+
+def test_accionado_sin_demanda_termina():
+    # sin nadie en rojo el verde descansa, pero solo hasta MAX_GREEN
+    r = simular(cycles=3, fuente=FuenteBernoulli(0.0, seed=0), control="actuated")
+    assert r["cruzaron"] == 0
+    assert r["max_outs"] == 3